@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import argparse
+import random
+import re
+
+from twitchcancer.chat import replay
+from twitchcancer.chat.websocket.client import TwitchClient, ingest_stats
+from twitchcancer.symptom import benchmark
+
+# what the parser replaced, for reference
+channel_message_re = re.compile(".*? PRIVMSG (#[a-zA-z0-9_]*?) :(.*)")
+
+
+def parse_regex(line):
+    match = channel_message_re.match(line)
+
+    if not match:
+        return None
+
+    return {
+        'channel': match.group(1),
+        'message': match.group(2).replace('\x01ACTION ', '').replace('\x01', '')
+    }
+
+
+# returns a list of raw IRC lines looking like a busy connection: chat messages with tags and {membership} JOIN/PART
+def generate(count, seed=0, membership=0.35):
+    r = random.Random(seed)
+    messages = benchmark.generate(count, seed)
+
+    lines = []
+    for i, message in enumerate(messages):
+        user = 'viewer{0}'.format(r.randint(0, 100000))
+        channel = '#channel{0}'.format(r.randint(0, 200))
+        kind = r.random()
+
+        if kind < membership * 0.8:
+            lines.append(':{0}!{0}@{0}.tmi.twitch.tv JOIN {1}'.format(user, channel))
+        elif kind < membership:
+            lines.append(':{0}!{0}@{0}.tmi.twitch.tv PART {1}'.format(user, channel))
+        else:
+            tags = 'badge-info=;badges=subscriber/12;color=#FF69B4;display-name={0};emotes=25:0-4;first-msg=0;' \
+                   'flags=;id=8f0a5c2e-{1:04x}-4b1e-9c1e-0242ac120002;mod=0;room-id=22484632;subscriber=1;' \
+                   'tmi-sent-ts=1600000000{1:03d};turbo=0;user-id={2};user-type='
+            tags = tags.format(user, i % 1000, r.randint(0, 10 ** 8))
+            lines.append('@{0} :{1}!{1}@{1}.tmi.twitch.tv PRIVMSG {2} :{3}'.format(tags, user, channel, message))
+
+    return lines
+
+
+# returns the IRC lines of recorded traffic, one line per line with an optional leading timestamp (.gz ok)
+def load(path):
+    return [line for _, line in replay.read(path)]
+
+
+# returns the chat messages of a frame the way onMessage() did before the bytes ingest
+def parse_frame(payload):
+    return [p for p in map(TwitchClient.parse_message, payload.decode('utf8').split('\r\n')) if p]
+
+
+# returns frames of {size} lines, as received from the websocket
+def frames(lines, size=10):
+    return [''.join(line + '\r\n' for line in lines[i:i + size]).encode('utf8') for i in range(0, len(lines), size)]
+
+
+# returns lines where the parser doesn't find the message the regex found
+def disagreements(lines):
+    for line in lines:
+        expected = parse_regex(line)
+        if expected is None:
+            continue
+
+        parsed = TwitchClient.parse_message(line)
+        if parsed is None or (parsed['channel'], parsed['message']) != (expected['channel'], expected['message']):
+            yield line
+
+
+def main():
+    # benchmark IRC parsing, offline
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--traffic', dest='traffic', action='append', default=[],
+                        help="parse recorded traffic, one IRC line per line (.gz ok), can be repeated")
+    parser.add_argument('--lines', dest='lines', default=50000, type=int,
+                        help="number of lines of synthetic traffic, 0 to skip it (default: 50000)")
+    parser.add_argument('--membership', dest='membership', default=0.35, type=float,
+                        help="ratio of JOIN/PART lines in synthetic traffic (default: 0.35)")
+    args = parser.parse_args()
+
+    corpora = {}
+    for path in args.traffic:
+        corpora[path] = load(path)
+    if args.lines:
+        corpora['synthetic'] = generate(args.lines, membership=args.membership)
+
+    results = {}
+    for name, lines in corpora.items():
+        for line in disagreements(lines):
+            raise RuntimeError("the parser and the regex don't agree on {0!r}".format(line))
+
+        # whole frames, decoded then parsed line by line or classified on bytes
+        payloads = frames(lines)
+        client = TwitchClient()
+        before = dict(ingest_stats)
+
+        results[name] = {
+            'regex': benchmark.measure(parse_regex, lines),
+            'parser': benchmark.measure(TwitchClient.parse_message, lines),
+            'frame decode': benchmark.measure(parse_frame, payloads),
+            'frame ingest': benchmark.measure(client.ingest, payloads),
+        }
+
+        decoded = ingest_stats['decoded'] - before['decoded']
+        skipped = ingest_stats['skipped'] - before['skipped']
+        print('{0}: ingest decoded {1:.1%} of the bytes, skipped {2:.1%}'.format(
+            name, decoded / (decoded + skipped), skipped / (decoded + skipped)))
+
+    benchmark.display(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import asyncio
+import bisect
+import gzip
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# lists the segments of a capture directory and the time their first frame was received at
+INDEX = 'index.txt'
+
+
+# returns the paths of the segments of a capture directory in order, starting with the one holding {start} if any
+def segments(directory, start=None):
+    starts = []
+    names = []
+
+    try:
+        with open(os.path.join(directory, INDEX)) as index:
+            for line in index:
+                timestamp, _, name = line.rstrip('\n').partition(' ')
+                if name and name not in names:
+                    starts.append(float(timestamp))
+                    names.append(name)
+    except FileNotFoundError:
+        return []
+
+    first = 0
+    if start is not None:
+        first = max(bisect.bisect_right(starts, start) - 1, 0)
+
+    return [os.path.join(directory, name) for name in names[first:]]
+
+
+# writes received frames to rotating gzip segments, one line per IRC line preceded by the time it was received at,
+# the format --replay reads
+#
+# directory: where segments and their index go
+# segment_size: uncompressed bytes of a segment before starting the next one
+# segment_duration: seconds of a segment before starting the next one
+# buffer_size: bytes of frames to buffer before writing them
+# flush_interval: seconds frames can stay buffered
+#
+# frames are buffered on the event loop and written by a single thread, segments are synced after every write so
+# they can be read up to the last one even if the monitor dies
+class Capture:
+
+    # gzip compression level, a bit faster than the default for about the same size on chat
+    compresslevel = 6
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, segment_duration=3600, buffer_size=1024 * 1024,
+                 flush_interval=1.0, executor=None):
+        super().__init__()
+
+        self.directory = directory
+        self.segment_size = segment_size
+        self.segment_duration = segment_duration
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        os.makedirs(directory, exist_ok=True)
+
+        # frames waiting to be written, on the event loop
+        self._buffer = []
+        self._buffered = 0
+        self._timer = None
+
+        # the current segment, only used by the writer thread
+        self.executor = executor or ThreadPoolExecutor(1, thread_name_prefix='capture')
+        self._file = None
+        self._start = None
+        self._size = 0
+
+        # frames captured so far
+        self.frames = 0
+
+        logger.info('capturing chat to %s', directory)
+
+    # returns a capture built from a config dict like monitor.capture
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['directory'], segment_size=config['segment_size'],
+                   segment_duration=config['segment_duration'], buffer_size=config['buffer_size'],
+                   flush_interval=config['flush_interval'])
+
+    # buffers a frame received at {timestamp} (defaults to now)
+    def write(self, payload: bytes, timestamp=None):
+        self._buffer.append((timestamp or time.time(), payload))
+        self._buffered += len(payload)
+        self.frames += 1
+
+        if self._buffered >= self.buffer_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(self.flush_interval, self.flush)
+
+    # hands buffered frames to the writer thread, returns the future of their writing
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        frames, self._buffer = self._buffer, []
+        self._buffered = 0
+
+        return self.executor.submit(self._write, frames)
+
+    # writes buffered frames and closes the current segment
+    def close(self):
+        self.flush()
+        self.executor.submit(self._close).result()
+        self.executor.shutdown()
+
+    # writer thread
+    def _write(self, frames):
+        try:
+            for timestamp, payload in frames:
+                if self._file is None or self._size >= self.segment_size or \
+                        timestamp - self._start >= self.segment_duration:
+                    self._rotate(timestamp)
+
+                prefix = b'%.3f ' % timestamp
+                data = b''.join(prefix + line + b'\n' for line in payload.split(b'\r\n') if line)
+
+                self._file.write(data)
+                self._size += len(data)
+
+            # everything written so far can be decompressed, whatever happens next
+            if self._file is not None:
+                self._file.flush(zlib.Z_SYNC_FLUSH)
+        except Exception as e:
+            logger.error('failed to capture %s frames: %s', len(frames), e)
+
+    # writer thread
+    def _rotate(self, timestamp):
+        self._close()
+
+        started = time.strftime('%Y%m%d-%H%M%S', time.gmtime(timestamp))
+        name = 'chat-{0}-{1:03d}.txt.gz'.format(started, int(timestamp * 1000) % 1000)
+
+        # segments are only ever appended to, a segment started again gets another gzip member
+        self._file = gzip.open(os.path.join(self.directory, name), 'ab', compresslevel=self.compresslevel)
+        self._start = timestamp
+        self._size = 0
+
+        with open(os.path.join(self.directory, INDEX), 'a') as index:
+            index.write('{0:.3f} {1}\n'.format(timestamp, name))
+
+        logger.info('started capture segment %s', name)
+
+    # writer thread
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
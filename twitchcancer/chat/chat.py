@@ -10,7 +10,8 @@ logger = logging.getLogger(__name__)
 def run(args):
     # profiling: yappi.start()
 
-    monitor = AsyncWebSocketMonitor(viewers=args.viewers)
+    monitor = AsyncWebSocketMonitor(viewers=args.viewers, workers=args.workers,
+                                    channels_per_connection=args.channels_per_connection)
     monitor.run()
 
     # profiling: yappi.get_func_stats().print_all()
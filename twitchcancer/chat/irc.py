@@ -0,0 +1,183 @@
+import collections
+
+# a parsed IRC line, see https://ircv3.net/specs/extensions/message-tags
+# tags: raw tags without the leading @, parse them with parse_tags() or tag()
+# prefix: raw prefix without the leading :, eg. nick!user@host
+# command: eg. PRIVMSG or RECONNECT
+# params: list of parameters, the trailing one included
+Line = collections.namedtuple('Line', ['tags', 'prefix', 'command', 'params'])
+
+# escaped characters in tag values
+tag_escapes = {':': ';', 's': ' ', '\\': '\\', 'r': '\r', 'n': '\n'}
+
+
+# returns a Line, or None if the line is empty
+def parse(line):
+    line = line.rstrip('\r\n')
+    if not line:
+        return None
+
+    tags = ''
+    if line[0] == '@':
+        tags, _, line = line.partition(' ')
+        tags = tags[1:]
+
+    prefix = ''
+    if line[:1] == ':':
+        prefix, _, line = line.partition(' ')
+        prefix = prefix[1:]
+
+    line, separator, trailing = line.partition(' :')
+    params = line.split()
+    if not params:
+        return None
+
+    if separator:
+        params.append(trailing)
+
+    return Line(tags, prefix, params[0], params[1:])
+
+
+# returns (channel, text, raw tags) of a PRIVMSG line, or None for any other line
+#
+# the fast path for chat messages: skips over tags and prefix without splitting them, only channel and text are copied
+def parse_privmsg(line):
+    start = 0
+
+    # tags
+    if line[:1] == '@':
+        start = line.find(' ') + 1
+        if not start:
+            return None
+        tags = line[1:start - 1]
+    else:
+        tags = ''
+
+    # prefix
+    if line.startswith(':', start):
+        start = line.find(' ', start) + 1
+        if not start:
+            return None
+
+    if not line.startswith('PRIVMSG ', start):
+        return None
+
+    # PRIVMSG #channel :text
+    start += 8
+    end = line.find(' :', start)
+    if end < 0:
+        return None
+
+    text = line[end + 2:]
+    if text[-1:] in '\r\n':
+        text = text.rstrip('\r\n')
+
+    return line[start:end], text, tags
+
+
+# returns (channel, text, raw tags) of a PRIVMSG line of raw bytes, or None for any other line
+#
+# same as parse_privmsg() without decoding anything but the channel and the text, tags stay raw bytes
+def parse_privmsg_bytes(line):
+    command = line.find(b' PRIVMSG #')
+    if command < 0:
+        return None
+
+    # the command must come right after tags and prefix, not in the text of another command
+    start = 0
+    tags = b''
+    if line[:1] == b'@':
+        start = line.find(b' ') + 1
+        tags = line[1:start - 1]
+    if line.startswith(b':', start):
+        start = line.find(b' ', start) + 1
+    if start != command + 1:
+        return None
+
+    # PRIVMSG #channel :text
+    end = line.find(b' :', command + 9)
+    if end < 0:
+        return None
+
+    text = line[end + 2:]
+    if text[-1:] in b'\r\n':
+        text = text.rstrip(b'\r\n')
+
+    return line[command + 9:end].decode('utf8'), text.decode('utf8', 'replace'), tags
+
+
+# returns the text of a CTCP ACTION (/me) as plain text, other text untouched
+def strip_action(text):
+    if text.startswith('\x01ACTION '):
+        text = text[8:]
+
+    if '\x01' in text:
+        text = text.replace('\x01', '')
+
+    return text
+
+
+# returns {key: value} of raw tags, with values unescaped
+def parse_tags(tags):
+    if isinstance(tags, bytes):
+        tags = tags.decode('utf8', 'replace')
+
+    parsed = {}
+
+    for tag in tags.split(';'):
+        key, _, value = tag.partition('=')
+        if key:
+            parsed[key] = unescape(value) if '\\' in value else value
+
+    return parsed
+
+
+# returns the value of a single tag, or None if it's not there, without parsing every tag
+def tag(tags, key):
+    if isinstance(tags, bytes):
+        tags = tags.decode('utf8', 'replace')
+
+    start = 0
+    key += '='
+
+    while True:
+        if tags.startswith(key, start):
+            start += len(key)
+            end = tags.find(';', start)
+            value = tags[start:end] if end >= 0 else tags[start:]
+            return unescape(value) if '\\' in value else value
+
+        start = tags.find(';', start) + 1
+        if not start:
+            return None
+
+
+# returns a tag value with its escaped characters replaced
+def unescape(value):
+    unescaped = []
+
+    escaped = False
+    for c in value:
+        if escaped:
+            unescaped.append(tag_escapes.get(c, c))
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        else:
+            unescaped.append(c)
+
+    return ''.join(unescaped)
+
+
+# returns [(emote id, first character, last character)] of the emotes tag of a message, eg. 25:0-4,12-16/1902:6-10
+def parse_emotes(value):
+    emotes = []
+
+    for emote in filter(None, value.split('/')):
+        emote_id, _, positions = emote.partition(':')
+
+        for position in positions.split(','):
+            first, _, last = position.partition('-')
+            emotes.append((emote_id, int(first), int(last)))
+
+    return emotes
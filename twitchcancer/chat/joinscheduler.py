@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# longest list of channels in a single command, IRC lines are at most 512 bytes with the command and \r\n
+max_length = 500
+
+
+# sends JOIN and PART commands of many channels at a pace Twitch accepts, see
+# https://dev.twitch.tv/docs/irc/#rate-limits
+#
+# rate: channels joined or left per second, on average
+# burst: channels that can be joined or left at once after a quiet period
+# batch_size: channels in a single comma-separated command
+#
+# queued channels are sent biggest first, a channel left before its JOIN was sent is never joined
+# commands are sent with {client}.send(command, channels), which returns False if the connection isn't open anymore
+class JoinScheduler:
+
+    # a clock that doesn't go back
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, rate=2.0, burst=20, batch_size=10):
+        super().__init__()
+
+        self.rate = rate
+        self.burst = burst
+        self.batch_size = batch_size
+
+        # a token per channel, refilled at {rate} up to {burst}
+        self._tokens = burst
+        self._refilled = self.clock()
+
+        # {(client, command): heap of [-viewers, order, channel, valid]}
+        self._queues = {}
+        self._queued = {}
+        self._order = itertools.count()
+
+        # latest viewer count of each channel, channels rejoined later keep their place
+        self.viewers = {}
+
+        self._sending = None
+
+    # number of channels waiting to be joined or left
+    def __len__(self):
+        return len(self._queued)
+
+    # number of channels waiting to be joined or left on a client
+    def queued(self, client):
+        return sum(1 for c, _ in self._queued if c is client)
+
+    # queues a channel to join
+    def join(self, client, channel, viewers=None):
+        if viewers is not None:
+            self.viewers[channel] = viewers
+
+        self._schedule(client, 'JOIN', channel)
+
+    # queues a channel to leave
+    def part(self, client, channel):
+        self.viewers.pop(channel, None)
+
+        self._schedule(client, 'PART', channel)
+
+    # forgets channels queued on a client, eg. when its connection is lost
+    def forget(self, client):
+        for key in [key for key in self._queues if key[0] is client]:
+            for entry in self._queues.pop(key):
+                if entry[3]:
+                    del self._queued[(client, entry[2])]
+
+    def _schedule(self, client, command, channel):
+        queued = self._queued.pop((client, channel), None)
+
+        if queued is not None:
+            queued_command, entry = queued
+            entry[3] = False
+
+            # leaving a channel that wasn't joined yet, or joining it back before it was left: nothing to send
+            if queued_command != command:
+                return
+
+        entry = [-self.viewers.get(channel, 0), next(self._order), channel, True]
+        heapq.heappush(self._queues.setdefault((client, command), []), entry)
+        self._queued[(client, channel)] = (command, entry)
+
+        if self._sending is None or self._sending.done():
+            self._sending = asyncio.get_event_loop().create_task(self._send())
+
+    # sends queued commands as fast as tokens allow
+    async def _send(self):
+        while self._queued:
+            self._refill()
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            key, channels = self._take(min(int(self._tokens), self.batch_size))
+            if not channels:
+                break
+
+            self._tokens -= len(channels)
+
+            # the connection was lost meanwhile, its channels are joined again on it once it reconnects
+            client, command = key
+            if not client.send(command, channels):
+                logger.debug('dropped %s of %s channels on a closed connection', command, len(channels))
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    # returns ((client, command), channels) of up to {count} channels of the queue with the biggest channel
+    def _take(self, count):
+        key, queue = None, None
+        for k, q in list(self._queues.items()):
+            # drop channels that won't be sent
+            while q and not q[0][3]:
+                heapq.heappop(q)
+
+            if not q:
+                del self._queues[k]
+            elif queue is None or q[0] < queue[0]:
+                key, queue = k, q
+
+        if queue is None:
+            return None, []
+
+        channels = []
+        length = len(key[1])
+        while queue and len(channels) < count:
+            entry = heapq.heappop(queue)
+            if not entry[3]:
+                continue
+
+            length += len(entry[2]) + 1
+            if channels and length > max_length:
+                heapq.heappush(queue, entry)
+                break
+
+            channels.append(entry[2])
+            del self._queued[(key[0], entry[2])]
+
+        return key, channels
@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import gzip
+import logging
+import os
+import time
+
+from twitchcancer.chat import capture
+from twitchcancer.chat.websocket import client as twitchclient
+from twitchcancer.chat.websocket.client import TwitchClient
+
+logger = logging.getLogger(__name__)
+
+
+# yields (unix timestamp or None, raw IRC line) of recorded traffic, one line per line with an optional leading
+# timestamp (.gz ok), or of every segment of a capture directory
+def read(path):
+    if os.path.isdir(path):
+        for segment in capture.segments(path):
+            yield from read(segment)
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+
+    with opener(path, 'rt', encoding='utf8', errors='replace') as recording:
+        try:
+            for line in recording:
+                line = line.rstrip('\r\n')
+                if not line:
+                    continue
+
+                if line[:1].isdigit():
+                    timestamp, _, line = line.partition(' ')
+                    yield float(timestamp), line
+                else:
+                    yield None, line
+        except EOFError:
+            # the segment a capture was writing to when it stopped
+            logger.warning("%s is truncated, replayed what was before", path)
+
+
+# feeds recorded chat through the same parsing, diagnosis and storage as live chat
+#
+# realtime: wait between messages as long as they were apart when recorded, rather than going as fast as possible
+# messages are stored at the time they were recorded, or at the time they're replayed if the recording has no timestamp
+#
+# summaries of a recorded minute are published once the replay moves past it, whole, leaderboards count each summary
+# as a full minute
+class Replay:
+
+    def __init__(self, path, realtime=False, batch_size=500):
+        super().__init__()
+
+        self.path = path
+        self.realtime = realtime
+        self.batch_size = batch_size
+
+        self.lines = 0
+        self.messages = 0
+
+        # start of the last recorded minute whose summaries were published
+        self.published = None
+
+    async def run(self):
+        batch = []
+        second = None
+
+        # timestamp of the first line, and when it was replayed
+        first = None
+        start = time.monotonic()
+
+        for timestamp, line in read(self.path):
+            self.lines += 1
+
+            # messages of the same second are stored at once
+            current = int(timestamp) if timestamp is not None else None
+            if current != second or len(batch) >= self.batch_size:
+                await self.record(batch, second)
+                batch = []
+                second = current
+
+                if current is not None:
+                    self.publish(current)
+
+                if self.realtime and current is not None:
+                    if first is None:
+                        first = current
+
+                    delay = (current - first) - (time.monotonic() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+            parsed = TwitchClient.parse_message(line)
+            if parsed:
+                batch.append(parsed)
+
+        await self.record(batch, second)
+
+        logger.info("replayed %s messages out of %s lines of %s", self.messages, self.lines, self.path)
+
+    async def record(self, batch, second):
+        if not batch:
+            return
+
+        date = None
+        if second is not None:
+            date = datetime.datetime.fromtimestamp(second, datetime.timezone.utc)
+
+        self.messages += len(batch)
+        await twitchclient.record_batch(batch, date)
+
+    # publishes summaries of the recorded minutes before {second}, they won't get any more messages
+    def publish(self, second):
+        minute = second - second % 60
+        if self.published is not None and minute <= self.published:
+            return
+
+        self.published = minute
+        twitchclient.storage.archive(datetime.datetime.fromtimestamp(minute, datetime.timezone.utc))
+
+
+def run(args):
+    replay = Replay(args.replay, realtime=args.realtime)
+
+    start = time.perf_counter()
+    asyncio.run(replay.run())
+    duration = time.perf_counter() - start
+
+    logger.info("replayed %s messages in %.1fs (%.0f messages/s)", replay.messages, duration,
+                replay.messages / max(duration, 1e-9))
+
+    # publish leaderboards of the last replayed minute
+    twitchclient.storage.archive()
+
+    # leave some time for subscribers to get the summaries before the sockets are closed
+    time.sleep(1)
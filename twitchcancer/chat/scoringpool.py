@@ -0,0 +1,232 @@
+import asyncio
+import collections
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from twitchcancer.symptom import instrumentation
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+logger = logging.getLogger(__name__)
+
+# diagnosis of the current worker process
+diagnosis = None
+
+
+# builds the diagnosis of a worker process from a config dict like monitor.diagnosis
+def init_worker(config):
+    global diagnosis
+    diagnosis = Diagnosis.from_config(config)
+
+
+# does nothing in a worker process, once it returns the worker is started and its diagnosis built
+def ready():
+    return diagnosis is not None
+
+
+# scores a batch of messages in a worker process, messages that can't be scored get None
+def score(messages, channels):
+    return score_with(diagnosis, messages, channels)
+
+
+# returns per-symptom stats of the diagnosis of a worker process, or None if it isn't instrumented
+def report():
+    if diagnosis.instrumentation is None:
+        return None
+
+    return diagnosis.instrumentation.report()
+
+
+# scores a batch of messages with a diagnosis, messages that can't be scored get None
+def score_with(d, messages, channels):
+    try:
+        return d.points_batch(messages, channels)
+    except Exception:
+        points = []
+        for m, c in zip(messages, channels):
+            try:
+                points.append(d.points(m, c))
+            except Exception as e:
+                logger.warning('failed to score %r: %s', m, e)
+                points.append(None)
+        return points
+
+
+# scores messages in a pool of worker processes and hands their points to {store}([(channel, points)])
+#
+# messages are sent to workers in batches, points of a batch are stored at once in the order messages were submitted
+# every message of a channel goes to the same worker, so stateful symptoms like Copypasta see the whole channel
+# when workers fall {max_batches} batches behind, new messages are dropped rather than queued, 0 queues them forever
+class ScoringPool:
+
+    def __init__(self, store, config, workers=2, batch_size=200, batch_delay=0.05, max_batches=50, executors=None):
+        super().__init__()
+
+        self.store = store
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_batches = max_batches
+
+        # config to build a Diagnosis with in each worker
+        self.config = config
+
+        # a single worker executor per shard of channels
+        self.executors = executors or [self._executor() for _ in range(workers)]
+        self.workers = len(self.executors)
+
+        # messages waiting for a batch to fill up
+        self._pending = []
+        self._timer = None
+
+        # batches sent to workers, oldest first
+        self._batches = collections.deque()
+        self._storing = None
+
+        # messages dropped because workers fell behind
+        self.dropped = 0
+        self._dropping = False
+
+        logger.info('started a scoring pool with %s workers', self.workers)
+
+    # workers are spawned rather than forked from a process running threads and zmq sockets
+    def _executor(self, config=None):
+        return ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker, initargs=(config or self.config,))
+
+    # returns the index of the executor scoring a channel, the same one for as long as the pool lives
+    def shard(self, channel):
+        return zlib.crc32(channel.encode('utf8')) % self.workers
+
+    # number of messages submitted but not stored yet
+    def __len__(self):
+        return len(self._pending) + sum(len(records) for records, _ in self._batches)
+
+    # queues a message for scoring, sending the batch once it's full or old enough
+    def submit(self, channel, message):
+        self._pending.append((channel, message))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(self.batch_delay, self.flush)
+
+    # queues a list of (channel, message) for scoring
+    def submit_batch(self, records):
+        self._pending.extend(records)
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None and self._pending:
+            self._timer = asyncio.get_event_loop().call_later(self.batch_delay, self.flush)
+
+    # sends pending messages to the workers of their channels
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        records, self._pending = self._pending, []
+
+        if self.max_batches and len(self._batches) >= self.max_batches:
+            if not self._dropping:
+                logger.warning('scoring workers are %s batches behind, dropping messages until they catch up',
+                               len(self._batches))
+            self._dropping = True
+            self.dropped += len(records)
+            return
+
+        if self._dropping:
+            logger.warning('scoring workers caught up, %s messages dropped so far', self.dropped)
+            self._dropping = False
+
+        # {shard: indexes of its records}
+        shards = {}
+        for i, (channel, _) in enumerate(records):
+            shards.setdefault(self.shard(channel), []).append(i)
+
+        loop = asyncio.get_event_loop()
+        futures = [(indexes, loop.run_in_executor(self.executors[shard], score,
+                                                  [records[i][1] for i in indexes],
+                                                  [records[i][0] for i in indexes]))
+                   for shard, indexes in shards.items()]
+        self._batches.append((records, futures))
+
+        if self._storing is None or self._storing.done():
+            self._storing = loop.create_task(self._store())
+
+    # stores points of scored batches, in order
+    async def _store(self):
+        while self._batches:
+            records, futures = self._batches[0]
+
+            # put points of each shard back in the order messages were submitted
+            points = [None] * len(records)
+            for indexes, future in futures:
+                try:
+                    for i, p in zip(indexes, await future):
+                        points[i] = p
+                except Exception as e:
+                    logger.warning('lost a batch of %s messages: %s', len(indexes), e)
+
+            self._batches.popleft()
+
+            scored = [(channel, p) for (channel, _), p in zip(records, points) if p is not None]
+            if scored:
+                self.store(scored)
+
+    # logs per-symptom stats of each worker, workers don't log themselves, and returns them
+    async def report(self):
+        loop = asyncio.get_event_loop()
+        reports = await asyncio.gather(*[loop.run_in_executor(executor, report) for executor in self.executors],
+                                       return_exceptions=True)
+
+        for worker, r in enumerate(reports):
+            if isinstance(r, Exception):
+                logger.warning('failed to get the stats of worker %s: %s', worker, r)
+            elif r is not None:
+                instrumentation.log(r, 'worker {0}: '.format(worker))
+
+        return reports
+
+    # replaces workers with new ones using another config, once they're started and have built their diagnosis
+    # messages keep being scored by old workers meanwhile, and the ones already sent to them are scored by them
+    # returns False and keeps the old workers if new ones can't start
+    async def reload(self, config):
+        loop = asyncio.get_event_loop()
+        executors = [self._executor(config) for _ in range(self.workers)]
+
+        try:
+            await asyncio.gather(*[loop.run_in_executor(executor, ready) for executor in executors])
+        except Exception as e:
+            logger.error('failed to start new scoring workers, keeping the current ones: %s', e)
+
+            for executor in executors:
+                executor.shutdown(wait=False)
+            return False
+
+        self.config = config
+
+        executors, self.executors = self.executors, executors
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+        logger.info('reloaded the scoring pool')
+        return True
+
+    # stores everything submitted so far
+    async def drain(self):
+        self.flush()
+
+        if self._storing is not None:
+            await self._storing
+
+    # stores everything submitted so far and stops workers
+    async def close(self):
+        await self.drain()
+
+        for executor in self.executors:
+            executor.shutdown()
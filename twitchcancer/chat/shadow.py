@@ -0,0 +1,104 @@
+import logging
+import time
+
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+logger = logging.getLogger(__name__)
+
+
+# returns the config of the shadow diagnosis: monitor.diagnosis with the symptoms of monitor.shadow, if any
+def shadow_config(diagnosis_config, config):
+    shadow = dict(diagnosis_config)
+
+    if config['symptoms']:
+        shadow['symptoms'] = config['symptoms']
+
+    return shadow
+
+
+# scores a sample of messages with another diagnosis and hands their points to {store}(channel, points)
+#
+# rate: ratio of messages to score
+# budget: CPU seconds the shadow diagnosis can use per second, once spent no more message is scored until the next
+#         {interval} seconds and the sampling rate goes down to fit in the budget
+class ShadowScorer:
+
+    # CPU time of the current thread, other threads don't count
+    clock = staticmethod(time.thread_time_ns)
+
+    def __init__(self, diagnosis, store, rate=0.1, budget=0.05, interval=1.0):
+        super().__init__()
+
+        self.diagnosis = diagnosis
+        self.store = store
+        self.target_rate = rate
+        self.rate = rate
+        self.budget = budget
+        self.interval = interval
+
+        # one message is scored every time the credit reaches 1
+        self._credit = 0.0
+
+        # CPU time spent in the current interval, in nanoseconds
+        self._spent = 0
+        self._allowance = budget * interval * 1e9
+        self._start = time.monotonic()
+
+        # messages scored, and skipped for lack of budget in the current interval
+        self.scored = 0
+        self.skipped = 0
+
+    # returns a shadow scorer built from config dicts like monitor.diagnosis and monitor.shadow
+    @classmethod
+    def from_config(cls, diagnosis_config, config, store):
+        diagnosis = Diagnosis.from_config(shadow_config(diagnosis_config, config))
+        return cls(diagnosis, store, rate=config['rate'], budget=config['budget'])
+
+    # scores the message if it's part of the sample and there's budget left
+    def submit(self, channel, message):
+        now = time.monotonic()
+        if now - self._start >= self.interval:
+            self._adjust(now)
+
+        self._credit += self.rate
+        if self._credit < 1:
+            return
+        self._credit -= 1
+
+        # the budget of this interval is spent
+        if self._spent >= self._allowance:
+            self.skipped += 1
+            return
+
+        start = self.clock()
+        try:
+            points = self.diagnosis.points(message, channel)
+        except Exception as e:
+            logger.debug('shadow diagnosis failed on %r: %s', message, e)
+            return
+        finally:
+            self._spent += self.clock() - start
+
+        self.scored += 1
+        self.store(channel, points)
+
+    # adapts the sampling rate to the CPU used during the last interval and starts a new one
+    def _adjust(self, now):
+        used = self._spent / 1e9 / (now - self._start)
+        rate = self.rate
+
+        # over budget: sample as much less as needed to fit, with some margin
+        if used > self.budget:
+            rate = max(self.rate * self.budget / used * 0.8, self.target_rate / 1000)
+        # well under budget: go back up towards the configured rate
+        elif used < self.budget / 2 and not self.skipped:
+            rate = min(self.rate * 2, self.target_rate)
+
+        if rate != self.rate:
+            logger.info('shadow diagnosis used %.1f%% CPU for a budget of %.1f%%, sampling rate %.4f -> %.4f',
+                        used * 100, self.budget * 100, self.rate, rate)
+            self.rate = rate
+
+        self._spent = 0
+        self._start = now
+        self.skipped = 0
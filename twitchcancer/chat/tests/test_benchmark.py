@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+
+from twitchcancer.chat import benchmark
+
+
+# twitchcancer.chat.benchmark.generate()
+# twitchcancer.chat.benchmark.disagreements()
+class TestBenchmarkGenerate(unittest.TestCase):
+
+    # check that synthetic traffic is reproducible and parsed like the regex did
+    def test_generate(self):
+        lines = benchmark.generate(200)
+
+        self.assertEqual(lines, benchmark.generate(200))
+        self.assertEqual(list(benchmark.disagreements(lines)), [])
+
+
+# twitchcancer.chat.benchmark.load()
+class TestBenchmarkLoad(unittest.TestCase):
+
+    # check that leading timestamps are removed
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traffic.txt')
+            with open(path, 'w') as f:
+                f.write('1600000000.5 :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello\n'
+                        ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :there\n')
+
+            self.assertEqual(benchmark.load(path), [':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello',
+                                                    ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :there'])
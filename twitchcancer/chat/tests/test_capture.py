@@ -0,0 +1,125 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from twitchcancer.chat import capture, replay
+from twitchcancer.chat.capture import Capture
+
+frame = (b':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there\r\n'
+         b':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n')
+
+
+class CaptureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    # captures frames received at each timestamp
+    def capture(self, timestamps, **kwargs):
+        c = Capture(self.directory, **kwargs)
+
+        async def run():
+            for timestamp in timestamps:
+                c.write(frame, timestamp)
+
+        asyncio.run(run())
+        c.close()
+
+        return c
+
+
+# twitchcancer.chat.capture.Capture
+class TestCapture(CaptureTestCase):
+
+    # check that frames are written line by line with their timestamp, the way replay reads them
+    def test_replay(self):
+        self.capture([1600000000.25, 1600000001.5])
+
+        self.assertEqual(list(replay.read(self.directory)), [
+            (1600000000.25, ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there'),
+            (1600000000.25, ':foo!foo@foo.tmi.twitch.tv JOIN #bar'),
+            (1600000001.5, ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there'),
+            (1600000001.5, ':foo!foo@foo.tmi.twitch.tv JOIN #bar'),
+        ])
+
+    # check that segments rotate after some time
+    def test_rotate_duration(self):
+        self.capture([1600000000, 1600000010, 1600000020, 1600000030], segment_duration=15)
+
+        self.assertEqual([os.path.basename(p) for p in capture.segments(self.directory)],
+                         ['chat-20200913-122640-000.txt.gz', 'chat-20200913-122700-000.txt.gz'])
+
+    # check that segments rotate after some size
+    def test_rotate_size(self):
+        self.capture([1600000000 + i for i in range(10)], segment_size=len(frame) * 3)
+
+        self.assertEqual(len(capture.segments(self.directory)), 4)
+        self.assertEqual(len(list(replay.read(self.directory))), 20)
+
+    # check that frames are written by the writer thread once the buffer is full
+    def test_buffered(self):
+        c = Capture(self.directory, buffer_size=len(frame) * 3, executor=MagicMock())
+
+        async def run():
+            c.write(frame)
+            c.write(frame)
+            self.assertFalse(c.executor.submit.called)
+
+            c.write(frame)
+            self.assertEqual(len(c.executor.submit.call_args[0][1]), 3)
+
+        asyncio.run(run())
+
+    # check that frames don't stay buffered forever
+    def test_flush_interval(self):
+        c = Capture(self.directory, flush_interval=0.01, executor=MagicMock())
+
+        async def run():
+            c.write(frame)
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+
+        self.assertEqual(len(c.executor.submit.call_args[0][1]), 1)
+
+    # check that segments are readable up to the last write while still being written to
+    def test_truncated(self):
+        c = Capture(self.directory)
+
+        async def run():
+            c.write(frame, 1600000000)
+
+        asyncio.run(run())
+        c.flush().result()
+
+        self.assertEqual(len(list(replay.read(self.directory))), 2)
+        c.close()
+
+    # check that a new capture appends to an existing directory
+    def test_append(self):
+        self.capture([1600000000])
+        self.capture([1600000100])
+
+        self.assertEqual(len(capture.segments(self.directory)), 2)
+        self.assertEqual(len(list(replay.read(self.directory))), 4)
+
+
+# twitchcancer.chat.capture.segments()
+class TestSegments(CaptureTestCase):
+
+    # check that seeking starts with the segment holding the timestamp
+    def test_start(self):
+        self.capture([1600000000, 1600000010, 1600000020, 1600000030], segment_duration=5)
+        paths = capture.segments(self.directory)
+
+        self.assertEqual(capture.segments(self.directory, 1600000015), paths[1:])
+        self.assertEqual(capture.segments(self.directory, 1600000020), paths[2:])
+        self.assertEqual(capture.segments(self.directory, 1500000000), paths)
+
+    # check that a directory without capture has no segment
+    def test_empty(self):
+        self.assertEqual(capture.segments(self.directory), [])
@@ -0,0 +1,156 @@
+import unittest
+
+from twitchcancer.chat import irc
+
+privmsg = ('@badge-info=;badges=;color=#FF69B4;display-name=Mancowbeaar;emotes=25:0-4,12-16/1902:6-10;'
+           'id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;user-id=1337;user-type= '
+           ':mancowbeaar!mancowbeaar@mancowbeaar.tmi.twitch.tv PRIVMSG #forsenlol :Kappa Keepo Kappa\r\n')
+
+
+# twitchcancer.chat.irc.parse()
+class TestParse(unittest.TestCase):
+
+    # check that every part of a line is found
+    def test_privmsg(self):
+        line = irc.parse(privmsg)
+
+        self.assertTrue(line.tags.startswith('badge-info=;'))
+        self.assertEqual(line.prefix, 'mancowbeaar!mancowbeaar@mancowbeaar.tmi.twitch.tv')
+        self.assertEqual(line.command, 'PRIVMSG')
+        self.assertEqual(line.params, ['#forsenlol', 'Kappa Keepo Kappa'])
+
+    # check lines without tags, prefix or params
+    def test_minimal(self):
+        self.assertEqual(irc.parse('PING :tmi.twitch.tv\r\n'), irc.Line('', '', 'PING', ['tmi.twitch.tv']))
+        self.assertEqual(irc.parse(':tmi.twitch.tv RECONNECT'), irc.Line('', 'tmi.twitch.tv', 'RECONNECT', []))
+        self.assertEqual(irc.parse(':foo!foo@foo.tmi.twitch.tv JOIN #bar'),
+                         irc.Line('', 'foo!foo@foo.tmi.twitch.tv', 'JOIN', ['#bar']))
+        self.assertEqual(irc.parse(':tmi.twitch.tv 001 foo :Welcome, GLHF!'),
+                         irc.Line('', 'tmi.twitch.tv', '001', ['foo', 'Welcome, GLHF!']))
+
+    # check that empty lines are ignored
+    def test_empty(self):
+        self.assertEqual(irc.parse(''), None)
+        self.assertEqual(irc.parse('\r\n'), None)
+        self.assertEqual(irc.parse('@foo=bar :prefix'), None)
+
+
+# twitchcancer.chat.irc.parse_privmsg()
+class TestParsePrivmsg(unittest.TestCase):
+
+    def test_privmsg(self):
+        channel, text, tags = irc.parse_privmsg(privmsg)
+
+        self.assertEqual(channel, '#forsenlol')
+        self.assertEqual(text, 'Kappa Keepo Kappa')
+        self.assertEqual(tags, irc.parse(privmsg).tags)
+
+    # check that the same parts are found as the generic parser
+    def test_same_as_parse(self):
+        lines = [
+            privmsg,
+            ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello :) PRIVMSG #baz :there',
+            'PRIVMSG #bar :no prefix',
+            '@tags=1 PRIVMSG #bar :no prefix',
+            ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar ::)',
+        ]
+
+        for line in lines:
+            parsed = irc.parse(line)
+            self.assertEqual(irc.parse_privmsg(line), (parsed.params[0], parsed.params[1], parsed.tags), line)
+
+    # check that other commands are ignored
+    def test_not_privmsg(self):
+        lines = [
+            '@broadcaster-lang=;r9k=0;slow=0;subs-only=1 :tmi.twitch.tv ROOMSTATE #sc2proleague',
+            ':foo!foo@foo.tmi.twitch.tv JOIN #bar',
+            '@msg-id=sub;login=foo :tmi.twitch.tv USERNOTICE #bar :PRIVMSG #baz :fake',
+            'PING :tmi.twitch.tv',
+            ':tmi.twitch.tv RECONNECT',
+            '@broken',
+            ':broken',
+            ':foo PRIVMSG #bar',
+            '',
+        ]
+
+        for line in lines:
+            self.assertEqual(irc.parse_privmsg(line), None, line)
+
+
+# twitchcancer.chat.irc.parse_privmsg_bytes()
+class TestParsePrivmsgBytes(unittest.TestCase):
+
+    # check that the same parts are found as on decoded lines
+    def test_same_as_parse_privmsg(self):
+        lines = [
+            privmsg,
+            ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello :) PRIVMSG #baz :there',
+            '@tags=1 :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :\u00e7a va \u2764',
+            ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar ::)',
+        ]
+
+        for line in lines:
+            channel, text, tags = irc.parse_privmsg(line)
+            self.assertEqual(irc.parse_privmsg_bytes(line.encode()), (channel, text, tags.encode()), line)
+
+    # check that other commands are ignored, even with a PRIVMSG in their text
+    def test_not_privmsg(self):
+        lines = [
+            ':foo!foo@foo.tmi.twitch.tv JOIN #bar',
+            '@msg-id=sub;login=foo :tmi.twitch.tv USERNOTICE #bar :PRIVMSG #baz :fake',
+            '@msg-id=sub;login=foo :tmi.twitch.tv USERNOTICE #bar :fake PRIVMSG #baz :fake',
+            'PING :tmi.twitch.tv',
+            ':foo PRIVMSG #bar',
+            '',
+        ]
+
+        for line in lines:
+            self.assertEqual(irc.parse_privmsg_bytes(line.encode()), None, line)
+
+
+# twitchcancer.chat.irc.strip_action()
+class TestStripAction(unittest.TestCase):
+
+    def test_strip_action(self):
+        self.assertEqual(irc.strip_action('\x01ACTION waves\x01'), 'waves')
+        self.assertEqual(irc.strip_action('waves'), 'waves')
+        self.assertEqual(irc.strip_action('wa\x01ves'), 'waves')
+
+
+# twitchcancer.chat.irc.parse_tags()
+# twitchcancer.chat.irc.tag()
+class TestTags(unittest.TestCase):
+
+    def test_parse_tags(self):
+        tags = irc.parse_tags(irc.parse(privmsg).tags)
+
+        self.assertEqual(tags['user-id'], '1337')
+        self.assertEqual(tags['id'], 'b34ccfc7-4977-403a-8a94-33c6bac34fb8')
+        self.assertEqual(tags['user-type'], '')
+        self.assertEqual(tags['emotes'], '25:0-4,12-16/1902:6-10')
+
+    def test_tag(self):
+        tags = irc.parse(privmsg).tags
+
+        self.assertEqual(irc.tag(tags.encode(), 'user-id'), '1337')
+        self.assertEqual(irc.tag(tags, 'user-id'), '1337')
+        self.assertEqual(irc.tag(tags, 'badge-info'), '')
+        self.assertEqual(irc.tag(tags, 'user-type'), '')
+        self.assertEqual(irc.tag(tags, 'id'), 'b34ccfc7-4977-403a-8a94-33c6bac34fb8')
+        self.assertEqual(irc.tag(tags, 'missing'), None)
+        self.assertEqual(irc.tag('', 'id'), None)
+
+    # check that escaped values are unescaped
+    def test_escaped(self):
+        tags = 'system-msg=5\\sraiders\\sfrom\\:\\sfoo\\\\bar;msg-id=raid'
+
+        self.assertEqual(irc.parse_tags(tags), {'system-msg': '5 raiders from; foo\\bar', 'msg-id': 'raid'})
+        self.assertEqual(irc.tag(tags, 'system-msg'), '5 raiders from; foo\\bar')
+
+
+# twitchcancer.chat.irc.parse_emotes()
+class TestParseEmotes(unittest.TestCase):
+
+    def test_parse_emotes(self):
+        self.assertEqual(irc.parse_emotes('25:0-4,12-16/1902:6-10'), [('25', 0, 4), ('25', 12, 16), ('1902', 6, 10)])
+        self.assertEqual(irc.parse_emotes(''), [])
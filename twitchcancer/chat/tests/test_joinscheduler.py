@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+
+from twitchcancer.chat.joinscheduler import JoinScheduler
+
+
+class Client:
+
+    def __init__(self, opened=True):
+        self.opened = opened
+        self.sent = []
+
+    def send(self, command, channels):
+        if self.opened:
+            self.sent.append((command, channels))
+        return self.opened
+
+
+# runs {schedule}(scheduler) and waits for every queued command to be sent
+def run(scheduler, schedule):
+    async def main():
+        schedule(scheduler)
+        await scheduler._sending
+
+    asyncio.run(main())
+
+
+# twitchcancer.chat.joinscheduler.JoinScheduler
+class TestJoinScheduler(unittest.TestCase):
+
+    # check that channels are batched biggest first
+    def test_biggest_first(self):
+        client = Client()
+        scheduler = JoinScheduler(burst=100, batch_size=3)
+
+        def schedule(s):
+            for i, viewers in enumerate([10, 500, 30, 2000, 1, 700, 40]):
+                s.join(client, '#channel{0}'.format(i), viewers)
+
+        run(scheduler, schedule)
+
+        self.assertEqual(client.sent, [
+            ('JOIN', ['#channel3', '#channel5', '#channel1']),
+            ('JOIN', ['#channel6', '#channel2', '#channel0']),
+            ('JOIN', ['#channel4']),
+        ])
+        self.assertEqual(len(scheduler), 0)
+
+    # check that no more channels than tokens are sent at once
+    def test_rate(self):
+        client = Client()
+        scheduler = JoinScheduler(rate=200, burst=2, batch_size=10)
+
+        def schedule(s):
+            for i in range(8):
+                s.join(client, '#channel{0}'.format(i))
+
+        start = scheduler.clock()
+        run(scheduler, schedule)
+
+        self.assertTrue(all(len(channels) <= 2 for _, channels in client.sent))
+        self.assertEqual(sum(len(channels) for _, channels in client.sent), 8)
+        self.assertGreaterEqual(scheduler.clock() - start, 6 / 200)
+
+    # check that a command doesn't go over the IRC line length
+    def test_line_length(self):
+        client = Client()
+        scheduler = JoinScheduler(burst=100, batch_size=100)
+
+        def schedule(s):
+            for i in range(50):
+                s.join(client, '#{0:025d}'.format(i))
+
+        run(scheduler, schedule)
+
+        self.assertTrue(all(len('JOIN ' + ','.join(channels)) <= 510 for _, channels in client.sent))
+        self.assertEqual(sum(len(channels) for _, channels in client.sent), 50)
+
+    # check that a channel left before it was joined is never sent
+    def test_cancel(self):
+        client = Client()
+        scheduler = JoinScheduler()
+
+        def schedule(s):
+            s.join(client, '#foo', 10)
+            s.join(client, '#bar', 5)
+            s.part(client, '#foo')
+
+        run(scheduler, schedule)
+
+        self.assertEqual(client.sent, [('JOIN', ['#bar'])])
+
+    # check that leaving a channel on a connection doesn't cancel joining it on another one
+    def test_move(self):
+        old, new = Client(), Client()
+        scheduler = JoinScheduler()
+
+        def schedule(s):
+            s.part(old, '#foo')
+            s.join(new, '#foo')
+
+        run(scheduler, schedule)
+
+        self.assertEqual(old.sent, [('PART', ['#foo'])])
+        self.assertEqual(new.sent, [('JOIN', ['#foo'])])
+
+    # check that a channel rejoined later keeps its viewer count
+    def test_viewers_remembered(self):
+        client = Client()
+        scheduler = JoinScheduler(burst=100)
+        scheduler.viewers['#foo'] = 1000
+
+        def schedule(s):
+            s.join(client, '#bar', 10)
+            s.join(client, '#foo')
+
+        run(scheduler, schedule)
+
+        self.assertEqual(client.sent, [('JOIN', ['#foo', '#bar'])])
+
+    # check that channels of a lost client are forgotten
+    def test_forget(self):
+        lost, client = Client(), Client()
+        scheduler = JoinScheduler()
+
+        def schedule(s):
+            s.join(lost, '#foo')
+            s.join(client, '#bar')
+            s.forget(lost)
+
+        run(scheduler, schedule)
+
+        self.assertEqual(lost.sent, [])
+        self.assertEqual(client.sent, [('JOIN', ['#bar'])])
+
+    # check that a closed connection doesn't stop the others
+    def test_closed(self):
+        closed, client = Client(opened=False), Client()
+        scheduler = JoinScheduler(batch_size=1)
+
+        def schedule(s):
+            s.join(closed, '#foo', 10)
+            s.join(client, '#bar', 5)
+
+        run(scheduler, schedule)
+
+        self.assertEqual(client.sent, [('JOIN', ['#bar'])])
+        self.assertEqual(len(scheduler), 0)
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import gzip
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from twitchcancer.chat import replay
+from twitchcancer.chat.replay import Replay
+from twitchcancer.chat.websocket import client as twitchclient
+from twitchcancer.storage.inmemorystore import InMemoryStore
+from twitchcancer.storage.memorystorage import MemoryStorage
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+recording = ('1600000000.25 :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there\n'
+             '1600000000.5 :foo!foo@foo.tmi.twitch.tv JOIN #bar\n'
+             '1600000000.75 @id=1 :foo!foo@foo.tmi.twitch.tv PRIVMSG #baz :Kappa\n'
+             '\n'
+             '1600000003.0 :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :\x01ACTION waves\x01\n')
+
+
+def at(second):
+    return datetime.datetime.fromtimestamp(second, datetime.timezone.utc)
+
+
+class ReplayTestCase(unittest.TestCase):
+
+    def write(self, content, name='chat.txt'):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        path = os.path.join(directory.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf8') as f:
+            f.write(content)
+
+        return path
+
+
+# twitchcancer.chat.replay.read()
+class TestRead(ReplayTestCase):
+
+    # check that timestamps are split from lines, and that empty lines are skipped
+    def test_timestamps(self):
+        lines = list(replay.read(self.write(recording)))
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0], (1600000000.25, ':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there'))
+
+    # check that lines without timestamp are read as they are
+    def test_no_timestamp(self):
+        lines = list(replay.read(self.write('PING :tmi.twitch.tv\r\n')))
+
+        self.assertEqual(lines, [(None, 'PING :tmi.twitch.tv')])
+
+    # check that gzip recordings are read
+    def test_gzip(self):
+        self.assertEqual(list(replay.read(self.write(recording, 'chat.txt.gz'))),
+                         list(replay.read(self.write(recording))))
+
+
+# twitchcancer.chat.replay.Replay.run()
+class TestReplayRun(ReplayTestCase):
+
+    # check that messages of each second are recorded at once, at the time they were received
+    @patch('twitchcancer.chat.websocket.client.storage')
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    def test_batches(self, record_batch, storage):
+        r = Replay(self.write(recording))
+        asyncio.run(r.run())
+
+        batches = [(call[0][1], [(p['channel'], p['message']) for p in call[0][0]])
+                   for call in record_batch.call_args_list]
+        self.assertEqual(batches, [
+            (at(1600000000), [('#bar', 'hello there'), ('#baz', 'Kappa')]),
+            (at(1600000003), [('#bar', 'waves')]),
+        ])
+        self.assertEqual((r.lines, r.messages), (4, 3))
+
+    # check that the recorded pace is kept in realtime
+    @patch('twitchcancer.chat.websocket.client.storage')
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    @patch('twitchcancer.chat.replay.asyncio.sleep', new_callable=AsyncMock)
+    def test_realtime(self, sleep, record_batch, storage):
+        asyncio.run(Replay(self.write(recording), realtime=True).run())
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 3, places=1)
+
+    # check that nothing waits at maximum speed
+    @patch('twitchcancer.chat.websocket.client.storage')
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    @patch('twitchcancer.chat.replay.asyncio.sleep', new_callable=AsyncMock)
+    def test_maximum_speed(self, sleep, record_batch, storage):
+        asyncio.run(Replay(self.write(recording)).run())
+
+        self.assertFalse(sleep.called)
+
+    # check that replayed messages go through the diagnosis to the storage
+    @patch('twitchcancer.chat.websocket.client.diagnosis', Diagnosis())
+    @patch('twitchcancer.chat.websocket.client.storage')
+    def test_pipeline(self, storage):
+        asyncio.run(Replay(self.write(recording)).run())
+
+        d = Diagnosis()
+        self.assertEqual(storage.store_batch.call_args_list[0][0],
+                         ([('#bar', d.points('hello there')), ('#baz', d.points('Kappa'))], at(1600000000)))
+
+    # check that each recorded minute is published once and whole, even when the cron runs in the middle of it
+    @patch('twitchcancer.chat.websocket.client.diagnosis', Diagnosis())
+    @patch('twitchcancer.storage.memorystorage.MemoryStorage.__init__', return_value=None)
+    def test_minutes(self, init):
+        storage = MemoryStorage()
+        storage._store = InMemoryStore()
+        storage.pubsub_socket = MagicMock()
+
+        line = '{0} :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there\n'
+        seconds = [1600000000, 1600000001, 1600000010, 1600000030, 1600000031, 1600000100]
+        record_batch = twitchclient.record_batch
+
+        # the cron runs after every batch
+        async def cron(batch, date=None):
+            await record_batch(batch, date)
+            storage._archive()
+
+        with patch('twitchcancer.chat.websocket.client.storage', storage), \
+                patch('twitchcancer.chat.websocket.client.record_batch', cron):
+            asyncio.run(Replay(self.write(''.join(line.format(s) for s in seconds))).run())
+            self.assertEqual(storage.pubsub_socket.send_multipart.call_count, 2)
+
+            storage.archive()
+
+        summaries = [pickle.loads(c[0][0][1]) for c in storage.pubsub_socket.send_multipart.call_args_list]
+        self.assertEqual([(s['date'], s['channel'], s['messages']) for s in summaries], [
+            (at(1599999960), '#bar', 3),
+            (at(1600000020), '#bar', 2),
+            (at(1600000080), '#bar', 1),
+        ])
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from twitchcancer.chat import scoringpool
+from twitchcancer.chat.scoringpool import ScoringPool
+from twitchcancer.config import Config
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+messages = [('#foo', 'Kappa Kappa'), ('#bar', 'hello there'), ('#foo', 'darude sandstorm'), ('#foo', 'lol')]
+
+
+# twitchcancer.chat.scoringpool.score()
+class TestScore(unittest.TestCase):
+
+    # check that messages are scored like the diagnosis does
+    def test_score(self):
+        scoringpool.init_worker(Config.get('monitor.diagnosis'))
+
+        self.assertEqual(scoringpool.score(['Kappa', 'lol'], ['#foo', '#bar']),
+                         Diagnosis().points_batch(['Kappa', 'lol']))
+
+    # check that a message we can't score doesn't lose the batch
+    def test_score_failure(self):
+        scoringpool.init_worker(Config.get('monitor.diagnosis'))
+
+        self.assertEqual(scoringpool.score(['Kappa', ' '], ['#foo', '#bar']), [Diagnosis().points('Kappa'), None])
+
+
+# twitchcancer.chat.scoringpool.ScoringPool
+class TestScoringPool(unittest.TestCase):
+
+    # check that points are stored in order, with worker processes
+    def test_store_in_order(self):
+        stored = []
+
+        async def run():
+            pool = ScoringPool(stored.extend, Config.get('monitor.diagnosis'),
+                               workers=1, batch_size=3)
+            for channel, message in messages:
+                pool.submit(channel, message)
+            await pool.close()
+
+        asyncio.run(run())
+
+        d = Diagnosis()
+        self.assertEqual(stored, [(c, d.points(m)) for c, m in messages])
+
+    # check that batches are sent when full or after a delay
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_batches(self):
+        stored = []
+
+        async def run():
+            pool = ScoringPool(stored.append, {}, batch_size=2, batch_delay=0.01,
+                               executors=[ThreadPoolExecutor(1)])
+
+            pool.submit('#foo', 'Kappa')
+            self.assertEqual(len(pool._batches), 0)
+            pool.submit('#foo', 'Kappa')
+            self.assertEqual(len(pool._batches), 1)
+
+            pool.submit('#bar', 'Kappa')
+            self.assertEqual(len(pool), 3)
+            await asyncio.sleep(0.1)
+
+            self.assertEqual(len(pool), 0)
+            await pool.close()
+
+        asyncio.run(run())
+
+        d = Diagnosis()
+        self.assertEqual(stored, [[('#foo', d.points('Kappa'))] * 2, [('#bar', d.points('Kappa'))]])
+
+    # check that batches of messages are queued at once
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_submit_batch(self):
+        stored = []
+
+        async def run():
+            pool = ScoringPool(stored.extend, {}, batch_size=3, batch_delay=0.01, executors=[ThreadPoolExecutor(1)])
+
+            pool.submit_batch(messages[:2])
+            self.assertEqual(len(pool._batches), 0)
+            pool.submit_batch(messages[2:])
+            self.assertEqual(len(pool._batches), 1)
+
+            await pool.close()
+
+        asyncio.run(run())
+
+        d = Diagnosis()
+        self.assertEqual(stored, [(c, d.points(m)) for c, m in messages])
+
+    # check that every message of a channel goes to the same worker, and that points are stored in order anyway
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_shards(self):
+        stored = []
+        seen = [[], [], []]
+
+        class Executor(ThreadPoolExecutor):
+            def __init__(self, channels):
+                super().__init__(1)
+                self.channels = channels
+
+            def submit(self, fn, *args):
+                self.channels.extend(args[1])
+                return super().submit(fn, *args)
+
+        async def run():
+            pool = ScoringPool(stored.extend, {}, batch_size=2, executors=[Executor(c) for c in seen])
+
+            for i in range(10):
+                for channel, message in messages:
+                    pool.submit(channel + str(i), message)
+            await pool.close()
+
+            for i in range(10):
+                for channel, _ in messages:
+                    self.assertIn(channel + str(i), seen[pool.shard(channel + str(i))])
+
+        asyncio.run(run())
+
+        d = Diagnosis()
+        self.assertEqual(stored, [(c + str(i), d.points(m)) for i in range(10) for c, m in messages])
+        self.assertEqual(sorted(c for channels in seen for c in channels), sorted(c for c, _ in stored))
+        self.assertEqual(len([channels for channels in seen if channels]), 3)
+
+    # check that messages are dropped rather than queued when workers fall behind
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_max_batches(self):
+        stored = []
+        busy = threading.Event()
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                return super().submit(lambda: busy.wait() and fn(*args))
+
+        async def run():
+            pool = ScoringPool(stored.extend, {}, batch_size=1, max_batches=2, executors=[Executor(1)])
+
+            for channel, message in messages:
+                pool.submit(channel, message)
+            self.assertEqual(len(pool), 2)
+            self.assertEqual(pool.dropped, 2)
+
+            busy.set()
+            await pool.drain()
+
+            pool.submit('#bar', 'Kappa')
+            await pool.close()
+            self.assertEqual(pool.dropped, 2)
+
+        asyncio.run(run())
+
+        d = Diagnosis()
+        self.assertEqual(stored, [(c, d.points(m)) for c, m in messages[:2] + [('#bar', 'Kappa')]])
+
+
+# twitchcancer.chat.scoringpool.ScoringPool.report()
+class TestScoringPoolReport(unittest.TestCase):
+
+    # check that stats come from each worker
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis(instrument=True))
+    def test_report(self):
+        scoringpool.diagnosis.points('Kappa')
+
+        async def run():
+            pool = ScoringPool(None, {}, executors=[ThreadPoolExecutor(1), ThreadPoolExecutor(1)])
+            with self.assertLogs('twitchcancer.symptom.instrumentation', 'INFO') as logs:
+                reports = await pool.report()
+            await pool.close()
+
+            self.assertEqual(reports, [scoringpool.diagnosis.instrumentation.report()] * 2)
+            self.assertTrue(any(line.startswith('INFO:twitchcancer.symptom.instrumentation:worker 1: ')
+                                for line in logs.output))
+
+        asyncio.run(run())
+
+    # check that workers without instrumentation have nothing to report
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_not_instrumented(self):
+        async def run():
+            pool = ScoringPool(None, {}, executors=[ThreadPoolExecutor(1)])
+            self.assertEqual(await pool.report(), [None])
+            await pool.close()
+
+        asyncio.run(run())
+
+
+# twitchcancer.chat.scoringpool.ScoringPool.reload()
+class TestScoringPoolReload(unittest.TestCase):
+
+    # check that new workers are only used once they're ready
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_ready(self):
+        old = ThreadPoolExecutor(1)
+        new = ThreadPoolExecutor(1)
+
+        def ready():
+            time.sleep(0.05)
+            return True
+
+        async def run():
+            pool = ScoringPool(None, {}, executors=[old])
+
+            with patch.object(pool, '_executor', return_value=new), \
+                    patch('twitchcancer.chat.scoringpool.ready', ready):
+                reload = asyncio.get_event_loop().create_task(pool.reload({'foo': 'bar'}))
+                await asyncio.sleep(0.01)
+                self.assertEqual(pool.executors, [old])
+
+                self.assertTrue(await reload)
+                self.assertEqual(pool.executors, [new])
+                self.assertEqual(pool.config, {'foo': 'bar'})
+
+            await pool.close()
+
+        asyncio.run(run())
+
+    # check that workers that can't start don't replace the current ones
+    @patch('twitchcancer.chat.scoringpool.diagnosis', Diagnosis())
+    def test_failure(self):
+        old = ThreadPoolExecutor(1)
+
+        def ready():
+            raise RuntimeError('broken')
+
+        async def run():
+            pool = ScoringPool(None, {}, executors=[old])
+
+            with patch.object(pool, '_executor', return_value=ThreadPoolExecutor(1)), \
+                    patch('twitchcancer.chat.scoringpool.ready', ready):
+                self.assertFalse(await pool.reload({'foo': 'bar'}))
+
+            self.assertEqual(pool.executors, [old])
+            self.assertEqual(pool.config, {})
+            await pool.close()
+
+        asyncio.run(run())
+
+    # check that spawned workers are started and have built their diagnosis before being used
+    def test_spawned(self):
+        async def run():
+            pool = ScoringPool(None, Config.get('monitor.diagnosis'), workers=1)
+            await pool.reload(Config.get('monitor.diagnosis'))
+
+            self.assertTrue(await asyncio.get_event_loop().run_in_executor(pool.executors[0], scoringpool.ready))
+            await pool.close()
+
+        asyncio.run(run())
@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from twitchcancer.chat.shadow import ShadowScorer, shadow_config
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+
+# a clock advancing by {step} nanoseconds every time it's read
+def clock(step):
+    now = [0]
+
+    def read():
+        now[0] += step
+        return now[0]
+
+    return read
+
+
+# twitchcancer.chat.shadow.shadow_config()
+class TestShadowConfig(unittest.TestCase):
+
+    # check that the shadow diagnosis only replaces symptoms
+    def test_symptoms(self):
+        diagnosis = {'cache_size': 10, 'symptoms': [{'name': 'CapsRatio'}]}
+
+        self.assertEqual(shadow_config(diagnosis, {'symptoms': []}), diagnosis)
+        self.assertEqual(shadow_config(diagnosis, {'symptoms': [{'name': 'EchoingRatio'}]}),
+                         {'cache_size': 10, 'symptoms': [{'name': 'EchoingRatio'}]})
+
+
+# twitchcancer.chat.shadow.ShadowScorer.submit()
+class TestShadowScorerSubmit(unittest.TestCase):
+
+    # check that only a sample of messages is scored and stored
+    def test_sample(self):
+        stored = []
+        s = ShadowScorer(Diagnosis(), lambda c, p: stored.append(c), rate=0.25, budget=1)
+
+        for i in range(100):
+            s.submit('#{0}'.format(i), 'Kappa Kappa Kappa')
+
+        self.assertEqual(stored, ['#{0}'.format(i) for i in range(3, 100, 4)])
+        self.assertEqual(s.scored, 25)
+
+    # check that points are the shadow diagnosis' points
+    def test_points(self):
+        store = MagicMock()
+        s = ShadowScorer(Diagnosis(), store, rate=1, budget=1)
+
+        s.submit('#foo', 'Kappa Kappa Kappa')
+
+        store.assert_called_once_with('#foo', Diagnosis().points('Kappa Kappa Kappa'))
+
+    # check that nothing is scored once the budget of the interval is spent
+    def test_budget(self):
+        store = MagicMock()
+        s = ShadowScorer(Diagnosis(), store, rate=1, budget=0.01, interval=60)
+        s.clock = clock(300 * 1000 * 1000)  # 0.3s per message, the budget is 0.6s per minute
+
+        for _ in range(10):
+            s.submit('#foo', 'Kappa')
+
+        self.assertEqual(store.call_count, 2)
+        self.assertEqual(s.skipped, 8)
+
+    # check that failures aren't stored
+    def test_failure(self):
+        store = MagicMock()
+        s = ShadowScorer(Diagnosis(), store, rate=1, budget=1)
+
+        s.submit('#foo', '')
+
+        self.assertFalse(store.called)
+
+
+# twitchcancer.chat.shadow.ShadowScorer._adjust()
+class TestShadowScorerAdjust(unittest.TestCase):
+
+    # check that the sampling rate goes down when over budget, and back up when under
+    @patch('twitchcancer.chat.shadow.time.monotonic', return_value=0)
+    def test_adjust(self, monotonic):
+        s = ShadowScorer(Diagnosis(), MagicMock(), rate=0.5, budget=0.1, interval=1)
+
+        # 0.2s of CPU over 1s, twice the budget
+        s._spent = 0.2e9
+        s._adjust(1)
+        self.assertAlmostEqual(s.rate, 0.5 * 0.5 * 0.8)
+        self.assertEqual(s._spent, 0)
+
+        # within budget
+        s._spent = 0.08e9
+        s._adjust(2)
+        self.assertAlmostEqual(s.rate, 0.2)
+
+        # well under budget, back to the configured rate
+        s._spent = 0.01e9
+        s._adjust(3)
+        self.assertAlmostEqual(s.rate, 0.4)
+        s._adjust(4)
+        self.assertAlmostEqual(s.rate, 0.5)
+
+    # check that the sampling rate never gets to 0
+    def test_minimum(self):
+        s = ShadowScorer(Diagnosis(), MagicMock(), rate=0.5, budget=0.001, interval=1)
+
+        for i in range(20):
+            s._spent = 1e9
+            s._adjust(s._start + 1)
+
+        self.assertAlmostEqual(s.rate, 0.0005)
@@ -1,75 +1,181 @@
 import logging
-import re
 
 from autobahn.asyncio.websocket import WebSocketClientProtocol
 from typing import Optional
 
+from twitchcancer.chat import irc
+from twitchcancer.chat.scoringpool import score_with
 from twitchcancer.config import Config
 from twitchcancer.storage.storage import Storage
 from twitchcancer.symptom.diagnosis import Diagnosis
 
 logger = logging.getLogger(__name__)
 
-diagnosis = Diagnosis()
+# replaced all at once with a new diagnosis when the config is reloaded
+diagnosis = Diagnosis.from_config(Config.get('monitor.diagnosis'))
 storage = Storage()
 
+# optional ScoringPool, scores messages in worker processes instead of the event loop
+scoring_pool = None
+
+# optional ShadowScorer, scores a sample of messages with another diagnosis
+shadow = None
+
+# optional Capture, writes every frame received to disk
+capture = None
+
+# bytes of chat messages decoded, and of everything else skipped without decoding, by every client
+ingest_stats = {'decoded': 0, 'skipped': 0}
+
 
 async def record(parsed):
-    # compute points for the message
-    points = diagnosis.points(parsed['message'])
+    await record_batch([parsed])
+
+
+# scores and stores a list of parsed messages at once, received at {date} (defaults to now)
+#
+# messages received earlier, eg. replayed, are scored here rather than in the scoring pool which stores at now
+async def record_batch(batch, date=None):
+    channels = [parsed['channel'] for parsed in batch]
+    messages = [parsed['message'] for parsed in batch]
+
+    if shadow is not None:
+        for channel, message in zip(channels, messages):
+            shadow.submit(channel, message)
+
+    if scoring_pool is not None and date is None:
+        scoring_pool.submit_batch(list(zip(channels, messages)))
+        return
+
+    # compute points for the messages, the ones we can't score are dropped
+    points = score_with(diagnosis, messages, channels)
 
     # store cancer records for later
-    storage.store(parsed['channel'], points)
-    # print(parsed['channel'], points)
+    storage.store_batch([(channel, p) for channel, p in zip(channels, points) if p is not None], date)
 
 
 class TwitchClient(WebSocketClientProtocol):
 
+    # channels joined before the connection opens are joined in onOpen()
+    opened = False
+
+    # messages are dropped rather than recorded
+    muted = False
+
     def onOpen(self):  # noqa
+        self.opened = True
+
         self.sendMessage('CAP REQ :twitch.tv/membership'.encode())
         self.sendMessage('PASS {0}'.format(Config.get("monitor.chat.password").lower()).encode())
         self.sendMessage('NICK {0}'.format(Config.get("monitor.chat.username").lower()).encode())
 
-        for channel in self.channels:
-            self.sendMessage('JOIN {0}'.format(channel).encode())
-            logger.info("joining %s", channel)
+        factory = getattr(self, 'factory', None)
+        if factory is not None:
+            factory.opened(self)
+        elif self.channels:
+            self.send('JOIN', sorted(self.channels))
+
+    def onClose(self, wasClean: bool, code, reason):  # noqa
+        self.opened = False
+        factory = getattr(self, 'factory', None)
+        logger.info("connection to %s closed: %s", getattr(factory, 'server', None), reason)
+
+        if factory is not None:
+            factory.lost(self)
 
     async def onMessage(self, payload, isBinary: bool):  # noqa
         if isBinary:
             logger.debug("Binary message received: {0} bytes".format(len(payload)))
         else:
-            message = payload.decode('utf8')
-
-            # respond to PING
-            if message[0:4] == "PING":
-                self.sendMessage('PONG :tmi.twitch.tv'.encode())
-                logger.debug("PONG-ed")
-            # try to parse and record messages
-            else:
-                parsed = TwitchClient.parse_message(message)
-                if parsed:
-                    await record(parsed)
-
-    async def join(self, channel: str):
-        self.channels.add(channel)
-        self.sendMessage('JOIN {0}'.format(channel).encode())
-        logger.info("joining %s", channel)
-
-    async def leave(self, channel: str):
-        self.channels.remove(channel)
-        self.sendMessage('PART {0}'.format(channel).encode())
-        logger.info("leaving %s", channel)
-
-    channel_message_re = re.compile(".*? PRIVMSG (#[a-zA-z0-9_]*?) :(.*)")
-
+            if capture is not None:
+                capture.write(payload)
+
+            batch = self.ingest(payload)
+
+            # record them all at once
+            if batch and not self.muted:
+                await record_batch(batch)
+
+    # returns the chat messages of a frame, parsed like parse_message() with raw bytes tags, and responds to PING
+    #
+    # lines are found on raw bytes by jumping from one PRIVMSG to the next, lines in between (mostly JOIN/PART) are
+    # never looked at and only the channel and text of chat messages are decoded
+    def ingest(self, payload: bytes) -> list:
+        # respond to PING
+        if payload.startswith(b'PING') or b'\nPING' in payload:
+            self.sendMessage('PONG :tmi.twitch.tv'.encode())
+            logger.debug("PONG-ed")
+
+        # Twitch is going down for maintenance, see https://dev.twitch.tv/docs/irc/commands/#reconnect
+        if b'RECONNECT' in payload and self.reconnect_requested(payload):
+            factory = getattr(self, 'factory', None)
+            if factory is not None:
+                factory.reconnect(self)
+
+        batch = []
+        decoded = 0
+
+        # a frame can hold many lines
+        size = len(payload)
+        end = 0
+        while True:
+            command = payload.find(b' PRIVMSG #', end)
+            if command < 0:
+                break
+
+            start = payload.rfind(b'\n', 0, command) + 1
+            end = payload.find(b'\r\n', command)
+            if end < 0:
+                end = size
+
+            parsed = irc.parse_privmsg_bytes(payload[start:end])
+            if parsed:
+                channel, message, tags = parsed
+                batch.append({
+                    'channel': channel,
+                    'message': irc.strip_action(message),
+                    'tags': tags,
+                })
+
+                # bytes of '#channel :text'
+                decoded += end - command - 9
+
+        ingest_stats['decoded'] += decoded
+        ingest_stats['skipped'] += size - decoded
+
+        return batch
+
+    # tells whether a frame holds a RECONNECT command, not just the word in a chat message
+    @staticmethod
+    def reconnect_requested(payload: bytes) -> bool:
+        for line in payload.split(b'\r\n'):
+            if b'RECONNECT' in line:
+                parsed = irc.parse(line.decode('utf8', 'replace'))
+                if parsed and parsed.command == 'RECONNECT':
+                    return True
+
+        return False
+
+    # sends a JOIN or PART of many channels at once, returns False if the connection isn't open
+    def send(self, command: str, channels: list) -> bool:
+        if not self.opened:
+            return False
+
+        self.sendMessage('{0} {1}'.format(command, ','.join(channels)).encode())
+        logger.info("%s %s", "joining" if command == 'JOIN' else "leaving", ', '.join(channels))
+        return True
+
+    # returns the channel, text and raw IRCv3 tags of a chat message, see irc.tag() to read tags
     @classmethod
     def parse_message(cls, line: str) -> Optional[dict]:
-        match = cls.channel_message_re.match(line)
+        parsed = irc.parse_privmsg(line)
 
-        if not match:
+        if not parsed:
             return None
 
+        channel, message, tags = parsed
         return {
-            'channel': match.group(1),
-            'message': match.group(2).replace('\x01ACTION ', '').replace('\x01', '')
+            'channel': channel,
+            'message': irc.strip_action(message),
+            'tags': tags,
         }
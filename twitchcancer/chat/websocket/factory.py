@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from autobahn.asyncio.websocket import WebSocketClientFactory
 
@@ -11,23 +12,97 @@ class TwitchClientFactory(WebSocketClientFactory):
 
     def __init__(self, *args, **kwargs):
         self.client = None
+
+        # channels of this connection, joined once it opens if they were added before
+        self.channels = set()
+
+        # called with this factory when Twitch asks to reconnect
+        self.on_reconnect = None
+
+        # resolved when the current connection is lost
+        self.disconnected = None
+
+        # messages received while muted aren't recorded, eg. while another connection hands its channels over
+        self.muted = False
+
+        # optional JoinScheduler to send JOIN and PART through, they're sent right away otherwise
+        self.scheduler = None
+
         WebSocketClientFactory.__init__(self, *args, **kwargs)
 
     def __call__(self):
         proto = self.protocol()
         proto.factory = self
-        proto.channels = set()
+        proto.channels = self.channels
+        proto.muted = self.muted
+
+        self.disconnected = asyncio.get_event_loop().create_future()
 
         self.client = proto
         logger.debug('created a client for server %s', self.server)
         return proto
 
-    async def join(self, channel):
-        await self.client.join(channel)
+    # the connection of a client was opened, channels added meanwhile can be joined
+    def opened(self, proto):
+        if proto is not self.client:
+            return
+
+        for channel in sorted(self.channels):
+            self._send('JOIN', channel)
+
+    # the connection of a client was lost, its channels stay to be joined again when it reconnects
+    def lost(self, proto):
+        if proto is not self.client:
+            return
+
+        self.client = None
+        if self.scheduler is not None:
+            self.scheduler.forget(self)
+
+        self.disconnected.set_result(proto)
+
+    # Twitch is about to close the connection of a client
+    def reconnect(self, proto):
+        if proto is self.client and self.on_reconnect is not None:
+            self.on_reconnect(self)
+
+    # closes the current connection, if any
+    def close(self):
+        if self.client is not None:
+            self.client.sendClose()
+
+    # starts or stops recording messages
+    def mute(self, muted):
+        self.muted = muted
+
+        if self.client is not None:
+            self.client.muted = muted
+
+    # sends a command to the client, returns False if it isn't connected
+    def send(self, command, channels):
+        return self.client is not None and self.client.send(command, channels)
+
+    async def join(self, channel, viewers=None):
+        self.channels.add(channel)
+
+        # joined biggest first once the connection opens
+        if self.scheduler is not None and viewers is not None:
+            self.scheduler.viewers[channel] = viewers
+
+        # still connecting, the client joins every channel when it opens
+        if self.client is not None and self.client.opened:
+            self._send('JOIN', channel, viewers)
 
     async def leave(self, channel):
-        await self.client.leave(channel)
+        self.channels.discard(channel)
+
+        if self.client is not None and self.client.opened:
+            self._send('PART', channel)
 
-    def __getattr__(self, attr):
-        if attr == "channels":
-            return self.client.channels
+    def _send(self, command, channel, viewers=None):
+        if self.scheduler is None:
+            self.send(command, [channel])
+        elif command == 'JOIN':
+            self.scheduler.join(self, channel, viewers)
+        else:
+            self.scheduler.part(self, channel)
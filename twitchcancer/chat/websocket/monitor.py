@@ -1,30 +1,94 @@
 import asyncio
 import logging
+import random
+import signal
+import time
 from typing import Optional
 
+from twitchcancer.chat.capture import Capture
+from twitchcancer.chat.joinscheduler import JoinScheduler
 from twitchcancer.chat.monitor import Monitor
+from twitchcancer.chat.scoringpool import ScoringPool
+from twitchcancer.chat.shadow import ShadowScorer, shadow_config
+from twitchcancer.chat.websocket import client as twitchclient
 from twitchcancer.chat.websocket.factory import TwitchClientFactory
-from twitchcancer.utils.twitchapi import TwitchApi
+from twitchcancer.config import Config
+from twitchcancer.symptom.diagnosis import Diagnosis
+from twitchcancer.utils.twitchapi import AsyncTwitchApi
 
 logger = logging.getLogger(__name__)
 
 
 class AsyncWebSocketMonitor(Monitor):
 
-    def __init__(self, viewers=1000):
+    def __init__(self, viewers=1000, workers=0, channels_per_connection=None):
         super().__init__(viewers)
 
+        self.workers = workers
+
+        # channels are spread over as many connections as needed to stay under this
+        if channels_per_connection is None:
+            channels_per_connection = Config.get('monitor.chat.channels_per_connection')
+        self.channels_per_connection = channels_per_connection
+
+        # seconds to wait before reconnecting, doubled after each failure up to the max
+        self.reconnect_delay = Config.get('monitor.chat.reconnect.delay')
+        self.reconnect_max_delay = Config.get('monitor.chat.reconnect.max_delay')
+
+        # seconds a new connection has to join its channels when Twitch asks to reconnect
+        self.handover_timeout = Config.get('monitor.chat.reconnect.handover_timeout')
+
         self.loop = asyncio.get_event_loop()
-        self.clients = {}
+        self.clients = []
+        self.api = AsyncTwitchApi()
 
-    def __getattr__(self, attr):
-        if attr == "channels":
-            return [channel for client in self.clients.values() for channel in client.channels]
+        # JOIN and PART of every connection go through the same rate limit
+        self.scheduler = JoinScheduler(rate=Config.get('monitor.chat.join_rate'),
+                                       burst=Config.get('monitor.chat.join_burst'),
+                                       batch_size=Config.get('monitor.chat.join_batch_size'))
+
+        # {channel: connection it was joined on}, kept up to date by join(), leave() and lost()
+        self.index = {}
+
+    @property
+    def channels(self):
+        """ Channels joined on any connection, a set-like view
+        """
+        return self.index.keys()
 
     def run(self):
         """ Join and leave channels, forever
         """
-        self.loop.run_until_complete(self.mainloop())
+        # log per-symptom stats on demand
+        self.loop.add_signal_handler(signal.SIGUSR1, self.report)
+
+        # reload the config and the diagnosis
+        self.loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.reload()))
+
+        # score messages in worker processes, the event loop only does i/o
+        if self.workers:
+            twitchclient.scoring_pool = ScoringPool(twitchclient.storage.store_batch,
+                                                    Config.get('monitor.diagnosis'),
+                                                    workers=self.workers,
+                                                    batch_size=Config.get('monitor.diagnosis.batch_size'),
+                                                    batch_delay=Config.get('monitor.diagnosis.batch_delay'),
+                                                    max_batches=Config.get('monitor.diagnosis.max_batches'))
+
+        # trial another diagnosis on a sample of messages
+        if Config.get('monitor.shadow.enabled'):
+            twitchclient.shadow = ShadowScorer.from_config(Config.get('monitor.diagnosis'),
+                                                           Config.get('monitor.shadow'),
+                                                           twitchclient.storage.store_shadow)
+
+        # write raw chat to disk, to replay it later
+        if Config.get('monitor.capture.enabled'):
+            twitchclient.capture = Capture.from_config(Config.get('monitor.capture'))
+
+        try:
+            self.loop.run_until_complete(self.mainloop())
+        finally:
+            if twitchclient.capture is not None:
+                twitchclient.capture.close()
 
     async def mainloop(self):
         while True:
@@ -33,39 +97,173 @@ class AsyncWebSocketMonitor(Monitor):
             logger.info("Monitor main loop ran with %s clients and %s channels over %s viewers up",
                         len(self.clients), len(self.channels), self.viewers)
 
+            if twitchclient.diagnosis.cache is not None:
+                logger.info("Score cache stats: %s", twitchclient.diagnosis.cache.stats())
+
+            decoded, skipped = twitchclient.ingest_stats['decoded'], twitchclient.ingest_stats['skipped']
+            logger.info("Ingested %s bytes, decoded %s bytes of chat messages, skipped %s bytes (%.1f%%)",
+                        decoded + skipped, decoded, skipped, skipped / max(decoded + skipped, 1) * 100)
+
+            if twitchclient.scoring_pool is not None:
+                logger.info("Scoring pool has %s messages waiting, dropped %s messages",
+                            len(twitchclient.scoring_pool), twitchclient.scoring_pool.dropped)
+
+            if twitchclient.capture is not None:
+                logger.info("Captured %s frames", twitchclient.capture.frames)
+
+            if twitchclient.shadow is not None:
+                logger.info("Shadow diagnosis scored %s messages, sampling rate %.4f",
+                            twitchclient.shadow.scored, twitchclient.shadow.rate)
+
             await asyncio.sleep(60)
 
-    async def connect(self, server: str):
-        # don't connect twice to the same server
-        if server in self.clients:
+    def report(self):
+        """ Log per-symptom stats of whatever scores messages, the diagnosis or each scoring worker
+        """
+        if twitchclient.scoring_pool is not None:
+            self.loop.create_task(twitchclient.scoring_pool.report())
+        else:
+            twitchclient.diagnosis.report()
+
+    async def reload(self):
+        """ Reload the config and swap in a new diagnosis built from it
+        """
+        # the new config only replaces the current one once everything was built from it
+        def build():
+            new = Config.read()
+            config = Config.get('monitor.diagnosis', new)
+
+            shadow = None
+            if Config.get('monitor.shadow.enabled', new):
+                shadow = Diagnosis.from_config(shadow_config(config, Config.get('monitor.shadow', new)))
+
+            return new, config, Diagnosis.from_config(config), shadow
+
+        # build everything off the event loop, messages keep being scored by the current diagnosis meanwhile
+        try:
+            new, config, diagnosis, shadow = await self.loop.run_in_executor(None, build)
+        except Exception as e:
+            logger.error("failed to reload the config, keeping the current one: %s", e)
             return
 
-        logger.info("connecting to %s", server)
+        Config.config = new
+        twitchclient.diagnosis = diagnosis
+        if twitchclient.scoring_pool is not None:
+            await twitchclient.scoring_pool.reload(config)
+
+        # a running experiment keeps its sampling rate
+        if shadow is None:
+            twitchclient.shadow = None
+        elif twitchclient.shadow is not None:
+            twitchclient.shadow.diagnosis = shadow
+        else:
+            twitchclient.shadow = ShadowScorer(shadow, twitchclient.storage.store_shadow,
+                                               rate=Config.get('monitor.shadow.rate'),
+                                               budget=Config.get('monitor.shadow.budget'))
+
+        logger.info("reloaded the diagnosis with symptoms %s", ', '.join(map(str, diagnosis.symptoms)))
+
+    async def connect(self, server: str) -> TwitchClientFactory:
+        """ Open a new connection to a server, there can be many to the same one
+        """
+        logger.info("connecting to %s, connection %s", server, len(self.clients) + 1)
 
-        (ip, port) = server.split(":")
         factory = TwitchClientFactory(loop=self.loop)
         factory.loop = self.loop
         factory.server = server
+        factory.on_reconnect = lambda f: self.loop.create_task(self.handover(f))
+        factory.scheduler = self.scheduler
+
+        # channels can be placed on the connection while it's being made
+        self.clients.append(factory)
+        self.loop.create_task(self.supervise(factory))
+
+        return factory
+
+    async def supervise(self, client: TwitchClientFactory):
+        """ Keep a connection up until it's removed from the clients, its channels are joined again on reconnect
+        """
+        (ip, port) = client.server.split(":")
+        failures = 0
+
+        while client in self.clients:
+            start = time.monotonic()
 
-        self.clients[server] = factory
+            try:
+                await self.loop.create_connection(client, ip, port)
+                await client.disconnected
+            except Exception as e:
+                logger.warning("failed to connect to %s: %s", client.server, e)
 
-        await self.loop.create_connection(factory, ip, port)
+            if client not in self.clients:
+                break
 
-    async def join(self, channel):
+            # a connection that stayed up a while starts backing off from scratch
+            if time.monotonic() - start > self.reconnect_max_delay:
+                failures = 0
+
+            delay = self.backoff(failures)
+            failures += 1
+
+            logger.warning("lost connection to %s with %s channels, reconnecting in %.1fs", client.server,
+                           len(client.channels), delay)
+            await asyncio.sleep(delay)
+
+    def backoff(self, failures: int) -> float:
+        """ Seconds to wait before reconnecting, jittered so connections don't all come back at once
+        """
+        delay = min(self.reconnect_max_delay, self.reconnect_delay * 2 ** failures)
+        return random.uniform(delay / 2, delay)
+
+    async def handover(self, old: TwitchClientFactory):
+        """ Move the channels of a connection to a new one before closing it, Twitch asked to reconnect
+        """
+        if old not in self.clients:
+            return
+
+        logger.info("Twitch asked to reconnect to %s, moving %s channels to a new connection", old.server,
+                    len(old.channels))
+
+        # no new channel goes to the old connection, and it's not reconnected once closed
+        self.clients.remove(old)
+
+        # the new connection doesn't record messages until the old one is closed, not to count them twice
+        new = await self.connect(old.server)
+        new.mute(True)
+        for channel in old.channels:
+            self.index[channel] = new
+            await new.join(channel)
+
+        # close the old connection once every channel was joined on the new one, or if Twitch closes it first
+        async def joined():
+            while new.client is None or not new.client.opened or self.scheduler.queued(new):
+                await asyncio.sleep(0.1)
+
+        waiter = self.loop.create_task(joined())
+        watched = [waiter] + ([old.disconnected] if old.client is not None else [])
+        await asyncio.wait(watched, timeout=self.handover_timeout, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+
+        old.close()
+        new.mute(False)
+
+    async def join(self, channel, viewers=None):
         # don't join the same channel twice
         if channel in self.channels:
             # logger.debug("not re-joining %s", channel)
             return
 
-        # get a random client hosting this channel
-        server = self.find_server(channel)
+        # the least loaded connection, or a new one
+        client = await self.find_client(channel)
 
-        # connect to new clients
-        await self.connect(server)
+        # joined by someone else while connecting
+        if channel in self.index:
+            return
 
         # join the channel
-        logger.debug("will join %s on %s", channel, server)
-        await self.clients[server].join(channel)
+        self.index[channel] = client
+        logger.debug("will join %s on %s (%s channels)", channel, client.server, len(client.channels))
+        await client.join(channel, viewers)
 
     async def leave(self, channel):
         # don't leave a channel we didn't join
@@ -75,32 +273,41 @@ class AsyncWebSocketMonitor(Monitor):
 
         # tell the client to leave the channel
         logger.debug("will leave channel %s", channel)
-        client = self.get_client(channel)
+        client = self.index.pop(channel)
         await client.leave(channel)
 
     async def autojoin(self):
         """ Join any channel over n viewers
         Leave any channel under n viewers (including offline ones)
         """
-        # synchronous HTTP request, fine because we'd sleep otherwise
-        data = TwitchApi.stream_list()
-        if not data:
+        # every stream over n viewers, chat keeps flowing while pages are read
+        try:
+            data = await self.api.stream_list(self.viewers)
+        except Exception as e:
             # ignore the error, we'll try again next cycle
+            logger.error("failed to list streams: %s", e)
             return
 
-        # leave any channel out of the top 100 (offline or just further down the list)
-        online_channels = ['#' + stream['channel']['name'] for stream in data['streams']]
+        # channels over n viewers
+        wanted = {'#' + stream['channel']['name']: stream['viewers'] for stream in data['streams']
+                  if stream['viewers'] > self.viewers}
 
-        for channel in self.channels:
-            if channel not in online_channels:
-                await self.leave(channel)
+        # leave channels under n viewers, offline or just further down the list
+        for channel in self.channels - wanted.keys():
+            await self.leave(channel)
+
+        # join new channels, biggest first
+        for channel in sorted(wanted.keys() - self.channels, key=wanted.get, reverse=True):
+            await self.join(channel, wanted[channel])
+
+    async def find_client(self, channel: str) -> TwitchClientFactory:
+        """ Find the connection to join a channel on: the least loaded one with room left, or a new one
+        """
+        available = [c for c in self.clients if len(c.channels) < self.channels_per_connection]
+        if available:
+            return min(available, key=lambda c: len(c.channels))
 
-        # join channels over n viewers, leave channels under n viewers
-        for stream in data['streams']:
-            if stream['viewers'] > self.viewers:
-                await self.join('#' + stream['channel']['name'])
-            else:
-                await self.leave('#' + stream['channel']['name'])
+        return await self.connect(self.find_server(channel))
 
     def find_server(self, channel: str) -> str:
         """ Find a server hosting a chat channel
@@ -113,10 +320,7 @@ class AsyncWebSocketMonitor(Monitor):
     def get_client(self, channel: str) -> Optional[TwitchClientFactory]:
         """ Returns the client connected to the server where a channel was joined
         """
-        for client in self.clients.values():
-            if channel in client.channels:
-                return client
-        return None
+        return self.index.get(channel)
 
 
 if __name__ == '__main__':
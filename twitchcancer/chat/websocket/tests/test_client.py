@@ -1,6 +1,11 @@
+import asyncio
 import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from twitchcancer.chat import irc
+from twitchcancer.chat.websocket import client
 from twitchcancer.chat.websocket.client import TwitchClient
+from twitchcancer.symptom.diagnosis import Diagnosis
 
 
 class TestTwitchClientParseMessage(unittest.TestCase):
@@ -37,3 +42,104 @@ class TestTwitchClientParseMessage(unittest.TestCase):
                                             'tmi.twitch.tv PRIVMSG #forsenlol :\x01ACTION forsenX WutFace\x01\n')
         self.assertEqual(parsed['channel'], "#forsenlol")
         self.assertEqual(parsed['message'], "forsenX WutFace")
+
+    def test_tags(self):
+        parsed = TwitchClient.parse_message('@color=#FF69B4;display-name=Mancowbeaar;emotes=60257:0-6/28087:8-14;'
+                                            'subscriber=1;turbo=0;user-id=1337;user-type= :mancowbeaar!mancowbeaar'
+                                            '@mancowbeaar.tmi.twitch.tv PRIVMSG #forsenlol :forsenX WutFace\r\n')
+        self.assertEqual(parsed['message'], "forsenX WutFace")
+        self.assertEqual(irc.tag(parsed['tags'], 'user-id'), "1337")
+        self.assertEqual(irc.parse_emotes(irc.tag(parsed['tags'], 'emotes')), [('60257', 0, 6), ('28087', 8, 14)])
+
+
+# twitchcancer.chat.websocket.client.TwitchClient.onMessage()
+class TestTwitchClientOnMessage(unittest.TestCase):
+
+    # check that every line of a frame is handled and messages are recorded at once
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    def test_multiple_lines(self, record_batch):
+        c = TwitchClient()
+        c.sendMessage = MagicMock()
+
+        frame = (':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there\r\n'
+                 ':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n'
+                 'PING :tmi.twitch.tv\r\n'
+                 ':foo!foo@foo.tmi.twitch.tv PRIVMSG #baz :\x01ACTION waves\x01\r\n')
+        asyncio.run(c.onMessage(frame.encode(), False))
+
+        c.sendMessage.assert_called_once_with(b'PONG :tmi.twitch.tv')
+        batch = record_batch.call_args[0][0]
+        self.assertEqual([(p['channel'], p['message']) for p in batch], [('#bar', 'hello there'), ('#baz', 'waves')])
+
+    # check that bytes of chat messages are counted apart from the rest
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    @patch('twitchcancer.chat.websocket.client.ingest_stats', {'decoded': 0, 'skipped': 0})
+    def test_ingest_stats(self, record_batch):
+        c = TwitchClient()
+
+        frame = ('@id=1 :foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :\u00e7a va\r\n'
+                 ':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n').encode()
+        asyncio.run(c.onMessage(frame, False))
+
+        self.assertEqual(client.ingest_stats, {'decoded': len('#bar :\u00e7a va'.encode()),
+                                               'skipped': len(frame) - len('#bar :\u00e7a va'.encode())})
+        self.assertEqual(record_batch.call_args[0][0], [{'channel': '#bar', 'message': '\u00e7a va', 'tags': b'id=1'}])
+
+    # check that frames without messages aren't recorded
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    def test_no_message(self, record_batch):
+        c = TwitchClient()
+
+        asyncio.run(c.onMessage(b':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n', False))
+
+        self.assertFalse(record_batch.called)
+
+    # check that messages of a muted client aren't recorded
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    def test_muted(self, record_batch):
+        c = TwitchClient()
+        c.muted = True
+
+        asyncio.run(c.onMessage(b':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :hello there\r\n', False))
+
+        self.assertFalse(record_batch.called)
+
+    # check that frames are captured as they were received
+    @patch('twitchcancer.chat.websocket.client.record_batch', new_callable=AsyncMock)
+    @patch('twitchcancer.chat.websocket.client.capture')
+    def test_capture(self, capture, record_batch):
+        c = TwitchClient()
+
+        asyncio.run(c.onMessage(b':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n', False))
+
+        capture.write.assert_called_once_with(b':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n')
+
+
+# twitchcancer.chat.websocket.client.TwitchClient.reconnect_requested()
+class TestTwitchClientReconnectRequested(unittest.TestCase):
+
+    # check that the RECONNECT command is found among other lines
+    def test_reconnect(self):
+        self.assertTrue(TwitchClient.reconnect_requested(b':foo!foo@foo.tmi.twitch.tv JOIN #bar\r\n'
+                                                         b':tmi.twitch.tv RECONNECT\r\n'))
+
+    # check that the word in a chat message isn't taken for the command
+    def test_message(self):
+        self.assertFalse(TwitchClient.reconnect_requested(b':foo!foo@foo.tmi.twitch.tv PRIVMSG #bar :RECONNECT\r\n'))
+
+
+# twitchcancer.chat.websocket.client.record_batch()
+class TestRecordBatch(unittest.TestCase):
+
+    # check that messages are scored and stored at once, dropping the ones that can't be scored
+    @patch('twitchcancer.chat.websocket.client.diagnosis', Diagnosis())
+    @patch('twitchcancer.chat.websocket.client.storage')
+    def test_store(self, storage):
+        batch = [{'channel': '#foo', 'message': 'Kappa'}, {'channel': '#bar', 'message': ' '},
+                 {'channel': '#bar', 'message': 'hello there'}]
+
+        asyncio.run(client.record_batch(batch))
+
+        d = Diagnosis()
+        storage.store_batch.assert_called_once_with([('#foo', d.points('Kappa')), ('#bar', d.points('hello there'))],
+                                                    None)
@@ -0,0 +1,329 @@
+import asyncio
+import copy
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from twitchcancer.chat.websocket import client as twitchclient
+from twitchcancer.chat.websocket.monitor import AsyncWebSocketMonitor
+from twitchcancer.config import Config
+
+
+def monitor(channels_per_connection):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    m = AsyncWebSocketMonitor(channels_per_connection=channels_per_connection)
+    m.reconnect_delay = 0.001
+    m.reconnect_max_delay = 0.01
+    m.handover_timeout = 1
+
+    # connections are made instantly and never open
+    m.loop.create_connection = AsyncMock(side_effect=lambda factory, ip, port: factory())
+    return m
+
+
+# stops supervising connections and closes the loop of a monitor
+def close(m):
+    tasks = asyncio.all_tasks(m.loop)
+    for task in tasks:
+        task.cancel()
+
+    m.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    m.loop.close()
+
+
+class MonitorTestCase(unittest.TestCase):
+
+    def monitor(self, channels_per_connection):
+        m = monitor(channels_per_connection)
+        self.addCleanup(close, m)
+        return m
+
+
+# lets connections be made and commands be sent
+def settle(m):
+    m.loop.run_until_complete(asyncio.sleep(0.05))
+
+
+def join(m, *channels):
+    for channel in channels:
+        m.loop.run_until_complete(m.join(channel))
+    settle(m)
+
+
+# opens the connection of a client, its sent messages are recorded by a mock
+def open_connection(client):
+    client.client.sendMessage = MagicMock()
+    client.client.sendClose = MagicMock()
+    client.client.onOpen()
+    return client.client
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.join()
+class TestAsyncWebSocketMonitorJoin(MonitorTestCase):
+
+    # check that connections are opened as they fill up
+    def test_sharded(self):
+        m = self.monitor(2)
+        join(m, '#a', '#b', '#c', '#d', '#e')
+
+        self.assertEqual(len(m.clients), 3)
+        self.assertEqual([len(c.channels) for c in m.clients], [2, 2, 1])
+        self.assertEqual(m.loop.create_connection.await_count, 3)
+
+    # check that channels aren't joined twice
+    def test_twice(self):
+        m = self.monitor(2)
+        join(m, '#a', '#a')
+
+        self.assertEqual(m.channels, {'#a'})
+
+    # check that new channels go to the least loaded connection
+    def test_least_loaded(self):
+        m = self.monitor(3)
+        join(m, '#a', '#b', '#c', '#d')
+        m.loop.run_until_complete(m.leave('#a'))
+        m.loop.run_until_complete(m.leave('#b'))
+
+        join(m, '#e')
+
+        self.assertEqual(len(m.clients), 2)
+        self.assertIn('#e', m.clients[0].channels)
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.supervise()
+class TestAsyncWebSocketMonitorSupervise(MonitorTestCase):
+
+    # check that connecting is tried again until it works, channels wait for it
+    def test_connection_failed(self):
+        m = self.monitor(2)
+        failures = [OSError('unreachable'), OSError('unreachable')]
+
+        def create_connection(factory, ip, port):
+            if failures:
+                raise failures.pop()
+            return factory()
+
+        m.loop.create_connection.side_effect = create_connection
+        join(m, '#a')
+
+        self.assertEqual(m.loop.create_connection.await_count, 3)
+        self.assertEqual(len(m.clients), 1)
+        self.assertIsNotNone(m.clients[0].client)
+        self.assertEqual(m.channels, {'#a'})
+
+    # check that a lost connection is reconnected and its channels joined again
+    def test_reconnect(self):
+        m = self.monitor(3)
+        join(m, '#a', '#b', '#c', '#d')
+        client = m.clients[0]
+        lost = open_connection(client)
+
+        lost.onClose(False, 1006, 'connection lost')
+        settle(m)
+
+        self.assertEqual(m.loop.create_connection.await_count, 3)
+        self.assertIsNot(client.client, lost)
+        self.assertIs(m.get_client('#a'), client)
+
+        proto = open_connection(client)
+        settle(m)
+
+        proto.sendMessage.assert_called_with(b'JOIN #a,#b,#c')
+
+    # check that reconnecting waits longer after each failure, up to a point
+    def test_backoff(self):
+        m = self.monitor(1)
+        m.reconnect_delay = 1
+        m.reconnect_max_delay = 60
+
+        self.assertTrue(0.5 <= m.backoff(0) <= 1)
+        self.assertTrue(4 <= m.backoff(3) <= 8)
+        self.assertTrue(30 <= m.backoff(20) <= 60)
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.handover()
+class TestAsyncWebSocketMonitorHandover(MonitorTestCase):
+
+    # check that channels are joined on a new connection before the old one is closed
+    def test_reconnect_command(self):
+        m = self.monitor(3)
+        join(m, '#a', '#b')
+        old = m.clients[0]
+        proto = open_connection(old)
+        settle(m)
+
+        proto.ingest(b':tmi.twitch.tv RECONNECT\r\n')
+        settle(m)
+
+        new = m.clients[0]
+        self.assertIsNot(new, old)
+        self.assertTrue(new.muted)
+        self.assertIs(m.get_client('#a'), new)
+        proto.sendClose.assert_not_called()
+
+        replacement = open_connection(new)
+        settle(m)
+        settle(m)
+
+        replacement.sendMessage.assert_called_with(b'JOIN #a,#b')
+        proto.sendClose.assert_called_once_with()
+        self.assertFalse(new.muted)
+        self.assertFalse(replacement.muted)
+        self.assertEqual(m.clients, [new])
+
+    # check that the new connection records messages once Twitch closed the old one
+    def test_closed_first(self):
+        m = self.monitor(3)
+        join(m, '#a')
+        old = m.clients[0]
+        proto = open_connection(old)
+
+        proto.ingest(b':tmi.twitch.tv RECONNECT\r\n')
+        settle(m)
+        proto.onClose(False, 1006, 'connection lost')
+        settle(m)
+
+        self.assertFalse(m.clients[0].muted)
+        self.assertEqual(m.loop.create_connection.await_count, 2)
+
+
+# twitchcancer.chat.websocket.factory.TwitchClientFactory.opened()
+class TestTwitchClientFactoryOpened(MonitorTestCase):
+
+    # check that channels placed while connecting are joined biggest first through the scheduler
+    def test_join_scheduled(self):
+        m = self.monitor(10)
+        m.loop.run_until_complete(m.join('#small', 10))
+        m.loop.run_until_complete(m.join('#big', 1000))
+        settle(m)
+
+        proto = open_connection(m.clients[0])
+        m.loop.run_until_complete(m.scheduler._sending)
+
+        proto.sendMessage.assert_called_with(b'JOIN #big,#small')
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.autojoin()
+class TestAsyncWebSocketMonitorAutojoin(MonitorTestCase):
+
+    @staticmethod
+    def streams(**viewers):
+        return {'streams': [{'viewers': v, 'channel': {'name': name}} for name, v in viewers.items()]}
+
+    # check that channels over n viewers are joined and every other one is left
+    def test_autojoin(self):
+        m = self.monitor(10)
+        m.viewers = 100
+        join(m, '#offline', '#small', '#big')
+
+        m.api.stream_list = AsyncMock(return_value=self.streams(big=5000, small=50, new=200, huge=10000))
+        m.loop.run_until_complete(m.autojoin())
+
+        self.assertEqual(m.channels, {'#big', '#new', '#huge'})
+        self.assertEqual(set(m.clients[0].channels), {'#big', '#new', '#huge'})
+        self.assertEqual(m.scheduler.viewers, {'#new': 200, '#huge': 10000})
+
+    # check that nothing changes when streams can't be listed
+    def test_api_failure(self):
+        m = self.monitor(10)
+        join(m, '#foo')
+
+        m.api.stream_list = AsyncMock(side_effect=OSError('unreachable'))
+        m.loop.run_until_complete(m.autojoin())
+
+        self.assertEqual(m.channels, {'#foo'})
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.get_client()
+class TestAsyncWebSocketMonitorGetClient(MonitorTestCase):
+
+    # check that channels are found on the connection they were joined on
+    def test_get_client(self):
+        m = self.monitor(1)
+        join(m, '#a', '#b')
+
+        self.assertIs(m.get_client('#a'), m.clients[0])
+        self.assertIs(m.get_client('#b'), m.clients[1])
+        self.assertIsNone(m.get_client('#c'))
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.reload()
+class TestAsyncWebSocketMonitorReload(MonitorTestCase):
+
+    # check that reloading rereads emote files
+    @patch('twitchcancer.chat.websocket.client.scoring_pool', None)
+    @patch('twitchcancer.chat.websocket.client.shadow', None)
+    @patch('twitchcancer.chat.websocket.client.diagnosis')
+    def test_emotes(self, diagnosis):
+        m = self.monitor(2)
+        message = "forsenE forsenE forsenE forsenE"
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, 'config.yml')
+            with open(config, 'w') as f:
+                f.write("monitor:\n  diagnosis:\n    data:\n      channel_emotes: {0}\n".format(directory))
+
+            with patch.object(Config, 'paths', Config.paths + [config]), \
+                    patch.object(Config, 'config', copy.deepcopy(Config.config)):
+                with open(os.path.join(directory, 'forsen.txt'), 'w') as f:
+                    f.write("forsenE\n")
+                m.loop.run_until_complete(m.reload())
+                before = twitchclient.diagnosis.points(message, '#forsen')
+
+                with open(os.path.join(directory, 'forsen.txt'), 'w') as f:
+                    f.write("forsenPls\n")
+                m.loop.run_until_complete(m.reload())
+
+                self.assertLess(twitchclient.diagnosis.points(message, '#forsen'), before)
+
+    # check that a config that can't be built from is never used
+    @patch('twitchcancer.chat.websocket.client.scoring_pool', None)
+    @patch('twitchcancer.chat.websocket.client.shadow', None)
+    @patch('twitchcancer.chat.websocket.client.diagnosis')
+    def test_invalid(self, diagnosis):
+        m = self.monitor(2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, 'config.yml')
+            with open(config, 'w') as f:
+                f.write("monitor:\n"
+                        "  diagnosis:\n"
+                        "    symptoms:\n"
+                        "      - name: NoSuchSymptom\n"
+                        "  shadow:\n"
+                        "    name: other\n")
+
+            with patch.object(Config, 'paths', Config.paths + [config]), \
+                    patch.object(Config, 'config', copy.deepcopy(Config.config)):
+                before = copy.deepcopy(Config.config)
+                m.loop.run_until_complete(m.reload())
+
+                self.assertEqual(Config.config, before)
+                self.assertIs(twitchclient.diagnosis, diagnosis)
+
+
+# twitchcancer.chat.websocket.monitor.AsyncWebSocketMonitor.report()
+class TestAsyncWebSocketMonitorReport(MonitorTestCase):
+
+    # check that stats come from the diagnosis without workers
+    @patch('twitchcancer.chat.websocket.client.scoring_pool', None)
+    @patch('twitchcancer.chat.websocket.client.diagnosis')
+    def test_diagnosis(self, diagnosis):
+        self.monitor(2).report()
+
+        self.assertTrue(diagnosis.report.called)
+
+    # check that stats come from the workers, the diagnosis of the event loop doesn't score anything
+    @patch('twitchcancer.chat.websocket.client.scoring_pool')
+    @patch('twitchcancer.chat.websocket.client.diagnosis')
+    def test_workers(self, diagnosis, scoring_pool):
+        scoring_pool.report = AsyncMock()
+
+        m = self.monitor(2)
+        m.report()
+        settle(m)
+
+        self.assertTrue(scoring_pool.report.awaited)
+        self.assertFalse(diagnosis.report.called)
@@ -18,12 +18,32 @@ def main():
                         help="load configuration from this file")
     parser.add_argument('--viewers', dest='viewers', default=0, type=int,
                         help="minimum viewer count to monitor channels (default: 0)")
+    parser.add_argument('--workers', dest='workers', type=int,
+                        help="number of processes to score messages in (default: monitor.diagnosis.workers)")
+    parser.add_argument('--channels-per-connection', dest='channels_per_connection', type=int,
+                        help="channels to join on each connection (default: monitor.chat.channels_per_connection)")
+    parser.add_argument('--replay', dest='replay', metavar='FILE',
+                        help="score recorded chat instead of joining channels, one IRC line per line (.gz ok)")
+    parser.add_argument('--realtime', dest='realtime', action='store_true',
+                        help="replay at the pace of the recorded timestamps rather than as fast as possible")
 
     args = parser.parse_args()
     if args.config:
         Config.load(args.config)
     setup_logger(logger, args.loglevel, Config, "monitor.log")
 
+    if args.workers is None:
+        args.workers = Config.get("monitor.diagnosis.workers")
+    if args.channels_per_connection is None:
+        args.channels_per_connection = Config.get("monitor.chat.channels_per_connection")
+
+    # score recorded chat and exit
+    if args.replay:
+        from twitchcancer.chat.replay import run
+
+        run(args)
+        return
+
     # start monitoring forever
     from twitchcancer.chat.chat import run
 
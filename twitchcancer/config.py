@@ -9,6 +9,9 @@ logger = logging.getLogger('twitchcancer')
 class Config:
     config = {}
 
+    # files loaded on top of the defaults, in order
+    paths = []
+
     # update the current config only overwriting new values
     @classmethod
     def update(cls, config_dict):
@@ -42,6 +45,28 @@ class Config:
         # merge this config with the default one
         cls.update(yaml_config)
 
+        if path not in cls.paths:
+            cls.paths.append(path)
+
+    # returns the defaults with every file loaded since on top, without touching the current config
+    @classmethod
+    def read(cls):
+        logger.info("reading config from %s", cls.paths)
+
+        with open(os.path.join(os.path.dirname(__file__), "config.default.yml"), 'r') as yaml_file:
+            config = yaml.safe_load(yaml_file)
+
+        for path in cls.paths:
+            with open(path, 'r') as yaml_file:
+                config = cls.deep_merge(config, yaml.safe_load(yaml_file))
+
+        return config
+
+    # reload defaults and every file loaded since, the new config replaces the current one all at once
+    @classmethod
+    def reload(cls):
+        cls.config = cls.read()
+
     # load defaults
     @classmethod
     def defaults(cls, path=None):
@@ -50,10 +75,11 @@ class Config:
         with open(path, 'r') as yaml_file:
             cls.config = yaml.safe_load(yaml_file)
 
-    # returns a single value of the configuration
+    # returns a single value of the configuration, or of a config dict returned by read()
     @classmethod
-    def get(cls, key):
-        config = cls.config
+    def get(cls, key, config=None):
+        if config is None:
+            config = cls.config
         for level in key.split('.'):
             config = config.get(level, {})
         return config
@@ -30,8 +30,9 @@ class InMemoryStore:
         logger.info('created an InMemoryStore object')
 
     # returns a summary of cancer and message by channel grouped by minute, processed messages are deleted forever
+    # only messages of minutes before {until} are processed, defaults to messages older than a minute
     # @memory.read()
-    def archive(self):
+    def archive(self, until=None):
         # debugging
         now_start = TimeSplitter.now()
         message_delta = 0
@@ -39,7 +40,7 @@ class InMemoryStore:
 
         # run at 12:31:20
         # time_breakpoint at 12:30:00
-        time_breakpoint = self._live_message_breakpoint()
+        time_breakpoint = until or self._live_message_breakpoint()
         time_breakpoint = time_breakpoint.replace(second=0, microsecond=0)
 
         '''
@@ -118,6 +119,17 @@ class InMemoryStore:
         with self.messages_lock:
             self.messages.append(message)
 
+    # store cancer levels of many messages at once, {records} is a list of (channel, cancer) received at {date}
+    # @memory.write()
+    def store_batch(self, records, date=None):
+        if date is None:
+            date = TimeSplitter.now()
+
+        messages = [{'date': date, 'channel': channel, 'cancer': int(cancer)} for channel, cancer in records]
+
+        with self.messages_lock:
+            self.messages.extend(messages)
+
     # returns the datetime where live and archived messages split
     @staticmethod
     def _live_message_breakpoint():
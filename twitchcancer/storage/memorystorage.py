@@ -1,3 +1,4 @@
+import datetime
 import logging
 import pickle
 import threading
@@ -16,9 +17,22 @@ logger = logging.getLogger(__name__)
 #
 # implements:
 #  - storage.store()
+#  - storage.store_batch()
+#  - storage.archive()
+#  - storage.store_shadow()
 #  - storage.cancer()
 class MemoryStorage(StorageInterface):
 
+    # records of the shadow diagnosis, created on the first one as most monitors don't run experiments
+    _shadow_store = None
+
+    # records stored at another date than now, eg. replayed, only published by archive() as the cron can't tell
+    # whether their minute is complete
+    _dated_store = None
+
+    # summaries are published by the cron thread, or on demand by archive(), zmq sockets can't be shared by threads
+    _archive_lock = threading.Lock()
+
     def __init__(self):
         super().__init__()
 
@@ -53,6 +67,26 @@ class MemoryStorage(StorageInterface):
     def store(self, channel, cancer):
         self._store.store(channel, cancer)
 
+    # adds many records in the in-memory store at once, records of another {date} are kept apart from live ones
+    # @memory.write()
+    def store_batch(self, records, date=None):
+        if date is None:
+            self._store.store_batch(records)
+            return
+
+        if self._dated_store is None:
+            self._dated_store = InMemoryStore()
+
+        self._dated_store.store_batch(records, date)
+
+    # adds a record of the shadow diagnosis, kept apart from the live cancer
+    # @memory.write()
+    def store_shadow(self, channel, cancer):
+        if self._shadow_store is None:
+            self._shadow_store = InMemoryStore()
+
+        self._shadow_store.store(channel, cancer)
+
     # computes cancer level from the in-memory store
     # @memory.read()
     def cancer(self):
@@ -68,13 +102,48 @@ class MemoryStorage(StorageInterface):
             cancer = self._store.cancer()
             self.cancer_socket.send_pyobj(cancer)
 
+    # publishes summaries of records stored at another date, of minutes before {until} or all of them, eg. as a
+    # replay moves on to the next minute and at its end
+    # @memory.read()
+    # @socket.send()
+    def archive(self, until=None):
+        if self._dated_store is None:
+            return
+
+        if until is None:
+            until = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+
+        with self._archive_lock:
+            self._publish(self._dated_store.archive(until))
+
     # archive live messages from the in-memory store into the persistent store
     # @memory.read()
     # @socket.send()
     def _archive(self):
-        history = self._store.archive()
+        with self._archive_lock:
+            self._publish(self._store.archive())
 
-        # publish the summaries on the pubsub socket
+            # summaries of the shadow diagnosis get their own topic, the recorder never sees them
+            if self._shadow_store is not None:
+                experiment = Config.get('monitor.shadow.name')
+
+                for date, channels in self._shadow_store.archive().items():
+                    for channel, record in channels.items():
+                        record = {
+                            'date': date,
+                            'channel': channel,
+                            'experiment': experiment,
+                            'cancer': record['cancer'],
+                            'messages': record['messages']
+                        }
+
+                        self.pubsub_socket.send_multipart([b'shadow', pickle.dumps(record)])
+
+                    logger.info('published shadow summaries of round %s for %s channels', date, len(channels))
+
+    # publishes summaries of a history returned by InMemoryStore.archive() on the pubsub socket
+    # @socket.send()
+    def _publish(self, history):
         for date, channels in history.items():
             for channel, record in channels.items():
                 record = {
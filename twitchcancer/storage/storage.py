@@ -90,6 +90,32 @@ class Storage(StorageInterface):
 
         self.storage.store(channel, cancer)
 
+    # defaults to MemoryStorage
+    def store_batch(self, records, date=None):
+        # messages are stored in-memory only
+        if not self.storage:
+            from twitchcancer.storage.memorystorage import MemoryStorage
+            self.storage = MemoryStorage()
+
+        self.storage.store_batch(records, date)
+
+    # defaults to MemoryStorage
+    def archive(self, until=None):
+        if not self.storage:
+            from twitchcancer.storage.memorystorage import MemoryStorage
+            self.storage = MemoryStorage()
+
+        self.storage.archive(until)
+
+    # defaults to MemoryStorage
+    def store_shadow(self, channel, cancer):
+        # messages are stored in-memory only
+        if not self.storage:
+            from twitchcancer.storage.memorystorage import MemoryStorage
+            self.storage = MemoryStorage()
+
+        self.storage.store_shadow(channel, cancer)
+
     # defaults to WriteOnlyStorage
     def record(self):
         # summaries are written to the database
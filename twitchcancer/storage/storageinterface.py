@@ -27,6 +27,18 @@ class StorageInterface:
     def store(self, channel, cancer):
         raise NotImplementedError()
 
+    # stores many messages at once, {records} is a list of (channel, cancer) received at {date}, defaults to now
+    def store_batch(self, records, date=None):
+        raise NotImplementedError()
+
+    # publishes summaries of messages stored at another date than now, of minutes before {until} or all of them
+    def archive(self, until=None):
+        raise NotImplementedError()
+
+    # stores the cancer points of a message scored by the shadow diagnosis
+    def store_shadow(self, channel, cancer):
+        raise NotImplementedError()
+
     # start persisting message summaries
     def record(self):
         raise NotImplementedError()
@@ -80,6 +80,28 @@ class TestInMemoryStoreCancer(unittest.TestCase):
         self.assertEqual(actual, expected)
 
 
+# InMemoryStore.store_batch()
+class TestInMemoryStoreStoreBatch(unittest.TestCase):
+
+    # check that every message is stored, in order
+    def test_default(self):
+        m = InMemoryStore()
+
+        m.store_batch([("foo", 10), ("bar", 20.0)])
+
+        self.assertEqual([(r['channel'], r['cancer']) for r in m.messages], [("foo", 10), ("bar", 20)])
+        self.assertEqual(m.messages[0]['date'], m.messages[1]['date'])
+
+    # check that messages can be stored at another date than now
+    def test_date(self):
+        m = InMemoryStore()
+        date = datetime.datetime(2020, 1, 1, 12, 30, 15, tzinfo=datetime.timezone.utc)
+
+        m.store_batch([("foo", 10)], date)
+
+        self.assertEqual(m.messages[0]['date'], date)
+
+
 # InMemoryStore.store()
 class TestInMemoryStoreStore(unittest.TestCase):
 
@@ -1,3 +1,4 @@
+import datetime
 import pickle
 import unittest
 from unittest.mock import patch, MagicMock
@@ -50,6 +51,61 @@ class TestMemoryStorageStore(unittest.TestCase):
         m._store.store.assert_called_once_with(channel, message)
 
 
+# MemoryStorage.store_batch()
+class TestMemoryStorageStoreBatch(unittest.TestCase):
+
+    # check that we transmit calls to a store
+    @patch('twitchcancer.storage.memorystorage.MemoryStorage.__init__', return_value=None)
+    def test_transmit(self, init):
+        m = MemoryStorage()
+        m._store = MagicMock()
+
+        m.store_batch([("forsenlol", 10)])
+
+        m._store.store_batch.assert_called_once_with([("forsenlol", 10)])
+
+    # check that records of another date are kept apart from live ones, and only published by archive()
+    @patch('twitchcancer.storage.memorystorage.MemoryStorage.__init__', return_value=None)
+    def test_date(self, init):
+        m = MemoryStorage()
+        m._store = MagicMock()
+        m._store.archive = MagicMock(return_value={})
+        m.pubsub_socket = MagicMock()
+
+        date = datetime.datetime(2020, 9, 13, 12, 26, 40, tzinfo=datetime.timezone.utc)
+        m.store_batch([("forsenlol", 10)], date)
+        m._archive()
+
+        self.assertFalse(m._store.store_batch.called)
+        self.assertFalse(m.pubsub_socket.send_multipart.called)
+
+        m.archive(date)
+        self.assertFalse(m.pubsub_socket.send_multipart.called)
+
+        m.archive(date + datetime.timedelta(minutes=1))
+        self.assertEqual(pickle.loads(m.pubsub_socket.send_multipart.call_args[0][0][1]), {
+            'date': date.replace(second=0),
+            'channel': 'forsenlol',
+            'cancer': 10,
+            'messages': 1
+        })
+
+
+# MemoryStorage.store_shadow()
+class TestMemoryStorageStoreShadow(unittest.TestCase):
+
+    # check that shadow records get their own store
+    @patch('twitchcancer.storage.memorystorage.MemoryStorage.__init__', return_value=None)
+    def test_separate(self, init):
+        m = MemoryStorage()
+        m._store = MagicMock()
+
+        m.store_shadow("forsenlol", 10)
+
+        self.assertFalse(m._store.store.called)
+        self.assertEqual(m._shadow_store.archive(), {})
+
+
 # MemoryStorage._handle_cancer_request()
 class TestMemoryStorageHandleCancerRequest(unittest.TestCase):
 
@@ -123,3 +179,25 @@ class TestMemoryStorageArchive(unittest.TestCase):
         m._archive()
 
         self.assertEqual(m.pubsub_socket.send_multipart.call_count, 4)
+
+    # check that shadow summaries are published on their own topic
+    @patch('twitchcancer.storage.memorystorage.MemoryStorage.__init__', return_value=None)
+    def test_shadow(self, init):
+        m = MemoryStorage()
+        m._store = MagicMock()
+        m._store.archive = MagicMock(return_value={'foo': {'bar': {'cancer': 10, 'messages': 20}}})
+        m._shadow_store = MagicMock()
+        m._shadow_store.archive = MagicMock(return_value={'foo': {'bar': {'cancer': 5, 'messages': 2}}})
+
+        m.pubsub_socket = MagicMock()
+
+        m._archive()
+
+        self.assertEqual([c[0][0][0] for c in m.pubsub_socket.send_multipart.call_args_list], [b'summary', b'shadow'])
+        self.assertEqual(pickle.loads(m.pubsub_socket.send_multipart.call_args[0][0][1]), {
+            'date': 'foo',
+            'channel': 'bar',
+            'experiment': 'shadow',
+            'cancer': 5,
+            'messages': 2
+        })
@@ -93,6 +93,45 @@ class TestStorageStore(unittest.TestCase):
         s.storage.store.assert_called_once_with(channel, message)
 
 
+# Storage.store_batch()
+class TestStorageStoreBatch(unittest.TestCase):
+
+    # check that we transmit calls to a concrete implementation
+    def test_transmit(self):
+        s = Storage()
+        s.storage = MagicMock()
+
+        s.store_batch([("forsenlol", 10)])
+
+        s.storage.store_batch.assert_called_once_with([("forsenlol", 10)], None)
+
+
+# Storage.store_shadow()
+class TestStorageStoreShadow(unittest.TestCase):
+
+    # check that we transmit calls to a concrete implementation
+    def test_transmit(self):
+        s = Storage()
+        s.storage = MagicMock()
+
+        s.store_shadow("forsenlol", 10)
+
+        s.storage.store_shadow.assert_called_once_with("forsenlol", 10)
+
+
+# Storage.archive()
+class TestStorageArchive(unittest.TestCase):
+
+    # check that we transmit calls to a concrete implementation
+    def test_transmit(self):
+        s = Storage()
+        s.storage = MagicMock()
+
+        s.archive()
+
+        s.storage.archive.assert_called_once_with(None)
+
+
 # Storage.record()
 class TestStorageRecord(unittest.TestCase):
 
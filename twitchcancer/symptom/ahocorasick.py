@@ -0,0 +1,93 @@
+import collections
+
+
+# multi-pattern string matcher, finds every occurrence of a set of phrases in a single pass over a text
+#
+# counts follow str.count() semantics for each phrase: occurrences of the same phrase don't overlap but
+# occurrences of different phrases do, so count(text) == sum(text.count(p) for p in phrases)
+class AhoCorasick:
+
+    def __init__(self, phrases):
+        super().__init__()
+
+        # ignore empty phrases, they would match everywhere
+        self.phrases = [p for p in dict.fromkeys(phrases) if p]
+
+        # trie transitions, failure links and phrases ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for index, phrase in enumerate(self.phrases):
+            self._add(index, phrase)
+
+        self._link()
+
+    def __len__(self):
+        return len(self.phrases)
+
+    # adds a phrase to the trie
+    def _add(self, index, phrase):
+        state = 0
+        for char in phrase:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = following
+
+        # phrases with a border (eg. "haha") can overlap themselves, we need to track where they last ended
+        self._out[state] = ((index, len(phrase), self._overlaps(phrase)),)
+
+    # builds failure links breadth-first and merges the outputs of each state with its failure state's
+    def _link(self):
+        queue = collections.deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, following in self._goto[state].items():
+                queue.append(following)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[following] = self._goto[fail].get(char, 0)
+
+                self._out[following] += self._out[self._fail[following]]
+
+    # tells whether a phrase has a proper prefix that's also a suffix
+    @staticmethod
+    def _overlaps(phrase):
+        return any(phrase.startswith(phrase[i:]) for i in range(1, len(phrase)))
+
+    # returns the number of occurrences of all the phrases in a text
+    def count(self, text):
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+
+        count = 0
+        last_end = None
+        state = 0
+
+        for position, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if out[state]:
+                for index, length, overlaps in out[state]:
+                    if overlaps:
+                        # skip occurrences overlapping the previous one of the same phrase
+                        if last_end is None:
+                            last_end = {}
+                        if last_end.get(index, 0) > position - length:
+                            continue
+                        last_end[index] = position
+                    count += 1
+
+        return count
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+import argparse
+import gzip
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from twitchcancer.symptom.diagnosis import Diagnosis
+from twitchcancer.symptom.symptoms import BannedPhrase, EmoteCount
+
+# words to build fake chat messages with
+vocabulary = ['lol', 'Kappa', 'KappaPride', 'Keepo', 'PogChamp', 'LUL', 'gg', 'wp', 'this', 'is', 'a', 'chat',
+              'message', 'STREAMER', 'HYPE', 'darude', 'sandstorm', 'what', 'song', 'is', 'that', 'F', '4Head']
+
+clean_vocabulary = ['the', 'game', 'is', 'really', 'good', 'today', 'what', 'did', 'he', 'just', 'do', 'nice',
+                    'play', 'that', 'was', 'close', 'how', 'long', 'has', 'stream', 'been', 'on', 'for']
+
+
+# returns a list of random chat messages
+def generate(count, seed=0):
+    r = random.Random(seed)
+    return [' '.join(r.choice(vocabulary) for _ in range(r.randint(1, 20))) for _ in range(count)]
+
+
+# returns a list of mostly lowercase messages without emotes
+def generate_clean(count, seed=0):
+    r = random.Random(seed)
+    return [' '.join(r.choice(clean_vocabulary) for _ in range(r.randint(3, 12))) for _ in range(count)]
+
+
+# returns a list of messages made of emotes only
+def generate_emotes(count, seed=0):
+    r = random.Random(seed)
+    emotes = sorted(EmoteCount.emotes)
+    return [' '.join([r.choice(emotes)] * r.randint(1, 30)) for _ in range(count)]
+
+
+# returns a list of shouting messages
+def generate_caps(count, seed=0):
+    return [m.upper() + '!!!' for m in generate_clean(count, seed)]
+
+
+# returns a list of long copypastas, mostly the same ones over and over
+def generate_copypastas(count, seed=0):
+    r = random.Random(seed)
+    pastas = [' '.join(generate_clean(1, seed + n)[0] for _ in range(r.randint(5, 15))) for n in range(10)]
+    pastas += [' '.join(sorted(BannedPhrase.banned)) * 3]
+    return [r.choice(pastas) for _ in range(count)]
+
+
+# returns a list of zalgo text and braille art
+def generate_unicode(count, seed=0):
+    r = random.Random(seed)
+    marks = [chr(c) for c in range(0x300, 0x370)]
+    art = [chr(c) for c in range(0x2800, 0x2900)]
+
+    def zalgo():
+        text = generate_clean(1, r.random())[0]
+        return ''.join(c + ''.join(r.choice(marks) for _ in range(r.randint(0, 6))) for c in text)
+
+    def braille():
+        return ' '.join(''.join(r.choice(art) for _ in range(30)) for _ in range(r.randint(1, 8)))
+
+    return [r.choice((zalgo, braille))() for _ in range(count)]
+
+
+# synthetic corpora, by name
+generators = {
+    'mixed': generate,
+    'clean': generate_clean,
+    'emotes': generate_emotes,
+    'caps': generate_caps,
+    'copypastas': generate_copypastas,
+    'unicode': generate_unicode,
+}
+
+
+# returns the messages of a stored corpus: one message per line, plain text or gzip
+def load(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf8') as corpus:
+        return [line for line in corpus.read().splitlines() if line.strip()]
+
+
+# returns the throughput, latency percentiles and allocations of a scoring function over a corpus
+def measure(function, messages, samples=1000):
+    # throughput, without any per-message overhead
+    start = time.perf_counter()
+    for m in messages:
+        function(m)
+    duration = time.perf_counter() - start
+
+    # latency of each message
+    latencies = []
+    clock = time.perf_counter_ns
+    for m in messages:
+        start = clock()
+        function(m)
+        latencies.append(clock() - start)
+    latencies.sort()
+
+    # memory allocated at peak while handling a message, on a sample because tracing is slow
+    sample = messages[:samples]
+    allocated = 0
+    tracemalloc.start()
+    for m in sample:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(m)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    def percentile(percent):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))] / 1e3
+
+    return {
+        'messages': len(messages),
+        'throughput': len(messages) / duration,
+        'p50_us': percentile(50),
+        'p90_us': percentile(90),
+        'p99_us': percentile(99),
+        'max_us': latencies[-1] / 1e3,
+        'alloc_bytes': allocated / len(sample),
+    }
+
+
+# returns the throughput of batch scoring over a corpus
+def measure_batch(diagnosis, messages, batch):
+    batches = [messages[i:i + batch] for i in range(0, len(messages), batch)]
+
+    start = time.perf_counter()
+    for b in batches:
+        diagnosis.points_batch(b)
+    duration = time.perf_counter() - start
+
+    return {
+        'messages': len(messages),
+        'throughput': len(messages) / duration,
+    }
+
+
+# runs every function of a diagnosis over every corpus
+def run(corpora, batch):
+    results = {}
+
+    for name, messages in corpora.items():
+        # a new diagnosis per corpus to start from the same state
+        diagnosis = Diagnosis()
+
+        if [diagnosis.points(m) for m in messages] != diagnosis.points_batch(messages):
+            raise RuntimeError("scalar and batch scoring don't give the same points on {0}".format(name))
+
+        results[name] = {
+            'points': measure(diagnosis.points, messages),
+            'points_batch': measure_batch(diagnosis, messages, batch),
+            'cancer': measure(diagnosis.cancer, messages),
+            'diagnose': measure(diagnosis.diagnose, messages),
+        }
+
+    return results
+
+
+# returns the list of throughputs that dropped by more than {tolerance} since a previous run
+def compare(results, baseline, tolerance):
+    regressions = []
+
+    for corpus, functions in results.items():
+        for function, result in functions.items():
+            try:
+                before = baseline['results'][corpus][function]['throughput']
+            except KeyError:
+                continue
+
+            ratio = result['throughput'] / before
+            print('{0:<12} {1:<13} {2:>10.0f} -> {3:>10.0f} messages/s ({4:+.1%})'.format(
+                corpus, function, before, result['throughput'], ratio - 1))
+
+            if ratio < 1 - tolerance:
+                regressions.append((corpus, function, ratio))
+
+    return regressions
+
+
+def display(results):
+    print('{0:<12} {1:<13} {2:>12} {3:>9} {4:>9} {5:>9} {6:>11}'.format(
+        'corpus', 'function', 'messages/s', 'p50 us', 'p90 us', 'p99 us', 'alloc B'))
+
+    for corpus, functions in results.items():
+        for function, r in functions.items():
+            print('{0:<12} {1:<13} {2:>12.0f} {3:>9} {4:>9} {5:>9} {6:>11}'.format(
+                corpus, function, r['throughput'],
+                *('{0:.2f}'.format(r[k]) if k in r else '-' for k in ('p50_us', 'p90_us', 'p99_us', 'alloc_bytes'))))
+
+
+def main():
+    # benchmark cancer scoring, offline
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', dest='corpus', action='append', default=[],
+                        help="replay a stored corpus, one message per line (.gz ok), can be repeated")
+    parser.add_argument('--synthetic', dest='synthetic', default=','.join(generators),
+                        help="synthetic corpora to generate (default: {0})".format(','.join(generators)))
+    parser.add_argument('--messages', dest='messages', default=20000, type=int,
+                        help="number of messages per synthetic corpus (default: 20000)")
+    parser.add_argument('--batch', dest='batch', default=1000, type=int,
+                        help="number of messages per batch (default: 1000)")
+    parser.add_argument('--output', dest='output',
+                        help="save results to this JSON file")
+    parser.add_argument('--compare', dest='compare',
+                        help="compare results with a previous JSON file")
+    parser.add_argument('--tolerance', dest='tolerance', default=0.1, type=float,
+                        help="throughput drop to report as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    corpora = {}
+    for path in args.corpus:
+        corpora[path] = load(path)
+    for name in filter(None, args.synthetic.split(',')):
+        corpora[name] = generators[name](args.messages)
+
+    results = run(corpora, args.batch)
+    display(results)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'results': results,
+            }, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+
+        for corpus, function, ratio in regressions:
+            print('regression on {0} {1}: {2:.1%} of the previous throughput'.format(corpus, function, ratio))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
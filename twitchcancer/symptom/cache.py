@@ -0,0 +1,55 @@
+import collections
+
+
+# bounded mapping of message texts to their points, least recently used messages are evicted first
+class ScoreCache:
+
+    def __init__(self, size):
+        super().__init__()
+
+        self.size = size
+        self._scores = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._scores)
+
+    # returns the points of a message or None if it's not cached
+    def get(self, message):
+        points = self._scores.get(message)
+
+        if points is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._scores.move_to_end(message)
+
+        return points
+
+    # caches the points of a message, evicting the least recently used one when full
+    def put(self, message, points):
+        self._scores[message] = points
+        self._scores.move_to_end(message)
+
+        if len(self._scores) > self.size:
+            self._scores.popitem(last=False)
+            self.evictions += 1
+
+    # forget every message
+    def clear(self):
+        self._scores.clear()
+
+    # returns counters about cache usage
+    def stats(self):
+        lookups = self.hits + self.misses
+
+        return {
+            'size': len(self._scores),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0,
+        }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+import os
+import re
+import sys
+import unicodedata
+
+# classes of characters spammers love, in the order of the counts returned by classify()
+MARK = 'mark'  # combining diacritical marks stacked on letters, aka zalgo
+ART = 'art'  # braille patterns, box drawing and block elements used to draw ASCII art
+UNUSUAL = 'unusual'  # control, format, private use, surrogate and unassigned code points
+classes = (MARK, ART, UNUSUAL)
+
+# code points drawing pictures whatever their category
+art_blocks = [
+    (0x2500, 0x257F),  # box drawing
+    (0x2580, 0x259F),  # block elements
+    (0x25A0, 0x25FF),  # geometric shapes
+    (0x2800, 0x28FF),  # braille patterns
+]
+
+# combining marks spammers stack, the marks of other blocks are vowel signs and the like of scripts such as devanagari,
+# thai or arabic
+mark_blocks = [
+    (0x0300, 0x036F),  # combining diacritical marks
+    (0x1AB0, 0x1AFF),  # combining diacritical marks extended
+    (0x1DC0, 0x1DFF),  # combining diacritical marks supplement
+    (0x20D0, 0x20FF),  # combining diacritical marks for symbols
+    (0xFE20, 0xFE2F),  # combining half marks
+]
+
+# code points of common emoji sequences that would look unusual otherwise
+ignored = [
+    (0x200D, 0x200D),  # zero width joiner
+    (0xFE00, 0xFE0F),  # variation selectors
+    (0xE0100, 0xE01EF),  # variation selectors supplement
+]
+
+path = os.path.join(os.path.dirname(__file__), 'data', 'charclasses.txt')
+
+
+# returns the class of a code point, or None, straight from the unicode database
+def classify_code_point(code_point):
+    if code_point < 0x80 or any(start <= code_point <= end for start, end in ignored):
+        return None
+
+    if any(start <= code_point <= end for start, end in art_blocks):
+        return ART
+
+    category = unicodedata.category(chr(code_point))
+    if category in ('Mn', 'Me'):
+        return MARK if any(start <= code_point <= end for start, end in mark_blocks) else None
+    if category[0] == 'C':
+        return UNUSUAL
+
+    return None
+
+
+# returns [(class, first code point, last code point)] of every code point, this takes a while
+def generate():
+    ranges = []
+
+    current = None
+    for code_point in range(sys.maxunicode + 1):
+        c = classify_code_point(code_point)
+
+        if current is not None and c == current[0] and code_point == current[2] + 1:
+            current[2] = code_point
+            continue
+
+        if current is not None:
+            ranges.append(tuple(current))
+        current = [c, code_point, code_point] if c is not None else None
+
+    if current is not None:
+        ranges.append(tuple(current))
+
+    return ranges
+
+
+# returns [(class, first code point, last code point)] from the table shipped in data/
+def load(filename=path):
+    ranges = []
+
+    with open(filename) as table:
+        for line in table:
+            if line.startswith('#') or not line.strip():
+                continue
+
+            c, start, end = line.split()
+            ranges.append((c, int(start, 16), int(end, 16)))
+
+    return ranges
+
+
+# returns a table mapping each code point to the character of its class: \x01 for the first class, \x02 for the
+# second... and \x00 for code points without a class
+def build_table(ranges):
+    table = bytearray(sys.maxunicode + 1)
+
+    for c, start, end in ranges:
+        table[start:end + 1] = bytes([classes.index(c) + 1]) * (end - start + 1)
+
+    # one byte per code point, indexed by str.translate()
+    return table.decode('latin1')
+
+
+table = build_table(load())
+
+# marks on the same character
+stacks = re.compile('\x01+')
+
+
+# returns the number of characters of each class in a text, in the order of {classes}
+#
+# a single pass of str.translate() maps every character to its class, chat is mostly ascii and never gets that far
+# only marks stacked on a character that already has one are counted: a single accent is just writing
+def classify(text):
+    if text.isascii():
+        return 0, 0, 0
+
+    translated = text.translate(table)
+
+    marks = translated.count('\x01')
+    if marks:
+        marks -= len(stacks.findall(translated))
+
+    return marks, translated.count('\x02'), translated.count('\x03')
+
+
+def main():
+    # regenerate the table after a python upgrade brings a new unicode version
+    ranges = generate()
+
+    with open(path, 'w') as output:
+        output.write('# character classes of twitchcancer/symptom/charclass.py, unicode {0}\n'.format(
+            unicodedata.unidata_version))
+        output.write('# generated by python -m twitchcancer.symptom.charclass\n')
+
+        for c, start, end in ranges:
+            output.write('{0} {1:X} {2:X}\n'.format(c, start, end))
+
+    print('wrote {0} ranges to {1}'.format(len(ranges), path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from twitchcancer.symptom import charclass, symptoms
+from twitchcancer.symptom.emotes import EmoteSets
+
+# feature computations, in the order they need to run, and the symptoms needing them
+features = [
+    ('words', "    words = message.split()\n",
+     (symptoms.MinimumWordCount, symptoms.EmoteCount, symptoms.EmoteRatio, symptoms.EmoteCountAndRatio,
+      symptoms.EchoingRatio)),
+    ('length', "    length = len(message)\n",
+     (symptoms.MinimumMessageLength, symptoms.MaximumMessageLength, symptoms.CapsRatio, symptoms.CombiningMarkRatio,
+      symptoms.AsciiArtRatio)),
+    ('words_count', "    words_count = len(words)\n",
+     (symptoms.MinimumWordCount, symptoms.EmoteRatio, symptoms.EmoteCountAndRatio, symptoms.EchoingRatio)),
+    ('caps_count', "    caps_count = sum(map(isupper, message))\n",
+     (symptoms.CapsRatio,)),
+    ('emotes_count', "    emotes = emote_sets.get(channel)\n"
+                     "    emotes_count = 0\n"
+                     "    for w in words:\n"
+                     "        if w in emotes:\n"
+                     "            emotes_count += 1\n",
+     (symptoms.EmoteCount, symptoms.EmoteRatio, symptoms.EmoteCountAndRatio)),
+    ('unique_words_count', "    unique_words_count = len(set(words))\n",
+     (symptoms.EchoingRatio,)),
+    ('lower', "    lower = message.lower()\n",
+     (symptoms.BannedPhrase,)),
+    ('classes', "    marks_count, art_count, unusual_count = classify(message)\n",
+     (symptoms.CombiningMarkRatio, symptoms.AsciiArtRatio, symptoms.UnusualCharacterCount)),
+]
+
+
+# returns the terms of the rule of the {index}th symptom as [(expression, step, condition)], or None for unknown
+# symptoms, its points are the total of its terms:
+# - with a step, 1 + int(over / step) points when over = expression is positive
+# - without step, the value of the expression
+# - with a condition, nothing when the condition is false
+#
+# see symptoms.py for the reference implementation of each rule
+def rule(symptom, index):
+    if type(symptom) is symptoms.MinimumWordCount:
+        return [("{0!r} - words_count".format(symptom.count), None, "words_count < {0!r}".format(symptom.count))]
+
+    if type(symptom) is symptoms.MinimumMessageLength:
+        return [("{0!r} - length".format(symptom.length), 3, None)]
+
+    if type(symptom) is symptoms.MaximumMessageLength:
+        return [("length - {0!r}".format(symptom.length), 5, None)]
+
+    if type(symptom) is symptoms.CapsRatio:
+        return [("caps_count / length - {0!r}".format(symptom.ratio), 0.5, None)]
+
+    if type(symptom) is symptoms.EmoteCount:
+        return [("emotes_count - {0!r}".format(symptom._count), 2, None)]
+
+    if type(symptom) is symptoms.EmoteRatio:
+        return [("emotes_count / words_count - {0!r}".format(symptom.ratio), 0.5, None)]
+
+    if type(symptom) is symptoms.EmoteCountAndRatio:
+        return [("emotes_count - {0!r}".format(symptom._count), 2, None),
+                ("emotes_count / words_count - {0!r}".format(symptom.ratio), 0.5, None)]
+
+    if type(symptom) is symptoms.BannedPhrase:
+        return [("banned_{0}".format(index), None, None)]
+
+    if type(symptom) is symptoms.EchoingRatio:
+        # a single word isn't echoing itself
+        return [("{0!r} - unique_words_count / words_count".format(symptom.ratio), 0.3, "words_count != 1")]
+
+    if type(symptom) is symptoms.CombiningMarkRatio:
+        return [("marks_count / length - {0!r}".format(symptom.ratio), 0.2, None)]
+
+    if type(symptom) is symptoms.AsciiArtRatio:
+        return [("art_count / length - {0!r}".format(symptom.ratio), 0.2, None)]
+
+    if type(symptom) is symptoms.UnusualCharacterCount:
+        return [("unusual_count - {0!r}".format(symptom._count), 5, None)]
+
+    return None
+
+
+# returns the source computing the features a list of symptoms needs
+def generate_features(symptom_list):
+    source = ""
+
+    # only compute features that are actually used
+    for _, code, users in features:
+        if any(type(s) in users for s in symptom_list):
+            source += code
+
+    for index, symptom in enumerate(symptom_list):
+        # each BannedPhrase symptom has its own phrases
+        if type(symptom) is symptoms.BannedPhrase:
+            source += "    banned_{0} = count_banned_{0}(lower)\n".format(index)
+
+        # unknown symptoms score themselves
+        elif rule(symptom, index) is None:
+            source += ("    other_{0} = others[{0}].points(precompute(message, channel, emote_sets.get(channel)))\n"
+                       .format(index))
+
+    return source
+
+
+# returns the source adding the points of a term to `points`, for a single message
+def generate_term(expression, step, condition):
+    if step is None:
+        lines = ["points += {0}".format(expression)]
+    else:
+        lines = ["over = {0}".format(expression),
+                 "if over > 0:",
+                 "    points += 1 + int(over / {0!r})".format(step)]
+
+    if condition is not None:
+        lines = ["if {0}:".format(condition)] + ["    " + line for line in lines]
+
+    return ''.join("    {0}\n".format(line) for line in lines)
+
+
+# returns the source of a function scoring a message against a list of symptoms, and of a function scoring a batch
+# of messages with it
+def generate(symptom_list):
+    # one message
+    source = "def points(message, channel=None):\n"
+    source += generate_features(symptom_list)
+    source += "    points = 0\n"
+
+    for index, symptom in enumerate(symptom_list):
+        source += "    # {0}\n".format(symptom)
+        for term in rule(symptom, index) or [("other_{0}".format(index), None, None)]:
+            source += generate_term(*term)
+
+    source += "    return points\n"
+
+    # a batch of messages, features are string operations that can't be done on arrays
+    source += "\n\ndef points_batch(messages, channels):\n"
+    source += "    return [points(m, c) for m, c in zip(messages, channels)]\n"
+
+    return source
+
+
+# returns a function scoring a message against a list of symptoms, with their thresholds inlined as constants
+#
+# gives the same points as calling Symptom.points() on each symptom, the source is in the function's `source`
+# the function's `batch`(messages, channels) scores a list of messages with the same rules
+#
+# emotes: EmoteSets or set of emotes to count in every channel, defaults to EmoteCount.emotes
+def compile_symptoms(symptom_list, emotes=None):
+    symptom_list = list(symptom_list)
+    source = generate(symptom_list)
+
+    namespace = {
+        'isupper': str.isupper,
+        'classify': charclass.classify,
+        'emote_sets': emotes if isinstance(emotes, EmoteSets) else EmoteSets(emotes),
+        'precompute': symptoms.Symptom.precompute,
+        'others': symptom_list,
+    }
+
+    # each BannedPhrase symptom has its own phrases
+    for index, symptom in enumerate(symptom_list):
+        if type(symptom) is symptoms.BannedPhrase:
+            namespace['count_banned_{0}'.format(index)] = symptom.automaton.count
+
+    exec(compile(source, '<compiled symptoms>', 'exec'), namespace)
+
+    points = namespace['points']
+    points.source = source
+    points.batch = namespace['points_batch']
+    return points
@@ -1,78 +1,240 @@
 import logging
+import time
 
 from twitchcancer.symptom import symptoms
+from twitchcancer.symptom.cache import ScoreCache
+from twitchcancer.symptom.emotes import EmoteSets
+from twitchcancer.symptom.instrumentation import Instrumentation
+from twitchcancer.symptom.scorer import FusedScorer
 
 logger = logging.getLogger(__name__)
 
 
 class Diagnosis:
 
-    def __init__(self):
+    # symptom_list: symptoms to look for, defaults to the standard diagnosis
+    # emotes: EmoteSets or set of emotes to count in every channel, defaults to EmoteCount.emotes
+    # cache_size: number of messages to remember the points of, 0 to disable caching
+    # sample_every: measure every symptom on one cancer() call out of n to reorder them, 0 to keep the default order
+    # instrument: time each symptom in points() and log stats every report_interval seconds
+    def __init__(self, symptom_list=None, emotes=None, cache_size=0, sample_every=100, instrument=False,
+                 report_interval=60):
         super().__init__()
 
-        self.symptoms = [symptoms.MinimumWordCount(),
-                         symptoms.MinimumMessageLength(),
-                         symptoms.MaximumMessageLength(),
-                         symptoms.CapsRatio(),
-                         symptoms.EmoteCountAndRatio(),
-                         symptoms.BannedPhrase(),
-                         symptoms.EchoingRatio()]
+        if symptom_list is None:
+            symptom_list = [symptoms.MinimumWordCount(),
+                            symptoms.MinimumMessageLength(),
+                            symptoms.MaximumMessageLength(),
+                            symptoms.CapsRatio(),
+                            symptoms.EmoteCountAndRatio(),
+                            symptoms.BannedPhrase(),
+                            symptoms.EchoingRatio()]
+
+        self.symptoms = symptom_list
+        self.emotes = emotes if isinstance(emotes, EmoteSets) else EmoteSets(emotes)
+
+        # points of stateless symptoms only depend on the message: they're scored all at once and can be cached
+        self.scorer = FusedScorer([s for s in self.symptoms if not s.stateful], self.emotes)
+        self.stateful = [s for s in self.symptoms if s.stateful]
+
+        # single function with every rule and threshold inlined, for messages scored one by one
+        self.compiled = self.scorer.compiled
+
+        # remembers the points of recent messages, repeated lines are common in chat
+        # messages of channels with their own emotes are remembered per channel
+        self.cache = ScoreCache(cache_size) if cache_size > 0 else None
+
+        # order of evaluation of symptoms in cancer(), cheap and likely symptoms first
+        self.order = list(self.symptoms)
+        self.sample_every = sample_every
+        self._cancer_calls = 0
+
+        # opt-in per-symptom timing, scores through each symptom instead of the fused scorer
+        self.instrumentation = Instrumentation(report_interval) if instrument else None
+
+    # returns a diagnosis built from a config dict like monitor.diagnosis in the config file
+    @classmethod
+    def from_config(cls, config):
+        symptom_list = []
+        for options in config['symptoms']:
+            options = dict(options)
+            name = options.pop('name')
+
+            symptom = getattr(symptoms, name, None)
+            if not isinstance(symptom, type) or not issubclass(symptom, symptoms.Symptom):
+                raise ValueError('unknown symptom {0}'.format(name))
+
+            # banned phrases can come from a data file
+            if symptom is symptoms.BannedPhrase and config['data']['banned']:
+                options.setdefault('phrases', symptoms.load_data(config['data']['banned']))
+
+            symptom_list.append(symptom(**options))
+
+        emotes = None
+        if config['data']['emotes']:
+            emotes = set(symptoms.load_data(config['data']['emotes']))
+        emotes = EmoteSets(emotes, files=config['data']['emote_sets'], directory=config['data']['channel_emotes'])
+
+        return cls(symptom_list,
+                   emotes=emotes,
+                   cache_size=config['cache_size'],
+                   instrument=config['instrument'],
+                   report_interval=config['report_interval'])
 
     # tries to find cancer, stops at the first symptom
-    def cancer(self, message):
-        m = symptoms.Symptom.precompute(message)
+    # stateful symptoms only see messages until the first symptom is found
+    def cancer(self, message, channel=None):
+        m = symptoms.Symptom.precompute(message, channel, self.emotes.get(channel))
 
-        for s in self.symptoms:
+        self._cancer_calls += 1
+        if self.sample_every and self._cancer_calls % self.sample_every == 0:
+            return self._sample(m)
+
+        for s in self.order:
             if s.exhibited_by(m):
                 return True
         return False
 
+    # runs every symptom on a message to update their cost and hit rate, then reorders them
+    #
+    # each symptom gets a fresh copy of the message and pays for every feature it reads, whatever its position
+    def _sample(self, message):
+        cancer = False
+
+        for s in self.symptoms:
+            m = symptoms.Symptom.precompute(message.text, message.channel, message.emotes)
+
+            start = time.perf_counter()
+            exhibited = s.exhibited_by(m)
+            s.observe(time.perf_counter() - start, exhibited)
+
+            cancer = cancer or exhibited
+
+        self.reorder()
+        return cancer
+
+    # sorts symptoms by expected cost of finding cancer, optionally loading cost and hit rates from a profile
+    def reorder(self, profile=None):
+        if profile:
+            for s in self.symptoms:
+                if str(s) in profile:
+                    s.cost = profile[str(s)]['cost']
+                    s.hit_rate = profile[str(s)]['hit_rate']
+
+        self.order = sorted(self.symptoms, key=lambda s: s.priority())
+
+    # returns the cost and hit rate of each symptom, can be fed back to reorder()
+    def profile(self):
+        return {str(s): {'cost': s.cost, 'hit_rate': s.hit_rate} for s in self.symptoms}
+
     # returns a list of Symptoms exhibited by the message
-    def diagnose(self, message):
-        m = symptoms.Symptom.precompute(message)
+    def diagnose(self, message, channel=None):
+        m = symptoms.Symptom.precompute(message, channel, self.emotes.get(channel))
 
         return [s for s in self.symptoms if s.exhibited_by(m)]
 
     # returns the total of cancer points of the message
-    def points(self, message):
-        points = 0
+    def points(self, message, channel=None):
+        points = None
+        if self.cache is not None:
+            key = (channel, message) if channel in self.emotes else message
+            points = self.cache.get(key)
+
+        if points is None:
+            if self.instrumentation is None:
+                points = self.compiled(message, channel)
+            else:
+                points = self._instrumented_points(self.scorer.symptoms, message, channel)
 
-        # pre-compute
-        m = symptoms.Symptom.precompute(message)
+            if self.cache is not None:
+                self.cache.put(key, points)
 
-        for s in self.symptoms:
-            points += s.points(m)
+            if points > 200:
+                self._log_high_score(points, message)
 
-        if points > 200:
-            if points > 1000:
-                logger.info('very high score (%s) on %s', points, message)
-            else:
-                logger.debug('high score (%s) on %s', points, message)
+        if self.stateful:
+            points += self._stateful_points(message, channel)
+
+        return points
+
+    # returns the total of cancer points of each message of a list, same as calling points() on each one
+    def points_batch(self, messages, channels=None):
+        if channels is None:
+            channels = [None] * len(messages)
+
+        if self.cache is None:
+            points = self._score_batch(messages, channels)
+            missed = range(len(messages))
+        else:
+            # only score messages we don't know about yet
+            keys = [(c, m) if c in self.emotes else m for m, c in zip(messages, channels)]
+            points = [self.cache.get(k) for k in keys]
+            missed = [i for i, p in enumerate(points) if p is None]
+
+            for i, p in zip(missed, self._score_batch([messages[i] for i in missed], [channels[i] for i in missed])):
+                points[i] = p
+                self.cache.put(keys[i], p)
+
+        for i in missed:
+            if points[i] > 200:
+                self._log_high_score(points[i], messages[i])
+
+        if self.stateful:
+            points = [p + self._stateful_points(m, c) for p, m, c in zip(points, messages, channels)]
 
         return points
 
+    def _score_batch(self, messages, channels):
+        if self.instrumentation is None:
+            return self.scorer.points_batch(messages, channels)
+        return [self._instrumented_points(self.scorer.symptoms, m, c) for m, c in zip(messages, channels)]
 
-'''
-import yappi
+    # points of symptoms depending on previous messages, never cached
+    def _stateful_points(self, message, channel):
+        if self.instrumentation is not None:
+            return self._instrumented_points(self.stateful, message, channel)
 
-def profile(message):
-  d = Diagnosis()
-  messages = [message+str(n) for n in range(10000)]
+        m = symptoms.Symptom.precompute(message, channel, self.emotes.get(channel))
+        return sum(s.points(m) for s in self.stateful)
 
-  yappi.start()
+    # same as scorer.points() but going through each symptom to time them separately
+    #
+    # features are computed beforehand and timed on their own, in rows named after them: otherwise the first symptom
+    # reading a feature would be charged for it
+    def _instrumented_points(self, symptom_list, message, channel):
+        clock = self.instrumentation.clock
 
-  for m in messages:
-    d.points(m)
+        start = clock()
+        m = symptoms.Symptom.precompute(message, channel, self.emotes.get(channel))
+        self.instrumentation.record('precompute', clock() - start)
 
-  yappi.get_func_stats().print_all()
-  yappi.get_thread_stats().print_all()
+        for feature in symptoms.Message.features:
+            if any(feature in s.features for s in symptom_list):
+                start = clock()
+                getattr(m, feature)
+                self.instrumentation.record(feature, clock() - start)
 
-  yappi.stop()
+        points = 0
+        for s in symptom_list:
+            start = clock()
+            p = s.points(m)
+            self.instrumentation.record(str(s), clock() - start, p)
+            points += p
+
+        self.instrumentation.tick()
+        return points
 
-if __name__ == "__main__":
+    # logs and returns per-symptom stats, if instrumented
+    def report(self):
+        if self.instrumentation is None:
+            return None
 
-  profile("clean message")
-  profile("Kappa Kappa Kappa Kappa Kappa Kappa")
-  profile("DASD ASD ASDASDONAS DONASD{J NAS{D JNAS{DNJ A{SDNJ AISBDH IASHBD HASBD HASD{BHAS {DASBDBAS {DHBA")
+        self.instrumentation.log()
+        return self.instrumentation.report()
 
-'''
+    @staticmethod
+    def _log_high_score(points, message):
+        if points > 1000:
+            logger.info('very high score (%s) on %s', points, message)
+        else:
+            logger.debug('high score (%s) on %s', points, message)
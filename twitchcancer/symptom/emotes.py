@@ -0,0 +1,62 @@
+import glob
+import logging
+import os
+
+from twitchcancer.symptom.symptoms import EmoteCount, load_data
+
+logger = logging.getLogger(__name__)
+
+
+# emotes to count in each channel: global emotes plus the emote sets of the channel (subscriber emotes, BTTV, FFZ, 7TV)
+#
+# emotes: global emotes, defaults to EmoteCount.emotes
+# files: files of more global emotes, one emote per line
+# directory: files of channel emotes, named after the channel like forsen.txt or forsen.bttv.txt
+#
+# files are read when loading, the merged set of a channel is built on its first message and kept until reload()
+class EmoteSets:
+
+    def __init__(self, emotes=None, files=(), directory=None):
+        super().__init__()
+
+        self._emotes = EmoteCount.emotes if emotes is None else emotes
+        self.files = list(files)
+        self.directory = directory
+
+        self.reload()
+
+    # (re)reads every file and forgets merged sets
+    def reload(self):
+        emotes = set(self._emotes)
+        for path in self.files:
+            emotes.update(load_data(path))
+
+        channels = {}
+        if self.directory:
+            for path in sorted(glob.glob(os.path.join(self.directory, '*.txt'))):
+                channel = '#' + os.path.basename(path).split('.')[0].lower()
+                channels.setdefault(channel, set()).update(load_data(path))
+
+        # merged sets are replaced all at once, a message being scored keeps the set it started with
+        self.emotes = frozenset(emotes)
+        self.channels = channels
+        self._merged = {}
+
+        logger.debug('loaded %s global emotes and emote sets of %s channels', len(self.emotes), len(channels))
+
+    # returns the set of emotes of a channel
+    def get(self, channel=None):
+        merged = self._merged.get(channel)
+
+        if merged is None:
+            # channels without their own emotes share the global set
+            if channel not in self.channels:
+                return self.emotes
+
+            merged = self._merged[channel] = self.emotes | self.channels[channel]
+
+        return merged
+
+    # tells whether a channel has emotes of its own, its messages don't score the same as elsewhere
+    def __contains__(self, channel):
+        return channel in self.channels
@@ -0,0 +1,89 @@
+import collections
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# timing and hit counters of a single symptom
+class SymptomStats:
+
+    def __init__(self, samples=1000):
+        super().__init__()
+
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0
+
+        # most recent durations, for percentiles
+        self.durations = collections.deque(maxlen=samples)
+
+    # records a call that lasted {duration} nanoseconds and gave {points}
+    def record(self, duration, points):
+        self.calls += 1
+        self.total_time += duration
+        self.durations.append(duration)
+
+        if points > 0:
+            self.hits += 1
+
+    # returns the duration under which {percent}% of recent calls ran, in nanoseconds
+    def percentile(self, percent):
+        if not self.durations:
+            return 0
+
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(len(durations) * percent / 100))]
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'hit_rate': self.hits / self.calls if self.calls else 0,
+            'total_ms': self.total_time / 1e6,
+            'mean_us': self.total_time / self.calls / 1e3 if self.calls else 0,
+            'p50_us': self.percentile(50) / 1e3,
+            'p90_us': self.percentile(90) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+        }
+
+
+# logs a summary of every symptom returned by Instrumentation.report(), {prefix} tells where it comes from
+def log(report, prefix=''):
+    for name, summary in report.items():
+        logger.info('%s%s: %s calls, %.1f%% hits, %.1f ms total, %.2f us mean, p50 %.2f us, p90 %.2f us, '
+                    'p99 %.2f us', prefix, name, summary['calls'], summary['hit_rate'] * 100, summary['total_ms'],
+                    summary['mean_us'], summary['p50_us'], summary['p90_us'], summary['p99_us'])
+
+
+# per-symptom CPU time and hit rate, logged every {interval} seconds
+class Instrumentation:
+
+    # CPU time of the current thread, other threads don't count
+    clock = staticmethod(time.thread_time_ns)
+
+    def __init__(self, interval=60):
+        super().__init__()
+
+        self.interval = interval
+        self.stats = collections.defaultdict(SymptomStats)
+        self._last_report = time.monotonic()
+
+    # records a call to a symptom (or any other named step)
+    def record(self, name, duration, points=0):
+        self.stats[name].record(duration, points)
+
+    # returns a summary of every symptom's stats, most expensive first
+    def report(self):
+        report = {name: stats.summary() for name, stats in self.stats.items()}
+        return dict(sorted(report.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    # logs the summary of every symptom
+    def log(self):
+        self._last_report = time.monotonic()
+
+        log(self.report())
+
+    # logs the summary if it wasn't in the last {interval} seconds
+    def tick(self):
+        if self.interval and time.monotonic() - self._last_report > self.interval:
+            self.log()
@@ -0,0 +1,44 @@
+from twitchcancer.symptom.compiler import compile_symptoms
+from twitchcancer.symptom.emotes import EmoteSets
+
+
+# scores messages against a list of symptoms, computing each feature they need once per message rather than once per
+# symptom
+#
+# features take a few passes over the message with builtins (split, str.isupper, set, lower, translate), a single
+# python loop over the characters was slower
+#
+# gives the same points as calling Symptom.points() on each symptom, rules are generated by compiler.py: the same
+# code scores messages one by one and in batches, symptoms it doesn't know about are scored through their own points()
+class FusedScorer:
+
+    # emotes: EmoteSets or set of emotes to count in every channel, defaults to EmoteCount.emotes
+    def __init__(self, symptom_list, emotes=None):
+        super().__init__()
+
+        self.symptoms = list(symptom_list)
+        self.emotes = emotes if isinstance(emotes, EmoteSets) else EmoteSets(emotes)
+
+        # single function with every rule and threshold inlined
+        self.compiled = compile_symptoms(self.symptoms, self.emotes)
+
+        # one function per symptom, only compiled when points are asked for separately
+        self._each = None
+
+    # returns the points of each symptom, in the same order as self.symptoms
+    def symptom_points(self, message, channel=None):
+        if self._each is None:
+            self._each = [compile_symptoms([s], self.emotes) for s in self.symptoms]
+
+        return [points(message, channel) for points in self._each]
+
+    # returns the total of points of all the symptoms
+    def points(self, message, channel=None):
+        return self.compiled(message, channel)
+
+    # returns the total of points of each message of a list, {channels} is the channel of each message
+    def points_batch(self, messages, channels=None):
+        if channels is None:
+            channels = [None] * len(messages)
+
+        return self.compiled.batch(messages, channels)
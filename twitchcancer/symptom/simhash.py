@@ -0,0 +1,97 @@
+import collections
+
+MASK = (1 << 64) - 1
+
+
+# returns the 64 bits SimHash of a list of tokens: each bit is set if most tokens' hashes have it set
+#
+# hashes are summed bit by bit in parallel: planes[i] holds bit i of the per-bit counters
+def simhash(tokens):
+    planes = []
+    for token in tokens:
+        carry = hash(token) & MASK
+        for i in range(len(planes)):
+            if not carry:
+                break
+            planes[i], carry = planes[i] ^ carry, planes[i] & carry
+        if carry:
+            planes.append(carry)
+
+    # bits whose counter is over half the number of tokens
+    threshold = len(tokens) // 2
+    over = 0
+    equal = MASK
+    for i in reversed(range(len(planes))):
+        if threshold >> i & 1:
+            equal &= planes[i]
+        else:
+            over |= equal & planes[i]
+            equal &= ~planes[i]
+
+    return over
+
+
+# returns the number of bits that differ between two fingerprints
+def distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+# fixed-size window of the most recent fingerprints, indexed to find near-duplicates without scanning it
+#
+# fingerprints are split in {bands} bands, any fingerprint within {bands - 1} bits of another shares at least one
+# band with it so only fingerprints sharing a band need to be compared
+class SimHashWindow:
+
+    def __init__(self, size=500, bands=4):
+        super().__init__()
+
+        self.size = size
+        self.bands = bands
+        self._band_bits = 64 // bands
+        self._band_mask = (1 << self._band_bits) - 1
+
+        # fingerprints in order of arrival, and how many times each one is in there
+        self._window = collections.deque()
+        self._counts = {}
+
+        # (band, value) -> distinct fingerprints having that value in that band
+        self._index = {}
+
+    def __len__(self):
+        return len(self._window)
+
+    def _keys(self, fingerprint):
+        return [(band, fingerprint >> band * self._band_bits & self._band_mask) for band in range(self.bands)]
+
+    # returns the number of fingerprints in the window within {max_distance} bits of a fingerprint
+    def count(self, fingerprint, max_distance=3):
+        candidates = set()
+        for key in self._keys(fingerprint):
+            candidates.update(self._index.get(key, ()))
+
+        return sum(self._counts[c] for c in candidates if distance(c, fingerprint) <= max_distance)
+
+    # adds a fingerprint to the window, forgetting the oldest one when full
+    def add(self, fingerprint):
+        self._window.append(fingerprint)
+
+        if fingerprint in self._counts:
+            self._counts[fingerprint] += 1
+        else:
+            self._counts[fingerprint] = 1
+            for key in self._keys(fingerprint):
+                self._index.setdefault(key, set()).add(fingerprint)
+
+        if len(self._window) > self.size:
+            self._remove(self._window.popleft())
+
+    def _remove(self, fingerprint):
+        self._counts[fingerprint] -= 1
+
+        if not self._counts[fingerprint]:
+            del self._counts[fingerprint]
+            for key in self._keys(fingerprint):
+                fingerprints = self._index[key]
+                fingerprints.discard(fingerprint)
+                if not fingerprints:
+                    del self._index[key]
@@ -1,20 +1,54 @@
+import collections
 import os
 
+from twitchcancer.symptom import charclass
+from twitchcancer.symptom.ahocorasick import AhoCorasick
+from twitchcancer.symptom.simhash import SimHashWindow, simhash
+
 
 def load_symptom_data(filename):
-    with open(os.path.join(os.path.dirname(__file__), 'data', filename)) as datafile:
+    return load_data(os.path.join(os.path.dirname(__file__), 'data', filename))
+
+
+# returns the lines of a data file, eg. a list of emotes
+def load_data(path):
+    with open(path) as datafile:
         return datafile.read().splitlines()
 
 
 # no-op Symptom
 class Symptom:
+    # stateful symptoms remember messages they see, their points depend on previous messages
+    stateful = False
+
+    # lazy features of Message read by points(), in the order of Message.features
+    features = ()
 
     def __init__(self):
         super().__init__()
 
+        # running estimates of the seconds spent per call and of the ratio of messages exhibiting this symptom
+        self.cost = 0.0
+        self.hit_rate = 0.0
+        self.samples = 0
+
     def __str__(self):
         return type(self).__name__
 
+    # updates cost and hit rate with a new measure, recent measures weigh at least {weight}
+    def observe(self, duration, hit, weight=0.05):
+        self.samples += 1
+        weight = max(weight, 1 / self.samples)
+
+        self.cost += (duration - self.cost) * weight
+        self.hit_rate += (hit - self.hit_rate) * weight
+
+    # expected cost of finding cancer with this symptom, symptoms that never hit come last
+    def priority(self):
+        if self.hit_rate > 0:
+            return self.cost / self.hit_rate, self.cost
+        return float('inf'), self.cost
+
     # tells whether a message respects the rule
     def exhibited_by(self, message):
         return self.points(message) > 0
@@ -24,18 +58,98 @@ class Symptom:
 
     # returns an object with more details about the message to avoid computation for each symptom
     @staticmethod
-    def precompute(message):
-        m = {
-            'text': message,
-            'length': len(message),
-            'words': message.split()
-        }
-        m['words_count'] = len(m['words'])
-        return m
+    def precompute(message, channel=None, emotes=None):
+        return Message(message, channel, emotes)
+
+
+# a message and its features, each feature is computed the first time a symptom needs it and then reused
+class Message:
+    # lazy features, in the order they depend on each other
+    features = ('words', 'words_count', 'caps_count', 'lower', 'emotes_count', 'classes')
+
+    __slots__ = ('text', 'channel', 'emotes', 'length',
+                 '_words', '_words_count', '_caps_count', '_lower', '_emotes_count', '_classes')
+
+    # emotes: set of emotes to count, defaults to EmoteCount.emotes
+    def __init__(self, text, channel=None, emotes=None):
+        self.text = text
+        self.channel = channel
+        self.emotes = EmoteCount.emotes if emotes is None else emotes
+
+        # cheap enough to always compute
+        self.length = len(text)
+
+        self._words = None
+        self._words_count = None
+        self._caps_count = None
+        self._lower = None
+        self._emotes_count = None
+        self._classes = None
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def words_count(self):
+        if self._words_count is None:
+            self._words_count = len(self.words)
+        return self._words_count
+
+    # number of uppercase characters
+    @property
+    def caps_count(self):
+        if self._caps_count is None:
+            self._caps_count = sum(map(str.isupper, self.text))
+        return self._caps_count
+
+    # lowercase text
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    # number of words that are emotes
+    @property
+    def emotes_count(self):
+        if self._emotes_count is None:
+            count = 0
+            emotes = self.emotes
+            for w in self.words:
+                if w in emotes:
+                    count += 1
+            self._emotes_count = count
+        return self._emotes_count
+
+    # number of characters of each class of charclass.classes
+    @property
+    def classes(self):
+        if self._classes is None:
+            self._classes = charclass.classify(self.text)
+        return self._classes
+
+    # number of combining marks
+    @property
+    def marks_count(self):
+        return self.classes[0]
+
+    # number of braille, box drawing and block characters
+    @property
+    def art_count(self):
+        return self.classes[1]
+
+    # number of control, format, private use and unassigned characters
+    @property
+    def unusual_count(self):
+        return self.classes[2]
 
 
 # message must have a minimum of {count} words
 class MinimumWordCount(Symptom):
+    features = ('words', 'words_count')
 
     def __init__(self, count=2):
         super().__init__()
@@ -44,7 +158,7 @@ class MinimumWordCount(Symptom):
 
     # every word missing = 1 point
     def points(self, message):
-        missing = self.count - message['words_count']
+        missing = self.count - message.words_count
         if missing > 0:
             return missing
         return 0
@@ -60,7 +174,7 @@ class MinimumMessageLength(Symptom):
 
     # first character missing = 1 point, then every 3 characters missing = 1 point
     def points(self, message):
-        missing = self.length - message['length']
+        missing = self.length - message.length
         if missing > 0:
             return 1 + int(missing / 3)
         return 0
@@ -76,7 +190,7 @@ class MaximumMessageLength(Symptom):
 
     # first character over the limit = 1 point, then every 5 characters = 1 point
     def points(self, message):
-        over = message['length'] - self.length
+        over = message.length - self.length
         if over > 0:
             return 1 + int(over / 5)
         return 0
@@ -84,6 +198,7 @@ class MaximumMessageLength(Symptom):
 
 # message must have a {ratio} of caps to characters maximum
 class CapsRatio(Symptom):
+    features = ('caps_count',)
 
     def __init__(self, ratio=0.2):
         super().__init__()
@@ -92,7 +207,7 @@ class CapsRatio(Symptom):
 
     # over the limit = 1 point, then every 0.5 ratio over the limit = 1 point
     def points(self, message):
-        ratio = sum(map(str.isupper, message['text'])) / message['length']
+        ratio = message.caps_count / message.length
         over = ratio - self.ratio
         if over > 0:
             return 1 + int(over / 0.5)
@@ -101,6 +216,8 @@ class CapsRatio(Symptom):
 
 # message can have {count} emotes maximum
 class EmoteCount(Symptom):
+    features = ('words', 'emotes_count')
+
     # class variable: load a list of all the emotes
     emotes = set(load_symptom_data('emotes.txt'))
 
@@ -111,13 +228,7 @@ class EmoteCount(Symptom):
 
     @classmethod
     def count(cls, message):
-        count = 0
-        for w in message['words']:
-            if w in cls.emotes:
-                count += 1
-        return count
-        # slower
-        # return len([word for word in message['words'] if word in cls.emotes])
+        return message.emotes_count
 
     # over the limit = 1 point, then every 2 emotes = 1 point
     def points(self, message):
@@ -129,6 +240,7 @@ class EmoteCount(Symptom):
 
 # message must have a {ratio} of emotes vs words maximum
 class EmoteRatio(Symptom):
+    features = ('words', 'words_count', 'emotes_count')
 
     def __init__(self, ratio=0.49):
         super().__init__()
@@ -137,7 +249,7 @@ class EmoteRatio(Symptom):
 
     # over the limit = 1 point, then every 0.5 ratio over the limit = 1 point
     def points(self, message):
-        ratio = EmoteCount.count(message) / message['words_count']
+        ratio = EmoteCount.count(message) / message.words_count
         over = ratio - self.ratio
         if over > 0:
             return 1 + int(over / 0.5)
@@ -146,6 +258,7 @@ class EmoteRatio(Symptom):
 
 # applies emote count and emote ratio in the same call to avoid counting emotes twice
 class EmoteCountAndRatio(Symptom):
+    features = ('words', 'words_count', 'emotes_count')
 
     def __init__(self, count=1, ratio=0.49):
         super().__init__()
@@ -164,7 +277,7 @@ class EmoteCountAndRatio(Symptom):
             points += 1 + int(over / 2)
 
         # EmoteRatio.points()
-        ratio = emotes_count / message['words_count']
+        ratio = emotes_count / message.words_count
         over = ratio - self.ratio
         if over > 0:
             points += 1 + int(over / 0.5)
@@ -174,21 +287,30 @@ class EmoteCountAndRatio(Symptom):
 
 # message can't contain any of the banned phrases
 class BannedPhrase(Symptom):
+    features = ('lower',)
+
     # class variable: load a list of all the banned phrases
     banned = set(map(str.lower, load_symptom_data('banned.txt')))
 
+    # class variable: find all the banned phrases in a single pass
+    automaton = AhoCorasick(banned)
+
+    # phrases: list of banned phrases, defaults to BannedPhrase.banned
+    def __init__(self, phrases=None):
+        super().__init__()
+
+        if phrases is not None:
+            self.banned = set(map(str.lower, phrases))
+            self.automaton = AhoCorasick(self.banned)
+
     # one occurrence of a banned phrase = 1 point
     def points(self, message):
-        points = 0
-        message = message['text'].lower()
-        for phrase in BannedPhrase.banned:
-            if phrase in message:  # optimization
-                points += message.count(phrase)
-        return points
+        return self.automaton.count(message.lower)
 
 
 # message can't be a single word echoing too often
 class EchoingRatio(Symptom):
+    features = ('words', 'words_count')
 
     def __init__(self, ratio=0.7):
         super().__init__()
@@ -198,11 +320,111 @@ class EchoingRatio(Symptom):
     # one duplicate word = 1 point
     def points(self, message):
         # a single word isn't echoing itself
-        if message['words_count'] == 1:
+        if message.words_count == 1:
             return 0
 
-        ratio = len(set(message['words'])) / message['words_count']
+        ratio = len(set(message.words)) / message.words_count
         over = self.ratio - ratio
         if over > 0:
             return 1 + int(over / 0.3)
         return 0
+
+
+# message must have a {ratio} of combining marks to characters maximum, zalgo text stacks them on every letter
+class CombiningMarkRatio(Symptom):
+    features = ('classes',)
+
+    def __init__(self, ratio=0.2):
+        super().__init__()
+
+        self.ratio = ratio
+
+    # over the limit = 1 point, then every 0.2 ratio over the limit = 1 point
+    def points(self, message):
+        ratio = message.marks_count / message.length
+        over = ratio - self.ratio
+        if over > 0:
+            return 1 + int(over / 0.2)
+        return 0
+
+
+# message must have a {ratio} of braille, box drawing and block characters maximum, they draw ASCII art
+class AsciiArtRatio(Symptom):
+    features = ('classes',)
+
+    def __init__(self, ratio=0.5):
+        super().__init__()
+
+        self.ratio = ratio
+
+    # over the limit = 1 point, then every 0.2 ratio over the limit = 1 point
+    def points(self, message):
+        ratio = message.art_count / message.length
+        over = ratio - self.ratio
+        if over > 0:
+            return 1 + int(over / 0.2)
+        return 0
+
+
+# message can have {count} control, format, private use or unassigned characters maximum
+class UnusualCharacterCount(Symptom):
+    features = ('classes',)
+
+    def __init__(self, count=2):
+        super().__init__()
+
+        self._count = count
+
+    # over the limit = 1 point, then every 5 characters = 1 point
+    def points(self, message):
+        over = message.unusual_count - self._count
+        if over > 0:
+            return 1 + int(over / 5)
+        return 0
+
+
+# message can't nearly duplicate more than {count} of the last {window} messages of its channel
+class Copypasta(Symptom):
+    stateful = True
+    features = ('words', 'words_count', 'lower')
+
+    def __init__(self, count=2, window=500, distance=3, min_words=5, channels=1000):
+        super().__init__()
+
+        self.count = count
+        self.window = window
+        self.distance = distance
+        self.min_words = min_words
+
+        # windows of recent fingerprints, by channel, least recently used channels are forgotten
+        self.channels = channels
+        self.windows = collections.OrderedDict()
+
+    # returns the window of recent fingerprints of a channel
+    def _window(self, channel):
+        window = self.windows.get(channel)
+
+        if window is None:
+            window = self.windows[channel] = SimHashWindow(self.window, bands=self.distance + 1)
+            if len(self.windows) > self.channels:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(channel)
+
+        return window
+
+    # over the limit = 1 point, then every 5 near-duplicates = 1 point
+    def points(self, message):
+        # short messages are too likely to be repeated to be copypastas
+        if message.words_count < self.min_words:
+            return 0
+
+        fingerprint = simhash(message.lower.split())
+        window = self._window(message.channel)
+
+        over = window.count(fingerprint, self.distance) - self.count
+        window.add(fingerprint)
+
+        if over > 0:
+            return 1 + int(over / 5)
+        return 0
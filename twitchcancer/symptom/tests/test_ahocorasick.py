@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from twitchcancer.symptom.ahocorasick import AhoCorasick
+
+
+# twitchcancer.symptom.ahocorasick.AhoCorasick.__init__()
+class TestAhoCorasickInit(unittest.TestCase):
+
+    # check that duplicate and empty phrases are dropped
+    def test_phrases(self):
+        a = AhoCorasick(["foo", "", "bar", "foo"])
+
+        self.assertEqual(a.phrases, ["foo", "bar"])
+        self.assertEqual(len(a), 2)
+
+
+# twitchcancer.symptom.ahocorasick.AhoCorasick.count()
+class TestAhoCorasickCount(unittest.TestCase):
+
+    # check that we don't find anything when there's nothing to look for
+    def test_empty(self):
+        self.assertEqual(AhoCorasick([]).count("anything"), 0)
+        self.assertEqual(AhoCorasick(["foo"]).count(""), 0)
+
+    # check that every occurrence of every phrase is counted
+    def test_simple(self):
+        a = AhoCorasick(["darude sandstorm", "message deleted"])
+
+        self.assertEqual(a.count("kappa"), 0)
+        self.assertEqual(a.count("darude sandstorm"), 1)
+        self.assertEqual(a.count("darude sandstorm darude sandstorm"), 2)
+        self.assertEqual(a.count("darude sandstorm message deleted"), 2)
+
+    # check that different phrases overlapping each other are all counted
+    def test_overlapping_phrases(self):
+        a = AhoCorasick(["he", "she", "hers", "his"])
+
+        self.assertEqual(a.count("ushers"), 3)
+
+    # check that a phrase overlapping itself is counted like str.count() does
+    def test_self_overlapping_phrase(self):
+        a = AhoCorasick(["aa", "haha"])
+
+        self.assertEqual(a.count("aaaa"), 2)
+        self.assertEqual(a.count("aaa"), 1)
+        self.assertEqual(a.count("hahaha"), 1)
+        self.assertEqual(a.count("hahahaha"), 2)
+
+    # check that we get the same totals as counting each phrase separately
+    def test_same_as_str_count(self):
+        r = random.Random(42)
+        phrases = ["".join(r.choice("abc") for _ in range(r.randint(1, 4))) for _ in range(20)]
+        a = AhoCorasick(phrases)
+
+        for _ in range(200):
+            text = "".join(r.choice("abcd ") for _ in range(r.randint(0, 40)))
+            expected = sum(text.count(p) for p in set(phrases))
+            self.assertEqual(a.count(text), expected, text)
@@ -0,0 +1,57 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from twitchcancer.symptom import benchmark
+
+
+# twitchcancer.symptom.benchmark.generators
+class TestBenchmarkGenerators(unittest.TestCase):
+
+    # check that every synthetic corpus is reproducible
+    def test_generators(self):
+        for name, generator in benchmark.generators.items():
+            messages = generator(10)
+
+            self.assertEqual(len(messages), 10, name)
+            self.assertEqual(messages, generator(10), name)
+
+
+# twitchcancer.symptom.benchmark.load()
+class TestBenchmarkLoad(unittest.TestCase):
+
+    # check that plain and gzipped corpora are read the same way, without empty lines
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, 'corpus.txt')
+            with open(plain, 'w') as f:
+                f.write('Kappa\n\nhello there\n')
+
+            compressed = os.path.join(directory, 'corpus.txt.gz')
+            with gzip.open(compressed, 'wt') as f:
+                f.write('Kappa\n\nhello there\n')
+
+            self.assertEqual(benchmark.load(plain), ['Kappa', 'hello there'])
+            self.assertEqual(benchmark.load(compressed), ['Kappa', 'hello there'])
+
+
+# twitchcancer.symptom.benchmark.run()
+# twitchcancer.symptom.benchmark.compare()
+class TestBenchmarkRun(unittest.TestCase):
+
+    # check that we measure every function on every corpus
+    def test_run(self):
+        results = benchmark.run({'tiny': benchmark.generate(20)}, batch=5)
+
+        self.assertEqual(set(results['tiny']), {'points', 'points_batch', 'cancer', 'diagnose'})
+        self.assertEqual(results['tiny']['points']['messages'], 20)
+        self.assertTrue(results['tiny']['points']['throughput'] > 0)
+        self.assertTrue(results['tiny']['points']['p99_us'] >= results['tiny']['points']['p50_us'])
+
+    # check that only large enough drops are regressions
+    def test_compare(self):
+        baseline = {'results': {'tiny': {'points': {'throughput': 100}, 'cancer': {'throughput': 100}}}}
+        results = {'tiny': {'points': {'throughput': 95}, 'cancer': {'throughput': 50}, 'diagnose': {'throughput': 1}}}
+
+        self.assertEqual(benchmark.compare(results, baseline, 0.1), [('tiny', 'cancer', 0.5)])
@@ -0,0 +1,60 @@
+import unittest
+
+from twitchcancer.symptom.cache import ScoreCache
+
+
+# twitchcancer.symptom.cache.ScoreCache.get()
+class TestScoreCacheGet(unittest.TestCase):
+
+    # check that unknown messages are misses
+    def test_miss(self):
+        c = ScoreCache(2)
+
+        self.assertEqual(c.get("foo"), None)
+        self.assertEqual(c.misses, 1)
+        self.assertEqual(c.hits, 0)
+
+    # check that known messages are hits
+    def test_hit(self):
+        c = ScoreCache(2)
+        c.put("foo", 0)
+
+        self.assertEqual(c.get("foo"), 0)
+        self.assertEqual(c.misses, 0)
+        self.assertEqual(c.hits, 1)
+
+
+# twitchcancer.symptom.cache.ScoreCache.put()
+class TestScoreCachePut(unittest.TestCase):
+
+    # check that the least recently used message is evicted when full
+    def test_evict_least_recently_used(self):
+        c = ScoreCache(2)
+        c.put("foo", 1)
+        c.put("bar", 2)
+        c.get("foo")
+        c.put("baz", 3)
+
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.evictions, 1)
+        self.assertEqual(c.get("bar"), None)
+        self.assertEqual(c.get("foo"), 1)
+        self.assertEqual(c.get("baz"), 3)
+
+
+# twitchcancer.symptom.cache.ScoreCache.stats()
+class TestScoreCacheStats(unittest.TestCase):
+
+    # check that we get every counter
+    def test_stats(self):
+        c = ScoreCache(1)
+        c.put("foo", 1)
+        c.get("foo")
+        c.get("bar")
+        c.put("bar", 2)
+
+        self.assertEqual(c.stats(), {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 1, 'hit_ratio': 0.5})
+
+    # check that we don't divide by zero before any lookup
+    def test_stats_empty(self):
+        self.assertEqual(ScoreCache(1).stats()['hit_ratio'], 0)
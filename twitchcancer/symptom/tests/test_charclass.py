@@ -0,0 +1,48 @@
+import unittest
+
+from twitchcancer.symptom import charclass
+
+
+# twitchcancer.symptom.charclass.classify()
+class TestClassify(unittest.TestCase):
+
+    # check that ascii is never counted
+    def test_ascii(self):
+        self.assertEqual(charclass.classify("hello \x01ACTION\x01 world"), (0, 0, 0))
+
+    # check that each class is counted
+    def test_classes(self):
+        self.assertEqual(charclass.classify("h̸̢̛e̷ wörld"), (2, 0, 0))
+        self.assertEqual(charclass.classify("⣿⠿ █▀ ╔═ ■"), (0, 7, 0))
+        self.assertEqual(charclass.classify("\u0085​\U000e0000"), (0, 0, 4))
+
+    # check that a single mark on a character isn't counted, nor marks of scripts like devanagari or thai
+    def test_marks(self):
+        self.assertEqual(charclass.classify("cre\u0300me bru\u0302le\u0301e"), (0, 0, 0))
+        self.assertEqual(charclass.classify("नमस्ते दोस्तों आज हम खेलेंगे"), (0, 0, 0))
+        self.assertEqual(charclass.classify("สวัสดีครับ ทุกคน วันนี้"), (0, 0, 0))
+
+    # check that emoji sequences aren't counted
+    def test_emoji(self):
+        self.assertEqual(charclass.classify("\U0001f468‍\U0001f469‍\U0001f467️ ❤️"),
+                         (0, 0, 0))
+
+
+# twitchcancer.symptom.charclass.load()
+# twitchcancer.symptom.charclass.classify_code_point()
+class TestTable(unittest.TestCase):
+
+    # check that the shipped table agrees with the unicode database on a sample of code points
+    def test_table(self):
+        for code_point in list(range(0x3000)) + list(range(0xE000, 0xE100)) + list(range(0xFE00, 0xFE30)):
+            c = charclass.classify_code_point(code_point)
+            expected = charclass.classes.index(c) + 1 if c else 0
+
+            self.assertEqual(ord(charclass.table[code_point]), expected, hex(code_point))
+
+    # check that ranges are sorted and don't overlap
+    def test_ranges(self):
+        ranges = charclass.load()
+
+        for (_, _, end), (_, start, _) in zip(ranges, ranges[1:]):
+            self.assertLess(end, start)
@@ -0,0 +1,95 @@
+import unittest
+
+from twitchcancer.symptom import symptoms
+from twitchcancer.symptom.benchmark import generators
+from twitchcancer.symptom.compiler import compile_symptoms, generate
+from twitchcancer.symptom.tests.test_scorer import every_symptom, messages
+
+# the same symptoms with other thresholds
+other_thresholds = [
+    symptoms.MinimumWordCount(),
+    symptoms.MinimumMessageLength(),
+    symptoms.MaximumMessageLength(),
+    symptoms.CapsRatio(),
+    symptoms.EmoteCount(),
+    symptoms.EmoteRatio(),
+    symptoms.EmoteCountAndRatio(),
+    symptoms.EchoingRatio(),
+    symptoms.BannedPhrase(),
+]
+
+
+# twitchcancer.symptom.compiler.generate()
+class TestCompilerGenerate(unittest.TestCase):
+
+    # check that thresholds are inlined
+    def test_constants(self):
+        source = generate([symptoms.MinimumWordCount(7), symptoms.CapsRatio(0.3)])
+
+        self.assertTrue("points += 7 - words_count" in source)
+        self.assertTrue("over = caps_count / length - 0.3" in source)
+
+    # check that we only compute what's needed
+    def test_features(self):
+        source = generate([symptoms.MaximumMessageLength()])
+
+        self.assertTrue("length = len(message)" in source)
+        self.assertFalse("split" in source)
+        self.assertFalse("isupper" in source)
+
+    # check that batches are scored by the function scoring one message
+    def test_batch(self):
+        source = generate([symptoms.CapsRatio(0.3)])
+
+        self.assertEqual(source.count("over = caps_count / length - 0.3"), 1)
+        self.assertTrue("return [points(m, c) for m, c in zip(messages, channels)]" in source)
+
+
+# twitchcancer.symptom.compiler.compile_symptoms()
+class TestCompilerCompileSymptoms(unittest.TestCase):
+
+    # check that we get the same points as the reference symptoms
+    def test_same_as_symptoms(self):
+        corpus = messages + [m for g in generators.values() for m in g(200)]
+
+        for symptom_list in (every_symptom, other_thresholds):
+            compiled = compile_symptoms(symptom_list)
+
+            for message in corpus:
+                m = symptoms.Symptom.precompute(message)
+                self.assertEqual(compiled(message), sum(s.points(m) for s in symptom_list), message)
+
+    # check that each rule alone gives the same points as its symptom
+    def test_each_symptom(self):
+        for symptom in every_symptom:
+            compiled = compile_symptoms([symptom])
+
+            for message in messages:
+                self.assertEqual(compiled(message), symptom.points(symptoms.Symptom.precompute(message)))
+
+    # check that unknown symptoms get the channel
+    def test_unknown_symptom(self):
+        compiled = compile_symptoms([symptoms.Copypasta(count=0)])
+        pasta = 'this is a very long copypasta that everybody is posting in chat right now'
+
+        self.assertEqual(compiled(pasta, '#foo'), 0)
+        self.assertEqual(compiled(pasta, '#bar'), 0)
+        self.assertEqual(compiled(pasta, '#foo'), 1)
+
+    # check that messages without words fail like they do with symptoms
+    def test_no_words(self):
+        compiled = compile_symptoms(every_symptom)
+
+        self.assertRaises(ZeroDivisionError, lambda: compiled(' '))
+        self.assertRaises(ZeroDivisionError, lambda: compiled.batch(['lol', ' '], [None, None]))
+        self.assertEqual(compile_symptoms([])('lol'), 0)
+        self.assertEqual(compile_symptoms([]).batch(['lol'], [None]), [0])
+
+    # check that batches get the same points as messages scored one by one
+    def test_batch(self):
+        corpus = messages + [m for g in generators.values() for m in g(200)]
+
+        for symptom_list in (every_symptom, other_thresholds):
+            compiled = compile_symptoms(symptom_list)
+
+            self.assertEqual(compiled.batch(corpus, [None] * len(corpus)), [compiled(m) for m in corpus])
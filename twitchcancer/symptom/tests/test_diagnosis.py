@@ -0,0 +1,220 @@
+import copy
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from twitchcancer.config import Config
+from twitchcancer.symptom import symptoms
+from twitchcancer.symptom.diagnosis import Diagnosis
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.cancer()
+class TestDiagnosisCancer(unittest.TestCase):
+
+    # check that we find cancer whatever the order of symptoms
+    def test_cancer(self):
+        d = Diagnosis(sample_every=3)
+
+        for _ in range(10):
+            self.assertTrue(d.cancer("Kappa"))
+            self.assertFalse(d.cancer("this is a clean message"))
+            self.assertTrue(d.cancer("darude sandstorm is a clean message"))
+
+    # check that sampling reorders symptoms by cost and hit rate
+    def test_sampling_reorders(self):
+        d = Diagnosis(sample_every=1)
+
+        for _ in range(10):
+            d.cancer("lol")
+
+        self.assertTrue(all(s.samples == 10 for s in d.symptoms))
+        self.assertEqual(str(d.order[0]), "MinimumWordCount")
+        self.assertEqual(d.order[0].hit_rate, 1)
+
+    # check that sampled symptoms don't share features, the first one would be charged for computing them
+    def test_sampling_fresh(self):
+        d = Diagnosis([symptoms.MinimumWordCount(), symptoms.EchoingRatio()], sample_every=1)
+        seen = []
+
+        def exhibited_by(symptom):
+            def wrapper(message):
+                seen.append(message._words)
+                return type(symptom).exhibited_by(symptom, message)
+            return wrapper
+
+        for s in d.symptoms:
+            s.exhibited_by = exhibited_by(s)
+
+        self.assertTrue(d.cancer("lol"))
+        self.assertEqual(seen, [None, None])
+
+    # check that the default order is kept without sampling
+    def test_no_sampling(self):
+        d = Diagnosis(sample_every=0)
+
+        for _ in range(10):
+            d.cancer("lol")
+
+        self.assertEqual(d.order, d.symptoms)
+        self.assertTrue(all(s.samples == 0 for s in d.symptoms))
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.reorder()
+# twitchcancer.symptom.diagnosis.Diagnosis.profile()
+class TestDiagnosisReorder(unittest.TestCase):
+
+    # check that a profile sets the order
+    def test_profile(self):
+        d = Diagnosis()
+        profile = {str(s): {'cost': 1.0, 'hit_rate': 0.0} for s in d.symptoms}
+        profile['EchoingRatio'] = {'cost': 1.0, 'hit_rate': 0.5}
+
+        d.reorder(profile)
+
+        self.assertEqual(str(d.order[0]), "EchoingRatio")
+        self.assertEqual(d.profile(), profile)
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.points()
+class TestDiagnosisPoints(unittest.TestCase):
+
+    # check that caching is disabled by default
+    def test_no_cache(self):
+        d = Diagnosis()
+
+        self.assertEqual(d.cache, None)
+        self.assertEqual(d.points("Kappa Kappa"), d.points("Kappa Kappa"))
+
+    # check that repeated messages are only scored once
+    def test_cache(self):
+        d = Diagnosis(cache_size=10)
+        expected = Diagnosis().points("Kappa Kappa")
+
+        with patch.object(d, 'compiled', wraps=d.compiled) as points:
+            self.assertEqual(d.points("Kappa Kappa"), expected)
+            self.assertEqual(d.points("Kappa Kappa"), expected)
+
+            self.assertEqual(points.call_count, 1)
+
+        self.assertEqual(d.cache.hits, 1)
+        self.assertEqual(d.cache.misses, 1)
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.points()
+# twitchcancer.symptom.diagnosis.Diagnosis.points_batch()
+class TestDiagnosisStateful(unittest.TestCase):
+    pasta = 'this is a very long copypasta that everybody is posting in chat right now'
+
+    # check that stateful symptoms are scored on every message, even cached ones
+    def test_points(self):
+        d = Diagnosis([symptoms.MinimumWordCount(), symptoms.Copypasta(count=0)], cache_size=10)
+
+        self.assertEqual(d.stateful, d.symptoms[1:])
+        self.assertEqual(d.points(self.pasta, '#foo'), 0)
+        self.assertEqual(d.points(self.pasta, '#foo'), 1)
+        self.assertEqual(d.points(self.pasta, '#bar'), 0)
+        self.assertEqual(d.cache.hits, 2)
+
+    # check that batches see messages in order
+    def test_points_batch(self):
+        d = Diagnosis([symptoms.MinimumWordCount(), symptoms.Copypasta(count=0)])
+
+        self.assertEqual(d.points_batch([self.pasta, self.pasta, self.pasta], ['#foo', '#bar', '#foo']), [0, 0, 1])
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.points()
+# twitchcancer.symptom.diagnosis.Diagnosis.report()
+class TestDiagnosisInstrumentation(unittest.TestCase):
+
+    # check that instrumentation doesn't change points and times every symptom
+    def test_instrumented(self):
+        d = Diagnosis(instrument=True)
+        messages = ["Kappa Kappa", "darude sandstorm", "this is a clean message"]
+
+        self.assertEqual([d.points(m) for m in messages], [Diagnosis().points(m) for m in messages])
+        self.assertEqual(d.points_batch(messages), Diagnosis().points_batch(messages))
+
+        report = d.report()
+        features = {'words', 'words_count', 'caps_count', 'lower', 'emotes_count'}
+        self.assertEqual(set(report), {'precompute'} | features | {str(s) for s in d.symptoms})
+        self.assertEqual(report['BannedPhrase']['calls'], 6)
+        self.assertEqual(report['BannedPhrase']['hit_rate'], 2 / 6)
+
+    # check that only the features needed are timed, apart from the symptoms reading them
+    def test_features(self):
+        d = Diagnosis([symptoms.CapsRatio(), symptoms.MinimumWordCount()], instrument=True)
+
+        with patch.object(d.instrumentation, 'record', wraps=d.instrumentation.record) as record:
+            d.points("hello")
+
+        self.assertEqual([c[0][0] for c in record.call_args_list],
+                         ['precompute', 'words', 'words_count', 'caps_count', 'CapsRatio', 'MinimumWordCount'])
+
+    # check that there's nothing to report by default
+    def test_not_instrumented(self):
+        self.assertEqual(Diagnosis().report(), None)
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.points_batch()
+class TestDiagnosisPointsBatch(unittest.TestCase):
+
+    # check that cached messages aren't scored again
+    def test_cache(self):
+        d = Diagnosis(cache_size=10)
+        messages = ["Kappa Kappa", "lol", "Kappa Kappa", "hello there"]
+        d.points("lol")
+
+        with patch.object(d.scorer, 'points_batch', wraps=d.scorer.points_batch) as points_batch:
+            self.assertEqual(d.points_batch(messages), Diagnosis().points_batch(messages))
+
+            points_batch.assert_called_once_with(["Kappa Kappa", "Kappa Kappa", "hello there"], [None] * 3)
+
+        self.assertEqual(d.points_batch(messages), Diagnosis().points_batch(messages))
+        self.assertEqual(len(d.cache), 3)
+
+
+# twitchcancer.symptom.diagnosis.Diagnosis.from_config()
+class TestDiagnosisFromConfig(unittest.TestCase):
+
+    def config(self):
+        return copy.deepcopy(Config.get('monitor.diagnosis'))
+
+    # check that the default config gives the default symptoms
+    def test_default(self):
+        d = Diagnosis.from_config(self.config())
+        messages = ["Kappa Kappa Kappa", "lol", "WHAT IS THIS", "hello there how are you", "darude sandstorm"]
+
+        self.assertEqual([str(s) for s in d.symptoms], [str(s) for s in Diagnosis().symptoms])
+        self.assertEqual([d.points(m) for m in messages], [Diagnosis().points(m) for m in messages])
+
+    # check that symptoms not tried on live chat yet are left out
+    def test_opt_in(self):
+        d = Diagnosis.from_config(self.config())
+
+        for symptom in (symptoms.CombiningMarkRatio, symptoms.AsciiArtRatio, symptoms.UnusualCharacterCount):
+            self.assertFalse(any(isinstance(s, symptom) for s in d.symptoms))
+
+    # check that unknown symptoms are refused
+    def test_unknown(self):
+        config = self.config()
+        config['symptoms'].append({'name': 'Diagnosis'})
+
+        self.assertRaises(ValueError, Diagnosis.from_config, config)
+
+    # check that data files replace the bundled lists
+    def test_data(self):
+        config = self.config()
+
+        with tempfile.TemporaryDirectory() as directory:
+            config['data']['banned'] = os.path.join(directory, 'banned.txt')
+            config['data']['emotes'] = os.path.join(directory, 'emotes.txt')
+            with open(config['data']['banned'], 'w') as f:
+                f.write("hello there\n")
+            with open(config['data']['emotes'], 'w') as f:
+                f.write("Potato\n")
+
+            d = Diagnosis.from_config(config)
+
+        self.assertEqual(d.emotes.get(), {'Potato'})
+        self.assertGreater(d.points("hello there"), Diagnosis().points("hello there"))
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from twitchcancer.symptom.diagnosis import Diagnosis
+from twitchcancer.symptom.emotes import EmoteSets
+from twitchcancer.symptom.symptoms import EmoteCount
+
+
+# twitchcancer.symptom.emotes.EmoteSets
+class TestEmoteSets(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.write('global.txt', "catJAM\nOMEGALUL\n")
+        self.write('channels/forsen.txt', "forsenE\n")
+        self.write('channels/forsen.bttv.txt', "forsenCD\n")
+        self.write('channels/lirik.txt', "lirikN\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def emote_sets(self):
+        return EmoteSets(files=[os.path.join(self.directory.name, 'global.txt')],
+                         directory=os.path.join(self.directory.name, 'channels'))
+
+    # check that channels get global emotes and their own ones
+    def test_get(self):
+        e = self.emote_sets()
+
+        self.assertEqual(e.get(), EmoteCount.emotes | {'catJAM', 'OMEGALUL'})
+        self.assertEqual(e.get('#forsen'), e.get() | {'forsenE', 'forsenCD'})
+        self.assertEqual(e.get('#lirik'), e.get() | {'lirikN'})
+        self.assertIs(e.get('#unknown'), e.get())
+
+        self.assertIn('#forsen', e)
+        self.assertNotIn('#unknown', e)
+
+    # check that merged sets are built once
+    def test_merged_once(self):
+        e = self.emote_sets()
+
+        self.assertIs(e.get('#forsen'), e.get('#forsen'))
+
+    # check that reloading rereads files and forgets merged sets
+    def test_reload(self):
+        e = self.emote_sets()
+        before = e.get('#forsen')
+
+        self.write('channels/forsen.txt', "forsenPls\n")
+        e.reload()
+
+        self.assertIsNot(e.get('#forsen'), before)
+        self.assertIn('forsenPls', e.get('#forsen'))
+        self.assertNotIn('forsenE', e.get('#forsen'))
+
+    # check that channel emotes are counted in their channel only
+    def test_diagnosis(self):
+        d = Diagnosis(emotes=self.emote_sets(), cache_size=10)
+        message = "forsenE forsenE forsenE forsenE"
+
+        self.assertGreater(d.points(message, '#forsen'), d.points(message, '#lirik'))
+        self.assertEqual(d.points_batch([message] * 2, ['#forsen', '#lirik']),
+                         [d.points(message, '#forsen'), d.points(message, '#lirik')])
+        self.assertEqual(d.compiled(message, '#forsen'), d.scorer.points(message, '#forsen'))
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import patch
+
+from twitchcancer.symptom.instrumentation import Instrumentation, SymptomStats
+
+
+# twitchcancer.symptom.instrumentation.SymptomStats
+class TestSymptomStats(unittest.TestCase):
+
+    # check that calls, hits and time add up
+    def test_record(self):
+        s = SymptomStats()
+        s.record(100, 0)
+        s.record(300, 2)
+
+        summary = s.summary()
+        self.assertEqual(summary['calls'], 2)
+        self.assertEqual(summary['hit_rate'], 0.5)
+        self.assertEqual(summary['total_ms'], 400 / 1e6)
+        self.assertEqual(summary['mean_us'], 0.2)
+
+    # check that percentiles come from recent durations only
+    def test_percentile(self):
+        s = SymptomStats(samples=100)
+        for d in range(1000):
+            s.record(d, 0)
+
+        self.assertEqual(s.percentile(0), 900)
+        self.assertEqual(s.percentile(50), 950)
+        self.assertEqual(s.percentile(100), 999)
+
+    # check that we don't fail without any call
+    def test_empty(self):
+        summary = SymptomStats().summary()
+
+        self.assertEqual(summary['calls'], 0)
+        self.assertEqual(summary['p99_us'], 0)
+
+
+# twitchcancer.symptom.instrumentation.Instrumentation
+class TestInstrumentation(unittest.TestCase):
+
+    # check that the report is sorted by total time
+    def test_report(self):
+        i = Instrumentation()
+        i.record('cheap', 10)
+        i.record('expensive', 1000, 1)
+
+        self.assertEqual(list(i.report()), ['expensive', 'cheap'])
+
+    # check that we only log periodically
+    @patch('twitchcancer.symptom.instrumentation.Instrumentation.log')
+    def test_tick(self, log):
+        i = Instrumentation(interval=60)
+        i.tick()
+        self.assertEqual(log.call_count, 0)
+
+        i._last_report -= 61
+        i.tick()
+        self.assertEqual(log.call_count, 1)
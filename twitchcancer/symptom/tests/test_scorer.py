@@ -0,0 +1,109 @@
+import unittest
+
+from twitchcancer.symptom import symptoms
+from twitchcancer.symptom.benchmark import generate
+from twitchcancer.symptom.diagnosis import Diagnosis
+from twitchcancer.symptom.scorer import FusedScorer
+
+messages = [
+    'this is a long sentence but not too long',
+    'Kappa',
+    'k',
+    'Elephant',
+    'lol',
+    'lol lol lol lol',
+    'THIS Kappa IS Kappa WHAT Kappa I Kappa CALL Kappa MUSIC',
+    'this is a long sentence but so long that its too long this is a long sentence but so long '
+    'that its too long this is a long sentence but so long that its too long',
+    'THATS A LOT OF Caps',
+    'Darude sandstorm message deleted Darude Sandstorm',
+    'Kappa KappaPride Keepo Keepo KappaPride',
+    'h\u0338\u0322\u031be\u0337\u0321\u0360l\u0334\u034el\u0335\u0330o\u0336\u0327 zalgo',
+    '\u28ff\u28ff\u28ff\u283f\u283f \u2588\u2588\u2588 \u2500\u2500 art',
+    'private \ue000\ue001\ue002\ue003 use \U000e0000',
+]
+
+every_symptom = [
+    symptoms.Symptom(),
+    symptoms.MinimumWordCount(3),
+    symptoms.MinimumMessageLength(10),
+    symptoms.MaximumMessageLength(10),
+    symptoms.CapsRatio(0.1),
+    symptoms.EmoteCount(2),
+    symptoms.EmoteRatio(0.2),
+    symptoms.EmoteCountAndRatio(2, 0.2),
+    symptoms.BannedPhrase(),
+    symptoms.EchoingRatio(0.9),
+    symptoms.CombiningMarkRatio(0.1),
+    symptoms.AsciiArtRatio(0.3),
+    symptoms.UnusualCharacterCount(1),
+]
+
+
+# twitchcancer.symptom.scorer.FusedScorer.symptom_points()
+class TestFusedScorerSymptomPoints(unittest.TestCase):
+
+    # check that we get the same points as the symptoms themselves
+    def test_same_as_symptoms(self):
+        scorer = FusedScorer(every_symptom)
+
+        for message in messages:
+            m = symptoms.Symptom.precompute(message)
+            expected = [s.points(m) for s in every_symptom]
+            self.assertEqual(scorer.symptom_points(message), expected, message)
+
+    # check that the default diagnosis is scored the same way
+    def test_same_as_diagnosis(self):
+        d = Diagnosis()
+
+        for message in messages:
+            m = symptoms.Symptom.precompute(message)
+            expected = [s.points(m) for s in d.symptoms]
+            self.assertEqual(d.scorer.symptom_points(message), expected, message)
+
+
+# twitchcancer.symptom.scorer.FusedScorer.points()
+class TestFusedScorerPoints(unittest.TestCase):
+
+    # check that points are the total of each symptom's points
+    def test_total(self):
+        scorer = FusedScorer(every_symptom)
+
+        for message in messages:
+            self.assertEqual(scorer.points(message), sum(scorer.symptom_points(message)))
+
+
+# twitchcancer.symptom.scorer.FusedScorer.points_batch()
+class TestFusedScorerPointsBatch(unittest.TestCase):
+
+    # check that we get the same points as scoring each message
+    def test_same_as_points(self):
+        scorer = FusedScorer(every_symptom)
+
+        self.assertEqual(scorer.points_batch(messages), [scorer.points(m) for m in messages])
+
+    # check that we get the same points on lots of random messages
+    def test_same_as_points_random(self):
+        scorer = FusedScorer(every_symptom)
+        random_messages = generate(2000)
+
+        self.assertEqual(scorer.points_batch(random_messages), [scorer.points(m) for m in random_messages])
+
+    # check that the default diagnosis is scored the same way
+    def test_same_as_diagnosis(self):
+        d = Diagnosis()
+
+        self.assertEqual(d.points_batch(messages), [d.points(m) for m in messages])
+
+    # check that we get native ints
+    def test_types(self):
+        scorer = FusedScorer(every_symptom)
+
+        self.assertTrue(all(type(p) is int for p in scorer.points_batch(messages)))
+        self.assertEqual(scorer.points_batch([]), [])
+
+    # check that messages without words fail like they do on the scalar path
+    def test_no_words(self):
+        scorer = FusedScorer(every_symptom)
+
+        self.assertRaises(ZeroDivisionError, lambda: scorer.points_batch(['lol', ' ']))
@@ -0,0 +1,77 @@
+import unittest
+
+from twitchcancer.symptom.simhash import SimHashWindow, distance, simhash
+
+
+# twitchcancer.symptom.simhash.simhash()
+class TestSimHash(unittest.TestCase):
+
+    # check that each bit is set when most tokens have it set
+    def test_majority(self):
+        tokens = [0b0011, 0b0101, 0b0110, 0b1111]
+
+        # ints hash to themselves
+        self.assertEqual(simhash(tokens), 0b0111)
+        self.assertEqual(simhash(tokens[:3]), 0b0111)
+        self.assertEqual(simhash(tokens[:2]), 0b0001)
+        self.assertEqual(simhash(tokens[:1]), 0b0011)
+        self.assertEqual(simhash([]), 0)
+
+    # check that we get the same result as counting each bit separately
+    def test_same_as_counting(self):
+        tokens = "the quick brown fox jumps over the lazy dog again and again".split()
+        hashes = [hash(t) & (2 ** 64 - 1) for t in tokens]
+
+        expected = 0
+        for bit in range(64):
+            if sum(h >> bit & 1 for h in hashes) > len(tokens) // 2:
+                expected |= 1 << bit
+
+        self.assertEqual(simhash(tokens), expected)
+
+    # check that similar texts get close fingerprints
+    def test_similar(self):
+        text = "this is a very long copypasta that everybody is posting in chat right now".split()
+
+        self.assertEqual(simhash(text), simhash(list(text)))
+        self.assertTrue(distance(simhash(text), simhash(text + ["LUL"])) <
+                        distance(simhash(text), simhash("something else entirely and not that long".split())))
+
+
+# twitchcancer.symptom.simhash.distance()
+class TestDistance(unittest.TestCase):
+
+    def test_distance(self):
+        self.assertEqual(distance(0b1010, 0b1010), 0)
+        self.assertEqual(distance(0b1010, 0b0101), 4)
+
+
+# twitchcancer.symptom.simhash.SimHashWindow
+class TestSimHashWindow(unittest.TestCase):
+
+    # check that we count fingerprints within the distance
+    def test_count(self):
+        w = SimHashWindow(size=10)
+        w.add(0)
+        w.add(0)
+        w.add(0b111)
+        w.add(0b1111)
+
+        self.assertEqual(w.count(0, max_distance=0), 2)
+        self.assertEqual(w.count(0, max_distance=3), 3)
+        self.assertEqual(w.count(1 << 63, max_distance=3), 2)
+        self.assertEqual(w.count(2 ** 64 - 1, max_distance=3), 0)
+
+    # check that the oldest fingerprints are forgotten, including from the index
+    def test_size(self):
+        w = SimHashWindow(size=2)
+        w.add(1)
+        w.add(1)
+        w.add(2)
+        w.add(3)
+
+        self.assertEqual(len(w), 2)
+        self.assertEqual(w.count(1, max_distance=0), 0)
+        self.assertEqual(sorted(w._counts), [2, 3])
+        self.assertTrue(all(1 not in fingerprints for fingerprints in w._index.values()))
+        self.assertEqual(len(w._index), 4 + 1)
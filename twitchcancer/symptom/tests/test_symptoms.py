@@ -32,6 +32,63 @@ class TestSymptom(unittest.TestCase):
         for m in messages:
             self.assertFalse(s.exhibited_by(m))
 
+    # twitchcancer.symptom.symptoms.Symptom.observe()
+    # check that the first measures are averaged and later ones are weighted
+    def test_rule_observe(self):
+        s = symptoms.Symptom()
+
+        s.observe(1.0, True)
+        s.observe(3.0, False)
+        self.assertEqual(s.cost, 2.0)
+        self.assertEqual(s.hit_rate, 0.5)
+
+        s.observe(2.0, True, weight=0.5)
+        self.assertEqual(s.samples, 3)
+        self.assertEqual(s.hit_rate, 0.75)
+
+    # twitchcancer.symptom.symptoms.Symptom.priority()
+    # check that cheap and likely symptoms come first, symptoms that never hit last
+    def test_rule_priority(self):
+        cheap, expensive, never = symptoms.Symptom(), symptoms.Symptom(), symptoms.Symptom()
+        cheap.cost, cheap.hit_rate = 1, 0.1
+        expensive.cost, expensive.hit_rate = 10, 0.5
+        never.cost = 0.1
+
+        self.assertEqual(sorted([never, expensive, cheap], key=lambda s: s.priority()), [cheap, expensive, never])
+
+
+# twitchcancer.symptom.symptoms.Message
+class TestMessage(unittest.TestCase):
+
+    # check that every feature is computed right
+    def test_features(self):
+        m = symptoms.Message('Kappa THIS is Kappa')
+
+        self.assertEqual(m.text, 'Kappa THIS is Kappa')
+        self.assertEqual(m.length, 19)
+        self.assertEqual(m.words, ['Kappa', 'THIS', 'is', 'Kappa'])
+        self.assertEqual(m.words_count, 4)
+        self.assertEqual(m.caps_count, 6)
+        self.assertEqual(m.lower, 'kappa this is kappa')
+        self.assertEqual(m.emotes_count, 2)
+
+    # check that features are only computed when needed, and only once
+    def test_lazy(self):
+        m = symptoms.Message('Kappa Kappa')
+
+        self.assertEqual(m._words, None)
+        self.assertEqual(m._lower, None)
+
+        words = m.words
+        self.assertTrue(m.words is words)
+        self.assertEqual(m._lower, None)
+
+    # check that messages don't get a __dict__
+    def test_slots(self):
+        m = symptoms.Message('Kappa')
+
+        self.assertRaises(AttributeError, lambda: setattr(m, 'foo', 'bar'))
+
 
 # twitchcancer.symptom.symptoms.MinimumWordCount
 class TestMinimumWordCount(unittest.TestCase):
@@ -256,3 +313,107 @@ class TestEchoingRatio(unittest.TestCase):
         self.assertEqual(s.points(p("lol lol lol")), 2)
         self.assertEqual(s.points(p("lol lol lol lol")), 2)
         self.assertEqual(s.points(p("lol rekt lol rekt")), 1)
+
+
+# twitchcancer.symptom.symptoms.CombiningMarkRatio
+class TestCombiningMarkRatio(unittest.TestCase):
+
+    # exhibited_by()
+    def test_combining_mark_ratio_exhibited_by(self):
+        s = symptoms.CombiningMarkRatio()
+
+        for m in messages.values():
+            self.assertFalse(s.exhibited_by(m))
+
+    # points()
+    def test_combining_mark_ratio_points(self):
+        s = symptoms.CombiningMarkRatio()
+        self.assertEqual(s.points(p("cr\u00e8me br\u00fbl\u00e9e")), 0)
+        self.assertEqual(s.points(p("cre\u0300me bru\u0302le\u0301e")), 0)
+        self.assertEqual(s.points(p("h\u0338e\u0337l\u0334l\u0335o\u0336")), 0)
+        self.assertEqual(s.points(p("h\u0338\u0322\u031be\u0337\u0321\u0360l\u0334\u034e")), 2)
+        self.assertEqual(s.points(p("h\u0338\u0322\u031b\u0334\u0335e\u0337\u0321\u0360\u0322\u034e")), 3)
+
+    # check that the vowel signs and viramas of other scripts aren't taken for zalgo
+    def test_combining_mark_ratio_scripts(self):
+        s = symptoms.CombiningMarkRatio()
+        self.assertEqual(s.points(p("नमस्ते दोस्तों आज हम खेलेंगे")), 0)
+        self.assertEqual(s.points(p("สวัสดีครับ ทุกคน วันนี้")), 0)
+        self.assertEqual(s.points(p("مَرْحَبًا بِكُمْ")), 0)
+
+
+# twitchcancer.symptom.symptoms.AsciiArtRatio
+class TestAsciiArtRatio(unittest.TestCase):
+
+    # exhibited_by()
+    def test_ascii_art_ratio_exhibited_by(self):
+        s = symptoms.AsciiArtRatio()
+
+        for m in messages.values():
+            self.assertFalse(s.exhibited_by(m))
+
+    # points()
+    def test_ascii_art_ratio_points(self):
+        s = symptoms.AsciiArtRatio()
+        self.assertEqual(s.points(p("nice \u2588\u2588 bar")), 0)
+        self.assertEqual(s.points(p("\u28ff\u28ff\u28ff \u283f\u283f\u283f")), 2)
+        self.assertEqual(s.points(p("\u2554\u2550\u2550\u2557")), 3)
+
+
+# twitchcancer.symptom.symptoms.UnusualCharacterCount
+class TestUnusualCharacterCount(unittest.TestCase):
+
+    # exhibited_by()
+    def test_unusual_character_count_exhibited_by(self):
+        s = symptoms.UnusualCharacterCount()
+
+        for m in messages.values():
+            self.assertFalse(s.exhibited_by(m))
+
+    # points()
+    def test_unusual_character_count_points(self):
+        s = symptoms.UnusualCharacterCount()
+        self.assertEqual(s.points(p("\x01ACTION waves\x01")), 0)
+        self.assertEqual(s.points(p("family \U0001f468\u200d\U0001f469\u200d\U0001f467\ufe0f")), 0)
+        self.assertEqual(s.points(p("bypass \U000e0000")), 0)
+        self.assertEqual(s.points(p("\ue000\ue001\ue002")), 1)
+        self.assertEqual(s.points(p("\ue000\ue001\ue002\ue003\ue004\ue005\ue006\ue007")), 2)
+
+
+# twitchcancer.symptom.symptoms.Copypasta
+class TestCopypasta(unittest.TestCase):
+    pasta = 'this is a very long copypasta that everybody is posting in chat right now'
+
+    # points()
+    def test_copypasta_points(self):
+        s = symptoms.Copypasta(count=1)
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#foo')), 0)
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#foo')), 0)
+        self.assertEqual(s.points(symptoms.Message(self.pasta.upper(), '#foo')), 1)
+
+        for _ in range(5):
+            s.points(symptoms.Message(self.pasta, '#foo'))
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#foo')), 2)
+
+    # check that channels don't share their recent messages
+    def test_copypasta_channels(self):
+        s = symptoms.Copypasta(count=0)
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#foo')), 0)
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#bar')), 0)
+        self.assertEqual(s.points(symptoms.Message(self.pasta, '#foo')), 1)
+
+    # check that short messages are ignored
+    def test_copypasta_short(self):
+        s = symptoms.Copypasta(count=0)
+        for _ in range(5):
+            self.assertEqual(s.points(symptoms.Message('LUL LUL', '#foo')), 0)
+
+    # check that memory stays bounded
+    def test_copypasta_bounded(self):
+        s = symptoms.Copypasta(window=10, channels=2)
+        for n in range(100):
+            s.points(symptoms.Message('{0} {1}'.format(self.pasta, n), '#{0}'.format(n % 2)))
+        s.points(symptoms.Message(self.pasta, '#2'))
+
+        self.assertEqual(list(s.windows), ['#1', '#2'])
+        self.assertEqual(len(s.windows['#1']), 10)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 
 from twitchcancer.config import Config
@@ -57,3 +59,47 @@ class TestConfigDefaults(unittest.TestCase):
         self.assertEqual('monitor' in Config.config, True)
         self.assertEqual('chat' in Config.config['monitor'], True)
         self.assertEqual('unknown' not in Config.config, True)
+
+
+# twitchcancer.config.Config.reload()
+class TestConfigReload(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = Config.paths
+        Config.paths = []
+
+    def tearDown(self):
+        Config.paths = self.paths
+        Config.reload()
+
+    # check that files are read again on top of the defaults
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yml')
+            with open(path, 'w') as f:
+                f.write('logging:\n  level: DEBUG\n')
+
+            Config.load(path)
+            self.assertEqual(Config.get('logging.level'), 'DEBUG')
+
+            with open(path, 'w') as f:
+                f.write('logging:\n  level: INFO\n')
+            Config.config['expose'] = {}
+
+            Config.reload()
+            self.assertEqual(Config.get('logging.level'), 'INFO')
+            self.assertTrue('websocket' in Config.get('expose'))
+            self.assertEqual(Config.paths, [path])
+
+    # check that reading files doesn't change the current config
+    def test_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yml')
+            with open(path, 'w') as f:
+                f.write('logging:\n  level: DEBUG\n')
+            Config.paths = [path]
+
+            config = Config.read()
+
+        self.assertEqual(Config.get('logging.level', config), 'DEBUG')
+        self.assertNotEqual(Config.get('logging.level'), 'DEBUG')
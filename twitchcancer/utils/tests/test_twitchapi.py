@@ -0,0 +1,184 @@
+import asyncio
+import json
+import unittest
+import urllib.parse
+
+import requests
+
+from twitchcancer.utils.twitchapi import AsyncTwitchApi, TwitchApiError
+
+
+# a local HTTP server answering like Twitch's API, with streams of decreasing viewer counts
+class StubServer:
+
+    def __init__(self, viewers, failures=(), chunked=False, delay=0):
+        self.viewers = viewers
+        self.chunked = chunked
+        self.delay = delay
+
+        # statuses to answer the first requests with, along with a truncated body, or None to close the connection
+        self.failures = list(failures)
+
+        self.requests = []
+        self.connections = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return 'http://127.0.0.1:{0}/kraken'.format(self.server.sockets[0].getsockname()[1])
+
+    def stop(self):
+        self.server.close()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+
+        while True:
+            request = await reader.readline()
+            if not request:
+                break
+            while await reader.readline() not in (b'\r\n', b''):
+                pass
+
+            target = request.split()[1].decode()
+            self.requests.append(target)
+            await asyncio.sleep(self.delay)
+
+            if self.failures:
+                status = self.failures.pop(0)
+                if status is None:
+                    break
+                self.respond(writer, status, b'{"streams": [')
+                continue
+
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(target).query)
+            offset, limit = int(query['offset'][0]), int(query['limit'][0])
+            streams = [{'viewers': v, 'channel': {'name': 'channel{0}'.format(i)}}
+                       for i, v in enumerate(self.viewers)][offset:offset + limit]
+
+            self.respond(writer, 200, json.dumps({'streams': streams}).encode())
+
+        writer.close()
+
+    def respond(self, writer, status, body):
+        writer.write('HTTP/1.1 {0} Whatever\r\n'.format(status).encode())
+
+        if self.chunked:
+            writer.write(b'Transfer-Encoding: chunked\r\n\r\n')
+            for i in range(0, len(body), 100):
+                chunk = body[i:i + 100]
+                writer.write('{0:x}\r\n'.format(len(chunk)).encode() + chunk + b'\r\n')
+            writer.write(b'0\r\n\r\n')
+        else:
+            writer.write('Content-Length: {0}\r\n\r\n'.format(len(body)).encode() + body)
+
+
+# runs {call}(api) against a stub server, returns what it returned
+def run(server, call, **kwargs):
+    async def main():
+        api = AsyncTwitchApi(url=await server.start(), **kwargs)
+        api.backoff = 0.01
+
+        try:
+            return await call(api)
+        finally:
+            api.close()
+
+            # let the server see the connection close
+            await asyncio.sleep(0.01)
+            server.stop()
+
+    return asyncio.run(main())
+
+
+# twitchcancer.utils.twitchapi.AsyncTwitchApi.stream_list()
+class TestAsyncTwitchApiStreamList(unittest.TestCase):
+
+    # check that pages are read until a stream is under the viewer count
+    def test_pages(self):
+        server = StubServer(list(range(1000, 0, -4)))
+        data = run(server, lambda api: api.stream_list(viewers=700, limit=20))
+
+        self.assertEqual(len(server.requests), 4)
+        self.assertTrue(all(s['viewers'] > 700 for s in data['streams'][:75]))
+        self.assertEqual(data['streams'][0]['viewers'], 1000)
+        self.assertIn('offset=60', server.requests[-1])
+
+    # check that the last page stops the listing
+    def test_last_page(self):
+        server = StubServer([10] * 30)
+        data = run(server, lambda api: api.stream_list(viewers=0, limit=20))
+
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(len(data['streams']), 30)
+
+    # check that listing stops after max_pages
+    def test_max_pages(self):
+        server = StubServer([100] * 100)
+        data = run(server, lambda api: api.stream_list(viewers=0, limit=10), max_pages=3)
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(data['streams']), 30)
+
+    # check that every request goes over the same connection
+    def test_keep_alive(self):
+        server = StubServer(list(range(100, 0, -1)))
+        run(server, lambda api: api.stream_list(viewers=0, limit=10))
+
+        self.assertEqual(len(server.requests), 11)
+        self.assertEqual(server.connections, 1)
+
+    # check that chunked responses are read
+    def test_chunked(self):
+        server = StubServer(list(range(100, 0, -1)), chunked=True)
+        data = run(server, lambda api: api.stream_list(viewers=50, limit=20))
+
+        self.assertEqual(len(data['streams']), 60)
+        self.assertEqual(server.connections, 1)
+
+
+# twitchcancer.utils.twitchapi.AsyncTwitchApi.request()
+class TestAsyncTwitchApiRequest(unittest.TestCase):
+
+    # check that server errors and lost connections are tried again
+    def test_retry(self):
+        server = StubServer([10], failures=[503, None, 429])
+        data = run(server, lambda api: api.request('/streams/', {'limit': 1, 'offset': 0}), retries=3)
+
+        self.assertEqual(len(data['streams']), 1)
+        self.assertEqual(len(server.requests), 4)
+
+    # check that truncated responses are tried again
+    def test_truncated(self):
+        server = StubServer([10], failures=[200])
+        data = run(server, lambda api: api.request('/streams/', {'limit': 1, 'offset': 0}), retries=1)
+
+        self.assertEqual(len(data['streams']), 1)
+        self.assertEqual(len(server.requests), 2)
+
+    # check that client errors aren't tried again
+    def test_no_retry(self):
+        server = StubServer([10], failures=[404])
+
+        with self.assertRaises(TwitchApiError) as context:
+            run(server, lambda api: api.request('/streams/'), retries=3)
+
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(len(server.requests), 1)
+
+    # check that retries are given up on
+    def test_too_many_failures(self):
+        server = StubServer([10], failures=[500, 500, 500])
+
+        with self.assertRaises(TwitchApiError):
+            run(server, lambda api: api.request('/streams/'), retries=2)
+
+        self.assertEqual(len(server.requests), 3)
+
+    # check that a slow server times out
+    def test_timeout(self):
+        server = StubServer([10], delay=1)
+
+        with self.assertRaises(requests.Timeout):
+            run(server, lambda api: api.request('/streams/'), timeout=0.05, retries=1)
+
+        self.assertEqual(server.connections, 2)
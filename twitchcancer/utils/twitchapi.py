@@ -1,4 +1,6 @@
+import asyncio
 import logging
+
 import requests
 
 from twitchcancer.config import Config
@@ -6,6 +8,27 @@ from twitchcancer.config import Config
 logger = logging.getLogger(__name__)
 
 
+def headers() -> dict:
+    return {
+        'Accept': 'application/vnd.twitchtv.v5+json',
+        'Client-ID': Config.get('monitor.chat.clientid'),
+        'User-agent': 'twitchcancer/python'
+    }
+
+
+class TwitchApiError(Exception):
+
+    def __init__(self, status, reason=''):
+        super().__init__('HTTP {0} {1}'.format(status, reason).strip())
+
+        self.status = status
+
+    # server errors and rate limiting are worth trying again, other errors would fail the same way
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
 class TwitchApi:
 
     @classmethod
@@ -19,11 +42,88 @@ class TwitchApi:
     def request(cls, url: str) -> dict:
         """ Makes a call to Twitch's API
         """
-        headers = {
-            'Accept': 'application/vnd.twitchtv.v5+json',
-            'Client-ID': Config.get('monitor.chat.clientid'),
-            'User-agent': 'twitchcancer/python'
-        }
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers())
         response.raise_for_status()
         return response.json()
+
+
+class AsyncTwitchApi:
+    """ Calls Twitch's API from the event loop, requests run in a thread over a keep-alive session
+
+    url: base URL of the API, eg. a local stub server in tests
+    timeout: seconds to wait for the server to accept the connection or to send data
+    retries: times a failed request is tried again, waiting twice as long each time
+    max_pages: pages of streams to read at most, whatever the viewer count
+    """
+
+    # seconds to wait before the first retry
+    backoff = 0.5
+
+    def __init__(self, url=None, timeout=None, retries=None, max_pages=None):
+        super().__init__()
+
+        self.url = (url or Config.get('monitor.chat.api.url')).rstrip('/')
+        self.timeout = timeout if timeout is not None else Config.get('monitor.chat.api.timeout')
+        self.retries = retries if retries is not None else Config.get('monitor.chat.api.retries')
+        self.max_pages = max_pages if max_pages is not None else Config.get('monitor.chat.api.max_pages')
+
+        self.session = requests.Session()
+
+        # sessions aren't thread-safe, requests go one at a time
+        self._lock = asyncio.Lock()
+
+    async def stream_list(self, viewers: int = 0, limit: int = 100) -> dict:
+        """ Returns the list of streams over n viewers, sorted by viewer count, reading as many pages as needed
+        """
+        streams = []
+        seen = set()
+
+        for page in range(self.max_pages):
+            data = await self.request('/streams/', {'limit': limit, 'offset': page * limit})
+            batch = data.get('streams') or []
+
+            # viewer counts change between pages, a stream can move over to the next one
+            for stream in batch:
+                name = stream['channel']['name']
+                if name not in seen:
+                    seen.add(name)
+                    streams.append(stream)
+
+            if len(batch) < limit or batch[-1]['viewers'] <= viewers:
+                break
+        else:
+            logger.warning("stopped listing streams after %s pages, some channels over %s viewers are missing",
+                           self.max_pages, viewers)
+
+        streams.sort(key=lambda s: s['viewers'], reverse=True)
+        return {'streams': streams}
+
+    async def request(self, path: str, params: dict = None) -> dict:
+        """ Makes a call to Twitch's API, trying again on network and server errors and on truncated JSON
+        """
+        url = self.url + path
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._lock:
+                    return await loop.run_in_executor(None, self._request, url, params)
+            except (requests.RequestException, ValueError, TwitchApiError) as e:
+                if attempt == self.retries or (isinstance(e, TwitchApiError) and not e.retryable):
+                    raise
+
+                delay = self.backoff * 2 ** attempt
+                logger.warning("request to %s failed (%s), trying again in %.1fs", url, e or type(e).__name__,
+                               delay)
+                await asyncio.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, url: str, params: dict) -> dict:
+        response = self.session.get(url, params=params, headers=headers(), timeout=self.timeout)
+
+        if response.status_code >= 400:
+            raise TwitchApiError(response.status_code, response.reason)
+
+        return response.json()